@@ -3,7 +3,7 @@ import sys
 import time
 import threading
 from functools import lru_cache
-from collections import defaultdict
+from pathlib import Path
 
 import cv2
 import numpy as np
@@ -13,32 +13,30 @@ from picamera2.devices import IMX500
 from picamera2.devices.imx500 import (NetworkIntrinsics,
                                       postprocess_nanodet_detection)
 
-# GPIO for ultrasonic sensor
-try:
-    import RPi.GPIO as GPIO
-    GPIO_AVAILABLE = True
-except ImportError:
-    GPIO_AVAILABLE = False
+# Share the detector package's audio system (persistent engine, bounded queue)
+# and edge-timed ultrasonic sensor
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from pi_detector.announcements import PRIORITY_HIGH, PRIORITY_NORMAL
+from pi_detector.audio import AudioOutputSystem
+from pi_detector.gating import PresenceGate, UltrasonicTrigger
+from pi_detector.overlay import DoubleBuffer, OverlayRenderer
+from pi_detector.ultrasonic import (ACTIVATE, GPIO_AVAILABLE, FakeGPIO,
+                                    PresenceEstimator, UltrasonicSensor)
+
+if not GPIO_AVAILABLE:
     print("Warning: RPi.GPIO not available. Running without ultrasonic sensor.")
 
-# Try different audio methods
-try:
-    import pyttsx3
-    AUDIO_METHOD = "pyttsx3"
-except ImportError:
-    try:
-        from gtts import gTTS
-        import os
-        AUDIO_METHOD = "gtts"
-    except ImportError:
-        import subprocess
-        AUDIO_METHOD = "espeak"
-
-last_detections = []
+last_detections = None
+# parse_detections publishes, the camera's pre_callback reads without locking
+results = DoubleBuffer()
+label_renderer = OverlayRenderer(font_scale=0.5, thickness=1, alpha=0.3)
+status_renderer = OverlayRenderer(font_scale=0.7, thickness=2)
 last_announced = {}  # Track last announcement time for each object
 announcement_cooldown = 3.0  # Seconds between announcements for same object
-audio_queue = []
-audio_lock = threading.Lock()
+audio = None
+sensor = None
+gate = None
+STANDBY_FPS = 1
 
 # Ultrasonic sensor state
 sensor_active = False
@@ -54,143 +52,82 @@ ANIMALS = {
 }
 
 
-class Detection:
-    def __init__(self, coords, category, conf, metadata):
-        """Create a Detection object, recording the bounding box, category and confidence."""
-        self.category = category
-        self.conf = conf
-        self.box = imx500.convert_inference_coords(coords, metadata, picam2)
+# Inference-to-ISP box transform, keyed by ScalerCrop
+_box_affine_cache = {}
 
 
-def setup_ultrasonic_sensor(trig_pin, echo_pin):
-    """Setup GPIO pins for ultrasonic sensor."""
-    if not GPIO_AVAILABLE:
-        return False
-    
-    try:
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(trig_pin, GPIO.OUT)
-        GPIO.setup(echo_pin, GPIO.IN)
-        GPIO.output(trig_pin, False)
-        time.sleep(0.1)  # Allow sensor to settle
-        print(f"✓ Ultrasonic sensor initialized on GPIO {trig_pin} (TRIG) and {echo_pin} (ECHO)")
-        return True
-    except Exception as e:
-        print(f"✗ Failed to setup ultrasonic sensor: {e}")
-        return False
+class Detections:
+    """Detections of one frame as arrays: boxes (N, 4) as x, y, w, h in ISP pixels."""
 
+    def __init__(self, boxes, categories, scores):
+        self.boxes = boxes
+        self.categories = categories
+        self.scores = scores
+        self.targets = target_masks()[0][categories]
 
-def measure_distance(trig_pin, echo_pin):
-    """Measure distance using ultrasonic sensor. Returns distance in meters."""
-    if not GPIO_AVAILABLE:
-        return 0.5  # Default to active for testing without sensor
-    
-    try:
-        # Send trigger pulse
-        GPIO.output(trig_pin, True)
-        time.sleep(0.00001)  # 10 microseconds
-        GPIO.output(trig_pin, False)
-        
-        # Wait for echo
-        timeout = time.time() + 0.1  # 100ms timeout
-        pulse_start = time.time()
-        while GPIO.input(echo_pin) == 0 and time.time() < timeout:
-            pulse_start = time.time()
-        
-        pulse_end = time.time()
-        while GPIO.input(echo_pin) == 1 and time.time() < timeout:
-            pulse_end = time.time()
-        
-        # Calculate distance
-        pulse_duration = pulse_end - pulse_start
-        distance = pulse_duration * 17150  # Speed of sound / 2 in cm
-        distance_meters = distance / 100
-        
-        # Filter out invalid readings
-        if distance_meters > 4 or distance_meters < 0.02:
-            return None
-        
-        return distance_meters
-    except Exception as e:
-        print(f"Sensor read error: {e}")
-        return None
+    def __len__(self):
+        return len(self.scores)
 
 
-def ultrasonic_monitor(trig_pin, echo_pin, threshold_distance=1.0):
-    """Background thread to monitor ultrasonic sensor."""
-    global sensor_active, camera_active
-    
-    print(f"🔍 Ultrasonic monitoring started (threshold: {threshold_distance}m)")
-    
-    while True:
-        distance = measure_distance(trig_pin, echo_pin)
-        
-        if distance is not None:
-            with sensor_lock:
-                was_active = sensor_active
-                sensor_active = distance <= threshold_distance
-                
-                if sensor_active and not was_active:
-                    print(f"⚡ Motion detected at {distance:.2f}m - Activating camera!")
-                    camera_active = True
-                elif not sensor_active and was_active:
-                    print(f"💤 No motion ({distance:.2f}m) - Camera standby")
-                    camera_active = False
-        
-        time.sleep(0.1)  # Check every 100ms
+def box_affine(metadata):
+    """Per-axis scale and offset mapping normalized inference coords to ISP pixels."""
+    key = tuple(metadata.get("ScalerCrop", ()))
+    affine = _box_affine_cache.get(key)
+    if affine is None:
+        # The mapping is affine inside the scaler crop; probe two boxes well inside it
+        x0, y0, w0, _ = imx500.convert_inference_coords((0.3, 0.3, 0.4, 0.4), metadata, picam2)
+        x1, y1, _, _ = imx500.convert_inference_coords((0.6, 0.6, 0.7, 0.7), metadata, picam2)
+        scale_x = (x1 - x0) / 0.3
+        scale_y = (y1 - y0) / 0.3
+        out_w, out_h = picam2.camera_configuration()["main"]["size"]
+        affine = (scale_x, x0 - 0.3 * scale_x, scale_y, y0 - 0.3 * scale_y, out_w, out_h)
+        _box_affine_cache.clear()
+        _box_affine_cache[key] = affine
+    return affine
 
 
-def speak_text(text):
-    """Speak the given text using available audio method."""
-    if args.no_audio:
-        return
-    
-    if AUDIO_METHOD == "pyttsx3":
-        try:
-            engine = pyttsx3.init()
-            engine.setProperty('rate', 150)
-            engine.say(text)
-            engine.runAndWait()
-        except Exception as e:
-            print(f"Audio error: {e}")
-    
-    elif AUDIO_METHOD == "gtts":
-        try:
-            tts = gTTS(text=text, lang='en', slow=False)
-            tts.save("/tmp/detection.mp3")
-            os.system("mpg123 -q /tmp/detection.mp3 2>/dev/null")
-        except Exception as e:
-            print(f"Audio error: {e}")
+def convert_boxes(boxes, metadata):
+    """Convert (N, 4) normalized y0, x0, y1, x1 boxes to ISP x, y, w, h in one pass."""
+    scale_x, offset_x, scale_y, offset_y, out_w, out_h = box_affine(metadata)
+    x0 = np.clip(boxes[:, 1] * scale_x + offset_x, 0, out_w)
+    x1 = np.clip(boxes[:, 3] * scale_x + offset_x, 0, out_w)
+    y0 = np.clip(boxes[:, 0] * scale_y + offset_y, 0, out_h)
+    y1 = np.clip(boxes[:, 2] * scale_y + offset_y, 0, out_h)
+    return np.stack([x0, y0, x1 - x0, y1 - y0], axis=1).round().astype(np.int32)
+
+
+def setup_ultrasonic_sensor(trig_pin, echo_pin, simulate=None):
+    """Setup the ultrasonic sensor. Returns the sensor, or None on failure."""
+    gpio = FakeGPIO.load(simulate) if simulate else None
+    sensor = UltrasonicSensor(trig_pin, echo_pin, gpio=gpio)
+    if sensor.setup():
+        print(f"✓ Ultrasonic sensor initialized on GPIO {trig_pin} (TRIG) and {echo_pin} (ECHO)")
+        return sensor
+    print("✗ Failed to setup ultrasonic sensor")
+    return None
+
+
+def on_presence(event, distance):
+    """Presence estimator subscriber that switches the camera pipeline."""
+    global sensor_active, camera_active
     
-    else:  # espeak fallback
-        try:
-            subprocess.run(['espeak', text], 
-                         stdout=subprocess.DEVNULL, 
-                         stderr=subprocess.DEVNULL)
-        except Exception as e:
-            print(f"Audio error: {e}")
-
-
-def audio_worker():
-    """Background thread to handle audio announcements."""
-    global audio_queue
-    while True:
-        with audio_lock:
-            if audio_queue:
-                text = audio_queue.pop(0)
-            else:
-                text = None
-        
-        if text:
-            speak_text(text)
+    with sensor_lock:
+        sensor_active = event == ACTIVATE
+        if sensor_active:
+            print(f"⚡ Motion detected at {distance:.2f}m - Activating camera!")
+            camera_active = True
         else:
-            time.sleep(0.1)
+            print(f"💤 No motion ({distance:.2f}m) - Camera standby")
+            camera_active = False
 
 
-def is_human_or_animal(label):
-    """Check if the detected object is a human or animal."""
-    label_lower = label.lower()
-    return label_lower in HUMANS or label_lower in ANIMALS
+@lru_cache
+def target_masks():
+    """Boolean arrays indexed by class id: (human or animal, human)."""
+    names = [label.lower() for label in get_labels()]
+    humans = np.array([name in HUMANS for name in names], dtype=bool)
+    animals = np.array([name in ANIMALS for name in names], dtype=bool)
+    return humans | animals, humans
 
 
 def announce_detections(detections):
@@ -202,18 +139,19 @@ def announce_detections(detections):
         if not camera_active:
             return
     
-    if not detections or args.no_audio:
+    if not len(detections) or audio is None:
         return
     
     current_time = time.time()
     labels = get_labels()
-    detected_objects = defaultdict(int)
     
     # Count each object type (only humans and animals)
-    for detection in detections:
-        label = labels[int(detection.category)]
-        if is_human_or_animal(label):
-            detected_objects[label] += 1
+    target_ids = detections.categories[detections.targets]
+    if not len(target_ids):
+        return
+    ids, counts = np.unique(target_ids, return_counts=True)
+    detected_objects = {labels[i]: int(n) for i, n in zip(ids, counts)}
+    any_human = bool(target_masks()[1][ids].any())
     
     # Build announcement
     announcements = []
@@ -229,10 +167,8 @@ def announce_detections(detections):
     # Queue announcement
     if announcements:
         announcement_text = ". ".join(announcements)
-        with audio_lock:
-            # Limit queue size
-            if len(audio_queue) < 3:
-                audio_queue.append(announcement_text)
+        priority = PRIORITY_HIGH if any_human else PRIORITY_NORMAL
+        audio.speak(announcement_text, priority)
         # Also print to console
         print(f"🚨 [ALERT] {announcement_text}")
 
@@ -244,7 +180,8 @@ def parse_detections(metadata: dict):
     # Only process if camera is active
     with sensor_lock:
         if not camera_active and args.ultrasonic_enable:
-            return []
+            results.publish(None)
+            return None
     
     bbox_normalization = intrinsics.bbox_normalization
     bbox_order = intrinsics.bbox_order
@@ -269,14 +206,16 @@ def parse_detections(metadata: dict):
 
         if bbox_order == "xy":
             boxes = boxes[:, [1, 0, 3, 2]]
-        boxes = np.array_split(boxes, 4, axis=1)
-        boxes = zip(*boxes)
-
-    last_detections = [
-        Detection(box, category, score, metadata)
-        for box, score, category in zip(boxes, scores, classes)
-        if score > threshold
-    ]
+
+    keep = np.asarray(scores) > threshold
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[keep]
+    last_detections = Detections(
+        convert_boxes(boxes, metadata),
+        np.asarray(classes)[keep].astype(np.intp),
+        np.asarray(scores)[keep]
+    )
+    
+    results.publish(last_detections)
     
     # Announce detections (only humans and animals)
     announce_detections(last_detections)
@@ -295,7 +234,7 @@ def get_labels():
 
 def draw_detections(request, stream="main"):
     """Draw the detections for this request onto the ISP output."""
-    detections = last_results
+    detections = results.read()
     
     labels = get_labels()
     with MappedArray(request, stream) as m:
@@ -304,46 +243,18 @@ def draw_detections(request, stream="main"):
             with sensor_lock:
                 status_text = "ACTIVE" if camera_active else "STANDBY"
                 status_color = (0, 255, 0) if camera_active else (128, 128, 128)
-            cv2.putText(m.array, f"Sensor: {status_text}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
+            status_renderer.draw_text(m.array, f"Sensor: {status_text}", 10, 30, status_color)
         
-        if detections is None or not detections:
+        if detections is None or not len(detections):
             return
             
-        for detection in detections:
-            x, y, w, h = detection.box
-            label = labels[int(detection.category)]
-            label_text = f"{label} ({detection.conf:.2f})"
-            
-            # Highlight humans and animals with different color
-            is_target = is_human_or_animal(label)
-            box_color = (0, 0, 255) if is_target else (0, 255, 0)  # Red for humans/animals, green for others
-            text_color = (0, 0, 255) if is_target else (0, 0, 255)  # Red text for all
-
-            # Calculate text size and position
-            (text_width, text_height), baseline = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-            text_x = x + 5
-            text_y = y + 15
-
-            # Create a copy of the array to draw the background with opacity
-            overlay = m.array.copy()
-
-            # Draw the background rectangle on the overlay
-            cv2.rectangle(overlay,
-                          (text_x, text_y - text_height),
-                          (text_x + text_width, text_y + baseline),
-                          (255, 255, 255),  # Background color (white)
-                          cv2.FILLED)
-
-            alpha = 0.30
-            cv2.addWeighted(overlay, alpha, m.array, 1 - alpha, 0, m.array)
-
-            # Draw text on top of the background
-            cv2.putText(m.array, label_text, (text_x, text_y),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, text_color, 1)
-
-            # Draw detection box
-            cv2.rectangle(m.array, (x, y), (x + w, y + h), box_color, thickness=2)
+        # Red for humans/animals, green for others; red text for all
+        targets = detections.targets.tolist()
+        texts = [f"{labels[category]} ({conf:.2f})"
+                 for category, conf in zip(detections.categories.tolist(), detections.scores.tolist())]
+        box_colors = [(0, 0, 255) if is_target else (0, 255, 0) for is_target in targets]
+        label_renderer.draw_detections(m.array, detections.boxes.tolist(), texts,
+                                       box_colors, [(0, 0, 255)] * len(texts))
 
         if intrinsics.preserve_aspect_ratio:
             b_x, b_y, b_w, b_h = imx500.get_roi_scaled(request)
@@ -386,6 +297,10 @@ def get_args():
                         help="GPIO pin for ultrasonic ECHO (default: 24)")
     parser.add_argument("--distance-threshold", type=float, default=1.0,
                         help="Distance threshold in meters (default: 1.0)")
+    parser.add_argument("--distance-hysteresis", type=float, default=0.2,
+                        help="Extra distance before the camera returns to standby (default: 0.2)")
+    parser.add_argument("--ultrasonic-simulate", type=str, metavar="FILE",
+                        help="Replay recorded echo pulses instead of reading GPIO")
     return parser.parse_args()
 
 
@@ -393,9 +308,6 @@ if __name__ == "__main__":
     args = get_args()
     announcement_cooldown = args.audio_cooldown
 
-    print(f"Audio method: {AUDIO_METHOD}")
-    if AUDIO_METHOD == "espeak":
-        print("Note: Install pyttsx3 or gtts for better audio quality")
     print("\n🎯 Detection Mode: HUMANS AND ANIMALS ONLY")
     print(f"Humans: {', '.join(sorted(HUMANS))}")
     print(f"Animals: {', '.join(sorted(ANIMALS))}")
@@ -407,14 +319,19 @@ if __name__ == "__main__":
         print(f"   ECHO Pin: GPIO {args.echo_pin}")
         print(f"   Distance Threshold: {args.distance_threshold}m")
         
-        if setup_ultrasonic_sensor(args.trig_pin, args.echo_pin):
-            # Start ultrasonic monitoring thread
-            sensor_thread = threading.Thread(
-                target=ultrasonic_monitor, 
-                args=(args.trig_pin, args.echo_pin, args.distance_threshold),
-                daemon=True
+        sensor = setup_ultrasonic_sensor(args.trig_pin, args.echo_pin, args.ultrasonic_simulate)
+        if sensor:
+            # Filtered presence with hysteresis; samples faster as something approaches
+            estimator = PresenceEstimator(
+                sensor,
+                enter_distance=args.distance_threshold,
+                exit_distance=args.distance_threshold + args.distance_hysteresis
             )
-            sensor_thread.start()
+            estimator.subscribe(on_presence)
+            # The gate pauses the capture loop in standby and starts the estimator
+            gate = PresenceGate([UltrasonicTrigger(estimator)], hold_time=0, max_wake_latency=0.2)
+            gate.start()
+            print(f"🔍 Ultrasonic monitoring started (threshold: {args.distance_threshold}m)")
         else:
             print("⚠️  Running without ultrasonic sensor")
             args.ultrasonic_enable = False
@@ -425,10 +342,11 @@ if __name__ == "__main__":
     
     print("\n")
     
-    # Start audio worker thread
+    # Start audio system (its worker blocks on the queue until something is announced)
     if not args.no_audio:
-        audio_thread = threading.Thread(target=audio_worker, daemon=True)
-        audio_thread.start()
+        audio = AudioOutputSystem(rate=150, queue_max_depth=3)
+        if not audio.is_available():
+            print("Note: Install pyttsx3 or espeak for audio announcements")
 
     # This must be called before instantiation of Picamera2
     imx500 = IMX500(args.model)
@@ -467,7 +385,13 @@ if __name__ == "__main__":
     if intrinsics.preserve_aspect_ratio:
         imx500.set_auto_aspect_ratio()
 
-    last_results = None
+    if gate:
+        # Drop the sensor and network frame rate while in standby
+        gate.subscribe(lambda active: picam2.set_controls(
+            {"FrameRate": intrinsics.inference_rate if active else STANDBY_FPS}))
+        if not camera_active:
+            picam2.set_controls({"FrameRate": STANDBY_FPS})
+
     picam2.pre_callback = draw_detections
     
     if args.ultrasonic_enable:
@@ -479,9 +403,16 @@ if __name__ == "__main__":
     
     try:
         while True:
-            last_results = parse_detections(picam2.capture_metadata())
+            # Blocks without capturing while the presence gate is in standby
+            if gate:
+                gate.wait()
+            parse_detections(picam2.capture_metadata())
     except KeyboardInterrupt:
         print("\n\nStopping...")
-        if args.ultrasonic_enable and GPIO_AVAILABLE:
-            GPIO.cleanup()
+        if gate:
+            gate.close()
+        if sensor:
+            sensor.close()
+        if audio:
+            audio.close()
         picam2.stop()
\ No newline at end of file
@@ -6,14 +6,29 @@ Single file, OpenCV only, easy to use
 
 import cv2
 import numpy as np
+import queue
+import shutil
+import subprocess
+import threading
 import time
-import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Configuration - Edit these values as needed
 CONFIDENCE_THRESHOLD = 0.5
+NMS_THRESHOLD = 0.4
 CAMERA_WIDTH = 640
 CAMERA_HEIGHT = 480
 DISPLAY_WINDOW = False  # Set to True if you have a display connected
+PREVIEW_PORT = None  # e.g. 8080 to watch http://localhost:8080/ in a browser
+PREVIEW_FPS = 10  # Most preview frames per second
+DETECT_EVERY_N_FRAMES = 1  # Run the model on every Nth frame (1 = every frame)
+ANNOUNCE_QUEUE_SIZE = 3  # Pending announcements; extra ones are dropped
+
+# OpenCV DNN backend and target
+# Backends: "default", "opencv", "inference_engine", "cuda", "vkcom", "timvx"
+# Targets: "cpu", "opencl", "opencl_fp16", "myriad", "vulkan", "cuda", "cuda_fp16", "npu"
+DNN_BACKEND = "opencv"
+DNN_TARGET = "cpu"
 
 # COCO class names (objects the model can detect)
 CLASSES = [
@@ -35,11 +50,204 @@ ANNOUNCE_CLASSES = ['person', 'dog', 'cat', 'bird', 'horse', 'cow', 'sheep', 'be
 
 def speak(text):
     """Announce text through speaker (optional)"""
-    try:
-        # Try espeak (common on Raspberry Pi)
-        os.system(f'espeak "{text}" 2>/dev/null')
-    except:
+    # Try espeak (common on Raspberry Pi)
+    espeak = shutil.which("espeak")
+    if not espeak:
         print(f"🔊 {text}")
+        return
+    subprocess.run([espeak, text], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class Announcer:
+    """Speaks announcements on a background thread from a bounded queue"""
+    
+    def __init__(self, max_pending=ANNOUNCE_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def say(self, text):
+        """Queue text without waiting; returns False if the queue is full"""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except queue.Full:
+            return False
+    
+    def close(self):
+        """Drop pending announcements and stop after the current utterance"""
+        # Drain first so the stop marker always fits; only the caller adds to the queue
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put(None, timeout=1.0)
+        self.thread.join(timeout=5.0)
+    
+    def _run(self):
+        while True:
+            text = self.queue.get()
+            if text is None:
+                break
+            try:
+                speak(text)
+            except Exception as e:
+                print(f"Audio error: {e}")
+
+
+class FrameGrabber:
+    """Reads the camera on a background thread and keeps only the newest frame"""
+    
+    def __init__(self, cap):
+        self.cap = cap
+        self.frame = None
+        self.frame_id = 0
+        self.failed = False
+        self.running = True
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def read(self, last_id=0, timeout=1.0):
+        """Wait for a frame newer than last_id; returns (frame_id, frame) or (last_id, None)"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.frame_id > last_id or not self.running,
+                                    timeout=timeout)
+            if self.frame_id > last_id:
+                return self.frame_id, self.frame
+            return last_id, None
+    
+    def close(self):
+        self.running = False
+        self.thread.join(timeout=2.0)
+    
+    def _run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self.failed = True
+                time.sleep(0.1)
+                continue
+            with self.condition:
+                self.failed = False
+                self.frame = frame
+                self.frame_id += 1
+                self.condition.notify_all()
+
+
+class MJPEGPreview:
+    """Serves annotated frames as MJPEG on localhost, encoding each frame once for all viewers"""
+    
+    def __init__(self, port, max_fps=PREVIEW_FPS):
+        self.interval = 1.0 / max_fps
+        self.pending = None
+        self.jpeg = None
+        self.seq = 0
+        self.clients = 0
+        self.condition = threading.Condition()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._encode_loop, daemon=True).start()
+    
+    def submit(self, frame, detections):
+        """Offer a frame; copied only while someone is watching, so the caller may draw on it"""
+        if self.clients:
+            with self.condition:
+                self.pending = (frame.copy(), detections)
+                self.condition.notify_all()
+    
+    def close(self):
+        self.server.shutdown()
+    
+    def _encode_loop(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None)
+                frame, detections = self.pending
+                self.pending = None
+            
+            image = draw_detections(frame, detections)
+            ok, encoded = cv2.imencode(".jpg", image)
+            if ok:
+                with self.condition:
+                    self.jpeg = encoded.tobytes()
+                    self.seq += 1
+                    self.condition.notify_all()
+            time.sleep(self.interval)
+    
+    def _handler_class(self):
+        preview = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/":
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.end_headers()
+                
+                with preview.condition:
+                    preview.clients += 1
+                seq = 0
+                try:
+                    while True:
+                        with preview.condition:
+                            preview.condition.wait_for(lambda: preview.seq > seq)
+                            seq, jpeg = preview.seq, preview.jpeg
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n")
+                        time.sleep(preview.interval)  # Slow clients skip frames
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with preview.condition:
+                        preview.clients -= 1
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+
+
+def configure_net(net):
+    """Apply DNN_BACKEND / DNN_TARGET to the network"""
+    backend = getattr(cv2.dnn, f"DNN_BACKEND_{DNN_BACKEND.upper()}", None)
+    target = getattr(cv2.dnn, f"DNN_TARGET_{DNN_TARGET.upper()}", None)
+    
+    if backend is None or target is None:
+        print(f"⚠️  Unknown DNN backend/target {DNN_BACKEND}/{DNN_TARGET} - using defaults")
+        return
+    
+    net.setPreferableBackend(backend)
+    net.setPreferableTarget(target)
+    print(f"✓ DNN backend: {DNN_BACKEND}, target: {DNN_TARGET}")
+
+
+def decode_yolo(outputs, width, height):
+    """
+    Decode YOLO output rows with whole-array operations.
+    
+    Each row is [cx, cy, w, h, objectness, class scores...] in relative units.
+    Returns boxes as (N, 4) int32 [x, y, w, h], confidences and class ids.
+    """
+    rows = np.concatenate([output.reshape(-1, output.shape[-1]) for output in outputs])
+    scores = rows[:, 5:]
+    
+    # Threshold on the best class score before doing any per-box work
+    confidences = scores.max(axis=1)
+    keep = confidences > CONFIDENCE_THRESHOLD
+    rows = rows[keep]
+    confidences = confidences[keep]
+    class_ids = scores[keep].argmax(axis=1)
+    
+    # Centre/size to top-left corner/size in pixels
+    sizes = rows[:, 2:4] * (width, height)
+    corners = rows[:, 0:2] * (width, height) - sizes / 2
+    boxes = np.hstack([corners, sizes]).astype(np.int32)
+    
+    return boxes, confidences, class_ids
 
 
 def detect_objects(frame, net, output_layers):
@@ -52,40 +260,21 @@ def detect_objects(frame, net, output_layers):
     outputs = net.forward(output_layers)
     
     # Process detections
-    boxes = []
-    confidences = []
-    class_ids = []
-    
-    for output in outputs:
-        for detection in output:
-            scores = detection[5:]
-            class_id = np.argmax(scores)
-            confidence = scores[class_id]
-            
-            if confidence > CONFIDENCE_THRESHOLD:
-                # Get box coordinates
-                center_x = int(detection[0] * width)
-                center_y = int(detection[1] * height)
-                w = int(detection[2] * width)
-                h = int(detection[3] * height)
-                x = int(center_x - w/2)
-                y = int(center_y - h/2)
-                
-                boxes.append([x, y, w, h])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
+    boxes, confidences, class_ids = decode_yolo(outputs, width, height)
+    if len(boxes) == 0:
+        return []
     
     # Apply non-max suppression to remove overlapping boxes
-    indices = cv2.dnn.NMSBoxes(boxes, confidences, CONFIDENCE_THRESHOLD, 0.4)
+    indices = cv2.dnn.NMSBoxes(boxes.tolist(), confidences.tolist(),
+                               CONFIDENCE_THRESHOLD, NMS_THRESHOLD)
     
     detected_objects = []
-    if len(indices) > 0:
-        for i in indices.flatten():
-            detected_objects.append({
-                'class': CLASSES[class_ids[i]],
-                'confidence': confidences[i],
-                'box': boxes[i]
-            })
+    for i in np.asarray(indices, dtype=np.int64).flatten():
+        detected_objects.append({
+            'class': CLASSES[class_ids[i]],
+            'confidence': float(confidences[i]),
+            'box': boxes[i].tolist()
+        })
     
     return detected_objects
 
@@ -134,7 +323,8 @@ def main():
         # yolov3-tiny.weights, yolov3-tiny.cfg
         net = cv2.dnn.readNet("yolov3-tiny.weights", "yolov3-tiny.cfg")
         layer_names = net.getLayerNames()
-        output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
+        output_layers = [layer_names[i - 1] for i in np.asarray(net.getUnconnectedOutLayers()).flatten()]
+        configure_net(net)
         use_ai = True
         print("✓ AI model loaded (YOLOv3-tiny)")
     except:
@@ -149,20 +339,30 @@ def main():
     
     last_announcement = {}
     frame_count = 0
+    frame_id = 0
+    detections = []  # Latest results, also drawn on frames between detection runs
+    
+    # Capture and speech run in the background so neither stalls detection
+    grabber = FrameGrabber(cap)
+    announcer = Announcer()
+    preview = None
+    if PREVIEW_PORT:
+        preview = MJPEGPreview(PREVIEW_PORT)
+        print(f"✓ Preview at http://localhost:{PREVIEW_PORT}/")
     
     try:
         while True:
-            ret, frame = cap.read()
+            frame_id, frame = grabber.read(frame_id)
             
-            if not ret:
-                print("⚠️  Failed to read frame")
-                time.sleep(0.1)
+            if frame is None:
+                if grabber.failed:
+                    print("⚠️  Failed to read frame")
                 continue
             
             frame_count += 1
             
-            # Run detection every 30 frames (about 1 second)
-            if use_ai and frame_count % 30 == 0:
+            # Run detection (every frame by default)
+            if use_ai and frame_count % DETECT_EVERY_N_FRAMES == 0:
                 detections = detect_objects(frame, net, output_layers)
                 
                 # Announce interesting detections
@@ -175,15 +375,17 @@ def main():
                            current_time - last_announcement[obj_class] > 5:
                             
                             print(f"✓ Detected: {obj_class} ({det['confidence']:.2%})")
-                            speak(f"Detected {obj_class}")
+                            announcer.say(f"Detected {obj_class}")
                             last_announcement[obj_class] = current_time
-                
-                # Draw detections if display enabled
-                if DISPLAY_WINDOW and detections:
-                    frame = draw_detections(frame, detections)
+            
+            # Preview takes its own copy, only while someone is watching
+            if preview:
+                preview.submit(frame, detections)
             
             # Show frame if display connected
             if DISPLAY_WINDOW:
+                if detections:
+                    frame = draw_detections(frame, detections)
                 cv2.imshow('Object Detection', frame)
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
@@ -192,6 +394,10 @@ def main():
         print("\n\nStopping detection...")
     
     finally:
+        if preview:
+            preview.close()
+        announcer.close()
+        grabber.close()
         cap.release()
         if DISPLAY_WINDOW:
             cv2.destroyAllWindows()
@@ -0,0 +1,148 @@
+"""
+Bounded announcement queue with coalescing, priorities and staleness.
+"""
+
+import itertools
+import threading
+import time
+from typing import Dict, Optional
+
+# Lower values are spoken first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+class AnnouncementQueue:
+    """
+    Queue of pending announcements for the audio worker.
+
+    Identical pending messages are merged, higher priority messages are
+    spoken first, messages older than ``max_age`` are dropped instead of
+    being spoken late, and the depth is capped at ``max_depth``.
+    """
+
+    def __init__(self, max_depth: int = 5, max_age: Optional[float] = 5.0):
+        """
+        Initialize announcement queue.
+
+        Args:
+            max_depth: Maximum number of pending messages
+            max_age: Seconds after which a pending message is dropped (None keeps all)
+        """
+        self.max_depth = max(1, max_depth)
+        self.max_age = max_age
+        self._pending: Dict[str, list] = {}  # text -> [priority, sequence, enqueued_at]
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._counters = {
+            "enqueued": 0,
+            "delivered": 0,
+            "coalesced": 0,
+            "dropped_stale": 0,
+            "dropped_full": 0,
+        }
+
+    def put(self, text: str, priority: int = PRIORITY_NORMAL) -> bool:
+        """
+        Queue a message without blocking.
+
+        Args:
+            text: Message text
+            priority: PRIORITY_HIGH or PRIORITY_NORMAL
+
+        Returns:
+            True if the message is pending, False if it was dropped
+        """
+        now = time.monotonic()
+
+        with self._condition:
+            if self._closed:
+                return False
+
+            entry = self._pending.get(text)
+            if entry is not None:
+                # Merge with the pending copy and refresh its age
+                entry[0] = min(entry[0], priority)
+                entry[2] = now
+                self._counters["coalesced"] += 1
+                return True
+
+            if len(self._pending) >= self.max_depth:
+                self._drop_stale(now)
+
+            if len(self._pending) >= self.max_depth:
+                # Evict the least important, newest message if the new one outranks it
+                victim = max(self._pending, key=lambda t: self._pending[t][:2])
+                if self._pending[victim][0] <= priority:
+                    self._counters["dropped_full"] += 1
+                    return False
+                del self._pending[victim]
+                self._counters["dropped_full"] += 1
+
+            self._pending[text] = [priority, next(self._sequence), now]
+            self._counters["enqueued"] += 1
+            self._condition.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Wait for the next message to speak.
+
+        Args:
+            timeout: Seconds to wait (forever if None)
+
+        Returns:
+            Message text, or None on timeout or after close()
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                self._drop_stale(time.monotonic())
+
+                if self._pending:
+                    text = min(self._pending, key=lambda t: self._pending[t][:2])
+                    del self._pending[text]
+                    self._counters["delivered"] += 1
+                    return text
+
+                if self._closed:
+                    return None
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def close(self):
+        """Discard pending messages and wake any waiting consumer."""
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get queue depth and counters for monitoring.
+
+        Returns:
+            Dictionary with depth, enqueued, delivered, coalesced,
+            dropped_stale and dropped_full
+        """
+        with self._condition:
+            return dict(self._counters, depth=len(self._pending))
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _drop_stale(self, now: float):
+        """Remove messages older than max_age. Caller holds the lock."""
+        if self.max_age is None:
+            return
+
+        stale = [t for t, entry in self._pending.items() if now - entry[2] > self.max_age]
+        for text in stale:
+            del self._pending[text]
+        self._counters["dropped_stale"] += len(stale)
@@ -3,16 +3,19 @@ Audio output system for announcing detections.
 """
 
 import logging
-from typing import Optional
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
 import threading
-import queue
 
 try:
     import pyttsx3
     PYTTSX3_AVAILABLE = True
 except ImportError:
     PYTTSX3_AVAILABLE = False
-    logging.warning("pyttsx3 not available. Audio output disabled.")
+    logging.warning("pyttsx3 not available. Falling back to espeak if installed.")
 
 try:
     import pygame
@@ -21,32 +24,94 @@ except ImportError:
     PYGAME_AVAILABLE = False
     logging.warning("pygame not available.")
 
+from .announcements import PRIORITY_NORMAL, AnnouncementQueue
+from .audio_server import AudioServerProcess
+from .phrase_cache import PhraseCache
+from .sound_bank import SoundBank
+
 logger = logging.getLogger(__name__)
 
 
 class AudioOutputSystem:
     """Handles audio output for detection announcements."""
     
-    def __init__(self, volume: int = 80):
+    def __init__(self, volume: int = 80, rate: int = 150,
+                 phrase_cache_dir: Optional[str] = None,
+                 phrase_cache_entries: int = 32,
+                 phrase_cache_disk_entries: int = 256,
+                 queue_max_depth: int = 5,
+                 max_message_age: Optional[float] = 5.0,
+                 out_of_process: bool = False,
+                 health_interval: float = 5.0,
+                 sounds: Optional[Dict[str, str]] = None,
+                 sound_channels: int = 8):
         """
         Initialize audio output system.
         
         Args:
             volume: Volume level (0-100)
+            rate: Speech rate in words per minute
+            phrase_cache_dir: Directory for pre-rendered phrases (cache disabled if None)
+            phrase_cache_entries: Phrases kept in memory
+            phrase_cache_disk_entries: Phrases kept on disk
+            queue_max_depth: Maximum number of pending announcements
+            max_message_age: Seconds after which an unspoken announcement is dropped
+            out_of_process: Run synthesis and playback in a separate audio
+                server process instead of a thread of this process
+            health_interval: Seconds between health checks of the audio server
+            sounds: Alert sound files keyed by class name, preloaded at startup
+            sound_channels: Mixer channels for overlapping sounds
         """
         self.volume = min(100, max(0, volume))
+        self.rate = rate
+        self.voice_id = ""
         self.engine = None
-        self.speech_queue = queue.Queue()
+        self.espeak = None
+        self.engine_lock = threading.Lock()
+        self.phrase_cache = None
+        self.sound_bank = SoundBank(sounds, channels=sound_channels, volume=self.volume)
+        self.speech_queue = AnnouncementQueue(max_depth=queue_max_depth, max_age=max_message_age)
+        self.server = None
+        self.health_interval = health_interval
         self.worker_thread = None
         self.running = False
         
+        # Alert sounds play from this process even when speech runs out of process
+        if sounds:
+            self.sound_bank.init()
+        
+        if out_of_process:
+            # The server process owns the engine; this process only queues and sends
+            self.server = AudioServerProcess({
+                "volume": self.volume,
+                "rate": self.rate,
+                "phrase_cache_dir": phrase_cache_dir,
+                "phrase_cache_entries": phrase_cache_entries,
+                "phrase_cache_disk_entries": phrase_cache_disk_entries,
+            })
+            self.server.start()
+            self._start_worker()
+            return
+        
         self._initialize_engine()
+        
+        if self.engine and phrase_cache_dir:
+            self.phrase_cache = PhraseCache(
+                self._synthesize_to_file,
+                cache_dir=phrase_cache_dir,
+                voice=self.voice_id,
+                rate=self.rate,
+                volume=self.volume,
+                max_memory_entries=phrase_cache_entries,
+                max_disk_entries=phrase_cache_disk_entries
+            )
+        
         self._start_worker()
     
     def _initialize_engine(self):
         """Initialize text-to-speech engine."""
         if not PYTTSX3_AVAILABLE:
-            logger.warning("Audio output not available (pyttsx3 missing)")
+            self._use_espeak("pyttsx3 missing")
             return
         
         try:
@@ -54,7 +119,7 @@ class AudioOutputSystem:
             self.engine = pyttsx3.init()
             
             # Configure engine
-            self.engine.setProperty('rate', 150)  # Speed of speech
+            self.engine.setProperty('rate', self.rate)  # Speed of speech
             self.engine.setProperty('volume', self.volume / 100.0)
             
             # Try to set a clear voice
@@ -64,6 +129,7 @@ class AudioOutputSystem:
                 for voice in voices:
                     if 'english' in voice.name.lower():
                         self.engine.setProperty('voice', voice.id)
+                        self.voice_id = voice.id
                         break
             
             logger.info("TTS engine initialized successfully")
@@ -71,10 +137,33 @@ class AudioOutputSystem:
         except Exception as e:
             logger.error(f"Failed to initialize TTS engine: {e}")
             self.engine = None
+            self._use_espeak("TTS engine failed")
+    
+    def _use_espeak(self, reason: str):
+        """
+        Fall back to the espeak command line synthesizer.
+        
+        Args:
+            reason: Why the pyttsx3 engine is not used
+        """
+        self.espeak = shutil.which("espeak") or shutil.which("espeak-ng")
+        if self.espeak:
+            logger.info(f"Using {self.espeak} for speech ({reason})")
+        else:
+            logger.warning(f"Audio output not available ({reason}, espeak not found)")
+    
+    def is_available(self) -> bool:
+        """
+        Check whether announcements can be spoken.
+        
+        Returns:
+            True if a speech engine, espeak or the audio server is available
+        """
+        return bool(self.engine or self.espeak or self.server)
     
     def _start_worker(self):
         """Start background worker thread for audio playback."""
-        if not self.engine:
+        if not self.is_available():
             return
         
         self.running = True
@@ -86,20 +175,18 @@ class AudioOutputSystem:
         """Background worker for processing audio queue."""
         while self.running:
             try:
-                # Get message from queue with timeout
-                message = self.speech_queue.get(timeout=1.0)
+                # Get message from queue with timeout (None after close())
+                timeout = self.health_interval if self.server else 1.0
+                message = self.speech_queue.get(timeout=timeout)
                 
                 if message is None:
-                    # Poison pill to stop worker
-                    break
+                    if self.server and self.running:
+                        self.server.check_health()
+                    continue
                 
                 # Speak the message
                 self._speak_sync(message)
                 
-                self.speech_queue.task_done()
-                
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.error(f"Error in audio worker: {e}")
     
@@ -110,39 +197,141 @@ class AudioOutputSystem:
         Args:
             text: Text to speak
         """
+        if self.server:
+            self.server.speak_sync(text)
+            return
+        
+        if self.espeak and not self.engine:
+            self._speak_espeak(text)
+            return
+        
         if not self.engine:
             logger.debug(f"Would speak: {text}")
             return
         
         try:
             logger.debug(f"Speaking: {text}")
-            self.engine.say(text)
-            self.engine.runAndWait()
+            
+            # Play pre-rendered audio when available
+            if self.phrase_cache:
+                data = self.phrase_cache.get_or_render(text)
+                if data and self._play_wav(data):
+                    return
+            
+            with self.engine_lock:
+                self.engine.say(text)
+                self.engine.runAndWait()
+        except Exception as e:
+            logger.error(f"Error speaking text: {e}")
+    
+    def _speak_espeak(self, text: str):
+        """
+        Speak text with the espeak command.
+        
+        Args:
+            text: Text to speak
+        """
+        try:
+            logger.debug(f"Speaking (espeak): {text}")
+            # espeak amplitude runs 0-200 with 100 as its default
+            subprocess.run([self.espeak, "-s", str(self.rate), "-a", str(self.volume * 2), text],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         except Exception as e:
             logger.error(f"Error speaking text: {e}")
     
-    def speak(self, text: str):
+    def _synthesize_to_file(self, text: str, path: Path):
+        """
+        Render text to a WAV file with the TTS engine.
+        
+        Args:
+            text: Text to render
+            path: Output file path
+        """
+        with self.engine_lock:
+            self.engine.save_to_file(text, str(path))
+            self.engine.runAndWait()
+    
+    def _play_wav(self, data: bytes) -> bool:
+        """
+        Play WAV audio and wait until it finishes.
+        
+        Args:
+            data: WAV file contents
+            
+        Returns:
+            True if the audio was played
+        """
+        try:
+            length = self.sound_bank.play_buffer(data)
+            if length is not None:
+                time.sleep(length)
+                return True
+            
+            if shutil.which("aplay"):
+                subprocess.run(["aplay", "-q", "-"], input=data, check=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                return True
+        except Exception as e:
+            logger.error(f"Error playing cached phrase: {e}")
+        
+        return False
+    
+    def preload_phrases(self, texts: Iterable[str]):
+        """
+        Render phrases into the cache in the background.
+        
+        Args:
+            texts: Phrases to prepare
+        """
+        if self.server:
+            self.server.preload(texts)
+            return
+        
+        if not self.phrase_cache:
+            return
+        
+        threading.Thread(
+            target=self.phrase_cache.warm, args=(list(texts),), daemon=True
+        ).start()
+    
+    def speak(self, text: str, priority: int = PRIORITY_NORMAL):
         """
         Asynchronously speak text.
         
         Args:
             text: Text to speak
+            priority: PRIORITY_HIGH messages are spoken before PRIORITY_NORMAL ones
         """
-        if not self.engine:
+        if not self.is_available():
             logger.info(f"Audio: {text}")
             return
         
         try:
             # Add to queue
-            self.speech_queue.put(text)
-            logger.debug(f"Queued for speech: {text}")
+            if self.speech_queue.put(text, priority):
+                logger.debug(f"Queued for speech: {text}")
+            else:
+                logger.debug(f"Speech queue full, dropped: {text}")
         except Exception as e:
             logger.error(f"Error queueing speech: {e}")
     
+    def queue_stats(self) -> Dict[str, int]:
+        """
+        Get announcement queue depth and drop counters.
+        
+        Returns:
+            Dictionary with depth, enqueued, delivered, coalesced,
+            dropped_stale and dropped_full
+        """
+        return self.speech_queue.stats()
+    
     def play_sound(self, sound_file: str):
         """
         Play a sound file.
         
+        The file is decoded on first use and kept in the sound bank, so
+        repeated plays start immediately and may overlap.
+        
         Args:
             sound_file: Path to sound file
         """
@@ -150,13 +339,35 @@ class AudioOutputSystem:
             logger.warning("Cannot play sound file (pygame not available)")
             return
         
-        try:
-            pygame.mixer.init()
-            pygame.mixer.music.load(sound_file)
-            pygame.mixer.music.play()
-            logger.info(f"Playing sound: {sound_file}")
-        except Exception as e:
-            logger.error(f"Error playing sound: {e}")
+        if self.sound_bank.play_file(sound_file):
+            logger.debug(f"Playing sound: {sound_file}")
+    
+    def has_alert_sound(self, class_name: str) -> bool:
+        """
+        Check whether an alert sound is configured for a class.
+        
+        Args:
+            class_name: Detected object class
+            
+        Returns:
+            True if a sound is configured
+        """
+        return self.sound_bank.has(class_name)
+    
+    def play_alert(self, class_name: str) -> bool:
+        """
+        Play the preloaded alert sound for a class.
+        
+        Args:
+            class_name: Detected object class
+            
+        Returns:
+            True if playback started
+        """
+        if self.sound_bank.play(class_name):
+            logger.debug(f"Playing alert sound for {class_name}")
+            return True
+        return False
     
     def set_volume(self, volume: int):
         """
@@ -167,9 +378,17 @@ class AudioOutputSystem:
         """
         self.volume = min(100, max(0, volume))
         
+        self.sound_bank.set_volume(self.volume)
+        
+        if self.server:
+            self.server.set_volume(self.volume)
+        
         if self.engine:
             try:
-                self.engine.setProperty('volume', self.volume / 100.0)
+                with self.engine_lock:
+                    self.engine.setProperty('volume', self.volume / 100.0)
+                if self.phrase_cache:
+                    self.phrase_cache.volume = self.volume
                 logger.info(f"Volume set to {self.volume}%")
             except Exception as e:
                 logger.error(f"Error setting volume: {e}")
@@ -180,10 +399,15 @@ class AudioOutputSystem:
         
         # Stop worker thread
         self.running = False
+        self.speech_queue.close()
         if self.worker_thread:
-            self.speech_queue.put(None)  # Poison pill
             self.worker_thread.join(timeout=2.0)
         
+        if self.server:
+            self.server.close()
+        
+        self.sound_bank.close()
+        
         # Clean up engine
         if self.engine:
             try:
@@ -0,0 +1,241 @@
+"""
+Out-of-process audio server.
+
+Runs text-to-speech in a separate long-lived process so synthesis and
+playback never compete with inference for the detector's GIL and CPU.
+"""
+
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def audio_server_main(conn, options: Dict):
+    """
+    Entry point of the audio worker process.
+
+    Handles ("speak", text), ("ping", token), ("preload", texts),
+    ("volume", level) and ("stop",) messages until stopped or the parent
+    closes its end of the pipe.
+
+    Args:
+        conn: Pipe connection to the parent process
+        options: AudioOutputSystem constructor arguments
+    """
+    # Ctrl+C reaches the whole process group; the parent decides when we stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from .audio import AudioOutputSystem
+    audio = AudioOutputSystem(**options)
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+
+            command = message[0]
+            if command == "speak":
+                audio._speak_sync(message[1])
+                conn.send(("done",))
+            elif command == "ping":
+                conn.send(("pong", message[1]))
+            elif command == "preload":
+                audio.preload_phrases(message[1])
+            elif command == "volume":
+                audio.set_volume(message[1])
+            elif command == "stop":
+                break
+    finally:
+        audio.close()
+        conn.close()
+
+
+class AudioServerProcess:
+    """Parent-side handle of the audio worker process."""
+
+    def __init__(self, options: Optional[Dict] = None,
+                 health_timeout: float = 2.0,
+                 speak_timeout: float = 30.0,
+                 respawn_delay: float = 1.0):
+        """
+        Initialize audio server handle.
+
+        Args:
+            options: AudioOutputSystem arguments for the worker process
+            health_timeout: Seconds to wait for a ping reply
+            speak_timeout: Seconds to wait for an utterance to finish
+            respawn_delay: Minimum seconds between respawns
+        """
+        self.options = options or {}
+        self.health_timeout = health_timeout
+        self.speak_timeout = speak_timeout
+        self.respawn_delay = respawn_delay
+        self.process = None
+        self.conn = None
+        self.respawns = 0
+        self._last_start = 0.0
+        self._ping_token = 0
+        self._preload = []
+        self._send_lock = threading.Lock()
+        # Spawn rather than fork so the worker does not inherit camera and model state
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self):
+        """Start the worker process."""
+        parent_conn, child_conn = self._context.Pipe()
+        self.process = self._context.Process(
+            target=audio_server_main,
+            args=(child_conn, self.options),
+            name="pi-detector-audio",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self._last_start = time.monotonic()
+        logger.info(f"Audio server started (pid {self.process.pid})")
+
+        if self._preload:
+            self._send(("preload", self._preload))
+
+    def is_alive(self) -> bool:
+        """Check whether the worker process is running."""
+        return self.process is not None and self.process.is_alive()
+
+    def speak_sync(self, text: str) -> bool:
+        """
+        Send a message and wait until the worker has spoken it.
+
+        Args:
+            text: Text to speak
+
+        Returns:
+            True if the worker confirmed the utterance
+        """
+        if not self.ensure_running() or not self._send(("speak", text)):
+            return False
+
+        if self._wait_for("done", self.speak_timeout):
+            return True
+
+        logger.warning("Audio server did not finish speaking in time. Restarting...")
+        self.restart()
+        return False
+
+    def check_health(self) -> bool:
+        """
+        Ping the worker and restart it if it is dead or unresponsive.
+
+        Returns:
+            True if the worker answered
+        """
+        if not self.ensure_running():
+            return False
+
+        self._ping_token += 1
+        if self._send(("ping", self._ping_token)) and \
+                self._wait_for("pong", self.health_timeout, self._ping_token):
+            return True
+
+        logger.warning("Audio server failed health check. Restarting...")
+        self.restart()
+        return False
+
+    def ensure_running(self) -> bool:
+        """
+        Respawn the worker if it has exited.
+
+        Returns:
+            True if the worker is running
+        """
+        if self.is_alive():
+            return True
+
+        if self.process is not None:
+            if time.monotonic() - self._last_start < self.respawn_delay:
+                return False
+            logger.warning(f"Audio server exited (code {self.process.exitcode}). Respawning...")
+            self.respawns += 1
+
+        self._stop_process()
+        self.start()
+        return self.is_alive()
+
+    def restart(self):
+        """Kill and respawn the worker."""
+        self._stop_process()
+        self.respawns += 1
+        self.start()
+
+    def preload(self, texts: Iterable[str]):
+        """
+        Ask the worker to render phrases into its cache.
+
+        Remembered so a respawned worker preloads them again.
+
+        Args:
+            texts: Phrases to prepare
+        """
+        self._preload = list(texts)
+        if self.is_alive():
+            self._send(("preload", self._preload))
+
+    def set_volume(self, volume: int):
+        """
+        Change the worker's volume.
+
+        Args:
+            volume: Volume level (0-100)
+        """
+        self.options["volume"] = volume
+        if self.is_alive():
+            self._send(("volume", volume))
+
+    def close(self):
+        """Stop the worker process."""
+        if self.is_alive():
+            self._send(("stop",))
+            self.process.join(timeout=2.0)
+        self._stop_process()
+        logger.info("Audio server stopped")
+
+    def _send(self, message) -> bool:
+        """Send a message to the worker."""
+        try:
+            with self._send_lock:
+                self.conn.send(message)
+            return True
+        except (OSError, EOFError, AttributeError) as e:
+            logger.error(f"Failed to send to audio server: {e}")
+            return False
+
+    def _wait_for(self, reply: str, timeout: float, token=None) -> bool:
+        """Read replies until the expected one arrives or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.conn.poll(remaining):
+                    return False
+                message = self.conn.recv()
+                if message[0] == reply and (token is None or message[1] == token):
+                    return True
+        except (OSError, EOFError):
+            return False
+
+    def _stop_process(self):
+        """Terminate the worker process and close the pipe."""
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2.0)
+        if self.conn is not None:
+            self.conn.close()
+        self.process = None
+        self.conn = None
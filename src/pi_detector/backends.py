@@ -0,0 +1,686 @@
+"""
+Inference backends for the object detector.
+
+Every backend takes a preprocessed NHWC input batch and returns the raw
+model outputs as a list of arrays, so ``ObjectDetector`` can share one
+preprocess/postprocess path regardless of the runtime underneath.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+try:
+    import tflite_runtime.interpreter as tflite
+    TFLITE_AVAILABLE = True
+except ImportError:
+    TFLITE_AVAILABLE = False
+    logging.warning("tflite_runtime not available. TFLite backend disabled.")
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+import cv2
+
+from .benchmark import ResultCache, cpu_model, file_hash, time_invocations
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBackend:
+    """Base class for inference backends."""
+
+    name = "base"
+    suffixes: Tuple[str, ...] = ()
+
+    def __init__(self, model_path: str):
+        """
+        Initialize backend.
+
+        Args:
+            model_path: Path to model file
+        """
+        self.model_path = Path(model_path)
+        self.input_size: Tuple[int, int] = (300, 300)  # (height, width)
+        self.input_dtype = np.uint8
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Check whether the runtime for this backend is installed."""
+        return True
+
+    @classmethod
+    def supports(cls, model_path: str) -> bool:
+        """
+        Check whether this backend can load the given model file.
+
+        Args:
+            model_path: Path to model file
+
+        Returns:
+            True if the file type is supported
+        """
+        return Path(model_path).suffix.lower() in cls.suffixes
+
+    def invoke(self, input_data: np.ndarray) -> List[np.ndarray]:
+        """
+        Run inference.
+
+        Args:
+            input_data: Preprocessed input batch (NHWC)
+
+        Returns:
+            Model outputs, each with a leading batch dimension
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release backend resources."""
+
+
+class TFLiteBackend(InferenceBackend):
+    """Backend using the TensorFlow Lite interpreter."""
+
+    name = "tflite"
+    suffixes = (".tflite",)
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None,
+                 delegates: Optional[Sequence] = None, xnnpack: Optional[bool] = None,
+                 auto_tune: bool = False, cache_dir: Optional[str] = None,
+                 input_size: Optional[Sequence[int]] = None):
+        """
+        Initialize TFLite backend.
+
+        Args:
+            model_path: Path to model file
+            num_threads: Interpreter thread count (runtime default if None)
+            delegates: External delegates, each a library path or a
+                {"library": ..., "options": {...}} dict
+            xnnpack: Whether to keep the default XNNPACK delegate enabled
+                (enabled if None)
+            auto_tune: Time candidate settings for whichever of num_threads
+                and xnnpack are unset, and use the fastest one
+            cache_dir: Directory for cached tuning results
+            input_size: Resize the input tensor to (height, width); only
+                works for models exported with a dynamic input shape
+        """
+        super().__init__(model_path)
+        self.requested_input_size = tuple(input_size) if input_size else None
+        self.delegates = list(delegates or [])
+        self.num_threads = num_threads
+        self.xnnpack = xnnpack
+
+        if auto_tune:
+            self.num_threads, self.xnnpack = self._auto_tune(cache_dir)
+
+        self._build_interpreter()
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return TFLITE_AVAILABLE
+
+    def _build_interpreter(self):
+        """Create the interpreter with the current thread and delegate settings."""
+        kwargs = {"model_path": str(self.model_path)}
+
+        if self.num_threads:
+            kwargs["num_threads"] = int(self.num_threads)
+
+        if self.delegates:
+            kwargs["experimental_delegates"] = [self._load_delegate(d) for d in self.delegates]
+
+        if self.xnnpack is False:
+            resolver = getattr(getattr(tflite, "experimental", None), "OpResolverType", None)
+            if resolver is not None:
+                kwargs["experimental_op_resolver_type"] = resolver.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+            else:
+                logger.warning("This tflite_runtime cannot disable XNNPACK; ignoring xnnpack=False")
+
+        self.interpreter = tflite.Interpreter(**kwargs)
+        if self.requested_input_size:
+            height, width = self.requested_input_size
+            index = self.interpreter.get_input_details()[0]['index']
+            self.interpreter.resize_tensor_input(index, [1, int(height), int(width), 3])
+        self.interpreter.allocate_tensors()
+
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+
+        input_shape = self.input_details[0]['shape']
+        self.input_size = (int(input_shape[1]), int(input_shape[2]))
+        self.input_dtype = self.input_details[0]['dtype']
+
+    @staticmethod
+    def _load_delegate(delegate):
+        """Load an external delegate from a library path or option dict."""
+        if isinstance(delegate, dict):
+            return tflite.load_delegate(delegate["library"], delegate.get("options", {}))
+        return tflite.load_delegate(delegate)
+
+    def _auto_tune(self, cache_dir: Optional[str]) -> Tuple[Optional[int], bool]:
+        """
+        Pick the fastest thread count and XNNPACK setting for this model.
+
+        Only settings left unset are tuned; explicit ones are kept. Results
+        are cached per model hash, CPU model, delegates, input size and
+        explicit settings, so only the first start on a device pays for the
+        timing runs.
+
+        Returns:
+            (num_threads, xnnpack) of the fastest candidate
+        """
+        if self.num_threads is not None and self.xnnpack is not None:
+            return self.num_threads, self.xnnpack
+
+        cache = ResultCache("tflite_tuning", cache_dir)
+        settings = json.dumps({
+            "delegates": self.delegates,
+            "input_size": self.requested_input_size,
+            "num_threads": self.num_threads,
+            "xnnpack": self.xnnpack
+        }, sort_keys=True, default=str)
+        key = f"{file_hash(str(self.model_path))}:{cpu_model()}:{settings}"
+
+        cached = cache.get(key)
+        if cached:
+            logger.info(f"Using cached TFLite settings: {cached['num_threads']} threads, "
+                        f"xnnpack={cached['xnnpack']}")
+            return cached["num_threads"], cached["xnnpack"]
+
+        cores = os.cpu_count() or 1
+        thread_options = sorted({n for n in (1, 2, 4, cores) if n <= cores})
+        if self.num_threads is not None:
+            thread_options = [self.num_threads]
+        xnnpack_options = [True]
+        if getattr(getattr(tflite, "experimental", None), "OpResolverType", None) is not None:
+            xnnpack_options.append(False)
+        if self.xnnpack is not None:
+            xnnpack_options = [self.xnnpack]
+
+        best = (self.num_threads, self.xnnpack)
+        best_time = None
+        timings = {}
+
+        for num_threads in thread_options:
+            for xnnpack in xnnpack_options:
+                self.num_threads, self.xnnpack = num_threads, xnnpack
+                try:
+                    self._build_interpreter()
+                    height, width = self.input_size
+                    blank = np.zeros((1, height, width, 3), dtype=self.input_dtype)
+                    elapsed = time_invocations(lambda: self.invoke(blank), warmup=2, runs=5)
+                except Exception as e:
+                    logger.warning(f"TFLite candidate threads={num_threads} xnnpack={xnnpack} failed: {e}")
+                    continue
+
+                timings[f"{num_threads}:{xnnpack}"] = elapsed
+                logger.info(f"TFLite threads={num_threads} xnnpack={xnnpack}: "
+                            f"{elapsed * 1000:.1f} ms per inference")
+                if best_time is None or elapsed < best_time:
+                    best, best_time = (num_threads, xnnpack), elapsed
+
+        if best_time is not None:
+            cache.set(key, {"num_threads": best[0], "xnnpack": best[1], "timings": timings})
+            logger.info(f"Selected TFLite settings: {best[0]} threads, xnnpack={best[1]}")
+
+        return best
+
+    def invoke(self, input_data: np.ndarray) -> List[np.ndarray]:
+        self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
+        self.interpreter.invoke()
+        return [self._dequantize(detail) for detail in self.output_details]
+
+    def _dequantize(self, detail: Dict) -> np.ndarray:
+        """Read an output tensor, converting quantized values to float."""
+        tensor = self.interpreter.get_tensor(detail['index'])
+        scale, zero_point = detail.get('quantization', (0.0, 0))
+        if scale and np.issubdtype(tensor.dtype, np.integer):
+            return (tensor.astype(np.float32) - zero_point) * scale
+        return tensor
+
+    def close(self):
+        self.interpreter = None
+
+
+class OpenCVBackend(InferenceBackend):
+    """Backend using the OpenCV DNN module."""
+
+    name = "opencv"
+    suffixes = (".tflite", ".onnx", ".pb", ".weights")
+
+    def __init__(self, model_path: str, input_size: Sequence[int] = (300, 300),
+                 config_path: Optional[str] = None):
+        """
+        Initialize OpenCV DNN backend.
+
+        Args:
+            model_path: Path to model file
+            input_size: Network input size as (height, width)
+            config_path: Optional network config file (e.g. Darknet .cfg)
+        """
+        super().__init__(model_path)
+
+        if self.model_path.suffix.lower() == ".tflite":
+            self.net = cv2.dnn.readNetFromTFLite(str(self.model_path))
+        else:
+            self.net = cv2.dnn.readNet(str(self.model_path), config_path or "")
+
+        self.output_names = self.net.getUnconnectedOutLayersNames()
+        self.input_size = (int(input_size[0]), int(input_size[1]))
+        self.input_dtype = np.float32
+
+    @classmethod
+    def supports(cls, model_path: str) -> bool:
+        suffix = Path(model_path).suffix.lower()
+        if suffix == ".tflite":
+            return hasattr(cv2.dnn, "readNetFromTFLite")
+        return suffix in cls.suffixes
+
+    def invoke(self, input_data: np.ndarray) -> List[np.ndarray]:
+        # OpenCV DNN expects NCHW blobs
+        blob = np.ascontiguousarray(input_data.transpose(0, 3, 1, 2), dtype=np.float32)
+        self.net.setInput(blob)
+        return list(self.net.forward(self.output_names))
+
+    def close(self):
+        self.net = None
+
+
+class ONNXBackend(InferenceBackend):
+    """Backend using ONNX Runtime."""
+
+    name = "onnx"
+    suffixes = (".onnx",)
+
+    _DTYPES = {
+        "tensor(uint8)": np.uint8,
+        "tensor(int8)": np.int8,
+        "tensor(float)": np.float32,
+        "tensor(float16)": np.float16,
+    }
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None):
+        """
+        Initialize ONNX Runtime backend.
+
+        Args:
+            model_path: Path to model file
+            num_threads: Intra-op thread count (runtime default if None)
+        """
+        super().__init__(model_path)
+
+        session_options = ort.SessionOptions()
+        if num_threads:
+            session_options.intra_op_num_threads = int(num_threads)
+
+        self.session = ort.InferenceSession(
+            str(self.model_path), sess_options=session_options,
+            providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Accept both NCHW and NHWC exports
+        shape = model_input.shape
+        self.channels_first = shape[1] == 3
+        height, width = (shape[2], shape[3]) if self.channels_first else (shape[1], shape[2])
+        if isinstance(height, int) and isinstance(width, int):
+            self.input_size = (height, width)
+        self.input_dtype = self._DTYPES.get(model_input.type, np.float32)
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return ONNXRUNTIME_AVAILABLE
+
+    def invoke(self, input_data: np.ndarray) -> List[np.ndarray]:
+        if self.channels_first:
+            input_data = np.ascontiguousarray(input_data.transpose(0, 3, 1, 2))
+        return self.session.run(None, {self.input_name: input_data})
+
+    def close(self):
+        self.session = None
+
+
+class StubBackend(InferenceBackend):
+    """Backend that returns empty SSD-style outputs without a model."""
+
+    name = "stub"
+
+    def __init__(self, model_path: str = "", max_detections: int = 10):
+        super().__init__(model_path)
+        self.max_detections = max_detections
+
+    @classmethod
+    def supports(cls, model_path: str) -> bool:
+        return True
+
+    def invoke(self, input_data: np.ndarray) -> List[np.ndarray]:
+        n = self.max_detections
+        return [
+            np.zeros((1, n, 4), dtype=np.float32),
+            np.zeros((1, n), dtype=np.float32),
+            np.zeros((1, n), dtype=np.float32),
+            np.zeros((1,), dtype=np.float32),
+        ]
+
+
+class LatencyModel:
+    """Seeded latency distribution that mimics a real inference call."""
+
+    DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, distribution: str = "fixed", mean_ms: float = 0.0,
+                 std_ms: float = 0.0, min_ms: float = 0.0,
+                 max_ms: Optional[float] = None,
+                 rng: Optional[np.random.Generator] = None):
+        """
+        Initialize latency model.
+
+        Args:
+            distribution: One of fixed, uniform, normal, lognormal
+            mean_ms: Mean latency in milliseconds
+            std_ms: Standard deviation in milliseconds (half-width for uniform)
+            min_ms: Lower clamp in milliseconds
+            max_ms: Upper clamp in milliseconds (unbounded if None)
+            rng: Random generator to draw from
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{distribution}'. "
+                             f"Choose from: {', '.join(self.DISTRIBUTIONS)}")
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.std_ms = std_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.rng = rng or np.random.default_rng()
+
+    def sample(self) -> float:
+        """
+        Draw one latency.
+
+        Returns:
+            Latency in seconds
+        """
+        if self.distribution == "fixed" or self.std_ms <= 0:
+            value = self.mean_ms
+        elif self.distribution == "uniform":
+            value = self.rng.uniform(self.mean_ms - self.std_ms, self.mean_ms + self.std_ms)
+        elif self.distribution == "normal":
+            value = self.rng.normal(self.mean_ms, self.std_ms)
+        else:
+            # Parameterize so the lognormal has the requested mean and deviation
+            variance = np.log1p((self.std_ms / max(self.mean_ms, 1e-6)) ** 2)
+            mu = np.log(max(self.mean_ms, 1e-6)) - variance / 2
+            value = self.rng.lognormal(mu, np.sqrt(variance))
+
+        value = max(self.min_ms, value)
+        if self.max_ms is not None:
+            value = min(self.max_ms, value)
+        return value / 1000.0
+
+
+class SyntheticBackend(StubBackend):
+    """
+    Seeded backend that emits scripted or randomized detection streams.
+
+    Outputs use the same SSD layout as a real post-processed model, so the
+    whole pipeline downstream of inference can be load tested without a
+    model file.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, model_path: str = "", seed: Optional[int] = 0,
+                 script: Union[str, List, None] = None, loop: bool = True,
+                 classes: Optional[Dict] = None, max_objects: int = 3,
+                 spawn_rate: float = 0.05, despawn_rate: float = 0.05,
+                 speed: float = 0.01, box_size: Sequence[float] = (0.1, 0.4),
+                 score_range: Sequence[float] = (0.5, 0.95),
+                 latency: Optional[Dict] = None, max_detections: int = 10):
+        """
+        Initialize synthetic backend.
+
+        Args:
+            model_path: Ignored (kept for the common backend signature)
+            seed: Random seed; the same seed replays the same stream
+            script: Scripted frames, or a path to a JSON file holding them.
+                Each frame is a list of {"class_id", "score", "bbox"} dicts.
+            loop: Restart the script when it runs out (otherwise emit nothing)
+            classes: Class id -> relative weight for randomized objects
+            max_objects: Maximum simultaneous randomized objects
+            spawn_rate: Per-frame probability that a new object appears
+            despawn_rate: Per-frame probability that each object leaves
+            speed: Maximum per-frame box movement (normalized units)
+            box_size: (min, max) box side length (normalized units)
+            score_range: (min, max) detection score
+            latency: LatencyModel arguments, e.g. {"distribution": "normal",
+                "mean_ms": 60, "std_ms": 8}
+            max_detections: Number of output slots per frame
+        """
+        super().__init__(model_path, max_detections=max_detections)
+        self.rng = np.random.default_rng(seed)
+        self.latency = LatencyModel(rng=self.rng, **(latency or {}))
+
+        if isinstance(script, str):
+            with open(script, 'r') as f:
+                script = json.load(f)
+        self.script = script
+        self.loop = loop
+        self.frame_index = 0
+
+        classes = classes or {0: 0.6, 15: 0.2, 16: 0.2}
+        self.class_ids = np.array([int(k) for k in classes], dtype=np.int64)
+        weights = np.array(list(classes.values()), dtype=np.float64)
+        self.class_weights = weights / weights.sum()
+
+        self.max_objects = max_objects
+        self.spawn_rate = spawn_rate
+        self.despawn_rate = despawn_rate
+        self.speed = speed
+        self.box_size = box_size
+        self.score_range = score_range
+
+        # Randomized objects as rows of [cy, cx, h, w, vy, vx, score, class_id]
+        self.objects = np.zeros((0, 8), dtype=np.float64)
+
+    def invoke(self, input_data: np.ndarray) -> List[np.ndarray]:
+        delay = self.latency.sample()
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.script is not None:
+            frame = self._next_scripted()
+        else:
+            frame = self._next_random()
+
+        outputs = super().invoke(input_data)
+        count = min(len(frame), self.max_detections)
+        for i, (class_id, score, bbox) in enumerate(frame[:count]):
+            outputs[0][0, i] = bbox
+            outputs[1][0, i] = class_id
+            outputs[2][0, i] = score
+        outputs[3][0] = count
+
+        self.frame_index += 1
+        return outputs
+
+    def _next_scripted(self) -> List[Tuple[int, float, List[float]]]:
+        """Return the detections of the next scripted frame."""
+        if not self.script or (self.frame_index >= len(self.script) and not self.loop):
+            return []
+
+        entries = self.script[self.frame_index % len(self.script)]
+        return [(int(e["class_id"]), float(e["score"]), e["bbox"]) for e in entries]
+
+    def _next_random(self) -> List[Tuple[int, float, List[float]]]:
+        """Advance the randomized scene by one frame and return its detections."""
+        rng = self.rng
+        objects = self.objects
+
+        # Departures
+        if len(objects):
+            objects = objects[rng.random(len(objects)) >= self.despawn_rate]
+
+        # Arrivals
+        if len(objects) < self.max_objects and rng.random() < self.spawn_rate:
+            h, w = rng.uniform(*self.box_size, size=2)
+            cy, cx = rng.uniform(0.5 * h, 1 - 0.5 * h), rng.uniform(0.5 * w, 1 - 0.5 * w)
+            vy, vx = rng.uniform(-self.speed, self.speed, size=2)
+            score = rng.uniform(*self.score_range)
+            class_id = rng.choice(self.class_ids, p=self.class_weights)
+            objects = np.vstack([objects, [cy, cx, h, w, vy, vx, score, class_id]])
+
+        if len(objects):
+            # Move boxes, bouncing off the frame edges
+            objects[:, 0:2] += objects[:, 4:6]
+            for axis, size in ((0, 2), (1, 3)):
+                half = objects[:, size] / 2
+                out = (objects[:, axis] < half) | (objects[:, axis] > 1 - half)
+                objects[out, axis + 4] *= -1
+                objects[:, axis] = np.clip(objects[:, axis], half, 1 - half)
+
+            # Jitter scores the way real detections flicker
+            jitter = rng.normal(0, 0.02, size=len(objects))
+            objects[:, 6] = np.clip(objects[:, 6] + jitter, *self.score_range)
+
+        self.objects = objects
+        return [
+            (int(class_id), float(score),
+             [cy - h / 2, cx - w / 2, cy + h / 2, cx + w / 2])
+            for cy, cx, h, w, _, _, score, class_id in objects
+        ]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TFLiteBackend, OpenCVBackend, ONNXBackend, StubBackend, SyntheticBackend)
+}
+
+# Preference order when no benchmark is run
+DEFAULT_ORDER = ("tflite", "onnx", "opencv")
+
+
+def available_backends(model_path: str) -> List[str]:
+    """
+    List installed backends that can load a model, in preference order.
+
+    Args:
+        model_path: Path to model file
+
+    Returns:
+        Backend names
+    """
+    return [
+        name for name in DEFAULT_ORDER
+        if BACKENDS[name].is_available() and BACKENDS[name].supports(model_path)
+    ]
+
+
+def create_backend(name: str, model_path: str, **options) -> InferenceBackend:
+    """
+    Create a backend by name.
+
+    Args:
+        name: Backend name (tflite, opencv, onnx, stub)
+        model_path: Path to model file
+        **options: Backend-specific constructor arguments
+
+    Returns:
+        Initialized backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+
+    backend_cls = BACKENDS[name]
+    if not backend_cls.is_available():
+        raise RuntimeError(f"Backend '{name}' is not installed")
+
+    return backend_cls(model_path, **options)
+
+
+def select_backend(model_path: str,
+                   candidates: Optional[Sequence[str]] = None,
+                   benchmark: bool = False,
+                   options: Optional[Dict[str, Dict]] = None,
+                   cache_dir: Optional[str] = None) -> Optional[InferenceBackend]:
+    """
+    Pick a backend for a model.
+
+    Without benchmarking the first candidate that loads is used. With
+    benchmarking every candidate is timed on a blank input and the fastest
+    one wins; the winner is cached per model file hash so later starts skip
+    the benchmark.
+
+    Args:
+        model_path: Path to model file
+        candidates: Backend names to consider (defaults to all available)
+        benchmark: Whether to time candidates and pick the fastest
+        options: Per-backend constructor arguments keyed by backend name
+        cache_dir: Directory for the benchmark cache
+
+    Returns:
+        Initialized backend, or None if no candidate could load the model
+    """
+    options = options or {}
+    names = [
+        name for name in (candidates or available_backends(model_path))
+        if name in BACKENDS and BACKENDS[name].is_available() and BACKENDS[name].supports(model_path)
+    ]
+
+    cache = None
+    model_key = None
+    if benchmark and len(names) > 1:
+        cache = ResultCache("backends", cache_dir)
+        model_key = file_hash(model_path)
+        cached = cache.get(model_key, {}).get("backend")
+        if cached in names:
+            logger.info(f"Using cached backend choice: {cached}")
+            names.remove(cached)
+            names.insert(0, cached)
+            cache = None
+
+    best = None
+    best_time = None
+    timings = {}
+
+    for name in names:
+        try:
+            backend = create_backend(name, model_path, **options.get(name, {}))
+        except Exception as e:
+            logger.warning(f"Backend '{name}' failed to load {model_path}: {e}")
+            continue
+
+        if cache is None:
+            return backend
+
+        try:
+            height, width = backend.input_size
+            blank = np.zeros((1, height, width, 3), dtype=backend.input_dtype)
+            elapsed = time_invocations(lambda: backend.invoke(blank))
+        except Exception as e:
+            logger.warning(f"Backend '{name}' failed during benchmark: {e}")
+            backend.close()
+            continue
+
+        timings[name] = elapsed
+        logger.info(f"Backend '{name}': {elapsed * 1000:.1f} ms per inference")
+
+        if best_time is None or elapsed < best_time:
+            if best is not None:
+                best.close()
+            best, best_time = backend, elapsed
+        else:
+            backend.close()
+
+    if cache is not None and best is not None:
+        cache.set(model_key, {"backend": best.name, "timings": timings})
+        logger.info(f"Selected backend '{best.name}'")
+
+    return best
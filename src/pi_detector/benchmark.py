@@ -0,0 +1,145 @@
+"""
+Benchmarking helpers and persistent result cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CACHE_DIR = "~/.cache/pi_detector"
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 hash of a file.
+
+    Args:
+        path: Path to the file
+        chunk_size: Number of bytes read per chunk
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cpu_model() -> str:
+    """
+    Describe the current CPU for use in cache keys.
+
+    Returns:
+        CPU model name and core count, e.g. "Cortex-A72 (BCM2711) x4"
+    """
+    name = None
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            info = {}
+            for line in f:
+                key, sep, value = line.partition(':')
+                if sep:
+                    info.setdefault(key.strip(), value.strip())
+        # Raspberry Pi kernels report "Model"; x86 reports "model name"
+        name = info.get('model name') or info.get('Model') or info.get('Hardware')
+    except OSError:
+        pass
+
+    name = name or platform.processor() or platform.machine() or "unknown"
+    return f"{name} x{os.cpu_count() or 1}"
+
+
+def time_invocations(fn: Callable[[], Any], warmup: int = 2, runs: int = 5) -> float:
+    """
+    Time repeated calls of a function after a few warm-up calls.
+
+    Args:
+        fn: Function to time (called without arguments)
+        warmup: Number of untimed warm-up calls
+        runs: Number of timed calls
+
+    Returns:
+        Median duration of a single call in seconds
+    """
+    for _ in range(warmup):
+        fn()
+
+    durations = []
+    for _ in range(max(1, runs)):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    durations.sort()
+    return durations[len(durations) // 2]
+
+
+class ResultCache:
+    """Small JSON-backed key/value store for benchmark results."""
+
+    def __init__(self, name: str, cache_dir: Optional[str] = None):
+        """
+        Initialize result cache.
+
+        Args:
+            name: Cache name (used as the file name)
+            cache_dir: Directory holding cache files
+        """
+        self.path = Path(cache_dir or DEFAULT_CACHE_DIR).expanduser() / f"{name}.json"
+        self._data: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        """Load cache contents from disk on first access."""
+        if self._data is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._data = json.load(f)
+            except FileNotFoundError:
+                self._data = {}
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache {self.path}: {e}")
+                self._data = {}
+        return self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+            default: Value returned when the key is missing
+
+        Returns:
+            Cached value or default
+        """
+        return self._load().get(key, default)
+
+    def set(self, key: str, value: Any):
+        """
+        Store a value and write the cache to disk.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        data = self._load()
+        data[key] = value
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            tmp_path.replace(self.path)
+        except Exception as e:
+            logger.warning(f"Failed to write cache {self.path}: {e}")
@@ -3,7 +3,7 @@ Camera handling module for Raspberry Pi camera.
 """
 
 import logging
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 import numpy as np
 
 try:
@@ -21,18 +21,23 @@ logger = logging.getLogger(__name__)
 class CameraHandler:
     """Handles camera operations for the Raspberry Pi."""
     
-    def __init__(self, resolution: Tuple[int, int] = (640, 480), framerate: int = 30):
+    def __init__(self, resolution: Tuple[int, int] = (640, 480), framerate: int = 30,
+                 device: Optional[Union[int, str]] = None):
         """
         Initialize camera handler.
         
         Args:
             resolution: Camera resolution as (width, height)
             framerate: Camera framerate
+            device: Camera number (Picamera2 camera or OpenCV index) or a
+                device path such as "/dev/video2" (OpenCV only); None probes
+                the default cameras
         """
         self.resolution = resolution
         self.framerate = framerate
+        self.device = device
         self.camera = None
-        self.use_picamera = PICAMERA_AVAILABLE
+        self.use_picamera = PICAMERA_AVAILABLE and not isinstance(device, str)
         
         self._initialize_camera()
     
@@ -42,7 +47,7 @@ class CameraHandler:
             if self.use_picamera:
                 logger.info("Initializing Picamera2...")
                 try:
-                    self.camera = Picamera2()
+                    self.camera = Picamera2(self.device) if self.device is not None else Picamera2()
                     
                     # Configure camera
                     config = self.camera.create_preview_configuration(
@@ -60,8 +65,9 @@ class CameraHandler:
             # Try OpenCV (either as primary or fallback)
             logger.info("Initializing OpenCV camera...")
             
-            # Try different camera indices
-            for camera_idx in [0, 1, -1]:
+            # Try the configured device, or different camera indices
+            candidates = [self.device] if self.device is not None else [0, 1, -1]
+            for camera_idx in candidates:
                 logger.info(f"Trying camera index {camera_idx}...")
                 self.camera = cv2.VideoCapture(camera_idx)
                 
@@ -132,6 +138,22 @@ class CameraHandler:
             logger.error(f"Error capturing frame: {e}")
             return None
     
+    def set_framerate(self, framerate: float):
+        """
+        Change the capture frame rate, e.g. to idle the sensor in standby.
+        
+        Args:
+            framerate: Frames per second
+        """
+        try:
+            if self.use_picamera and self.camera:
+                self.camera.set_controls({"FrameRate": framerate})
+            elif self.camera:
+                self.camera.set(cv2.CAP_PROP_FPS, framerate)
+            logger.info(f"Camera frame rate set to {framerate} fps")
+        except Exception as e:
+            logger.error(f"Error setting frame rate: {e}")
+    
     def close(self):
         """Release camera resources."""
         try:
@@ -2,6 +2,7 @@
 Configuration management module.
 """
 
+import copy
 import json
 import logging
 from pathlib import Path
@@ -16,19 +17,132 @@ class Config:
     DEFAULT_CONFIG = {
         "camera": {
             "resolution": [640, 480],
-            "framerate": 30
+            "framerate": 30,
+            "device": None,
+            "max_fps": None,
+            "capture_process": False,
+            "bus_slots": 4,
+            "zero_copy": False
         },
+        "cameras": [],
         "detection": {
             "confidence_threshold": 0.5,
-            "model_path": "models/mobilenet_ssd_v2.tflite"
+            "model_path": "models/mobilenet_ssd_v2.tflite",
+            "backend": "auto",
+            "benchmark_backends": False,
+            "backend_options": {},
+            "num_threads": None,
+            "delegates": [],
+            "auto_tune": False,
+            "cache_dir": "~/.cache/pi_detector",
+            "output_format": "postprocessed",
+            "decoder": {
+                "anchors_path": None,
+                "iou_threshold": 0.5,
+                "top_k": 200,
+                "max_detections": 25,
+                "soft_nms": False,
+                "soft_nms_sigma": 0.5
+            },
+            "synthetic": {
+                "seed": 0,
+                "script": None,
+                "classes": {"0": 0.6, "15": 0.2, "16": 0.2},
+                "max_objects": 3,
+                "spawn_rate": 0.05,
+                "despawn_rate": 0.05,
+                "speed": 0.01,
+                "latency": {
+                    "distribution": "fixed",
+                    "mean_ms": 0,
+                    "std_ms": 0
+                }
+            },
+            "cascade": {
+                "enabled": False,
+                "screen_model_path": "models/ssdlite_mobilenet_v2_160.tflite",
+                "screen_input_size": None,
+                "screen_threshold": 0.3,
+                "crop_margin": 0.15,
+                "min_crop_fraction": 0.25
+            }
         },
         "audio": {
             "enabled": True,
-            "volume": 80
+            "volume": 80,
+            "rate": 150,
+            "queue_max_depth": 5,
+            "max_message_age": 5.0,
+            "out_of_process": False,
+            "server_health_interval": 5.0,
+            "sounds": {},
+            "sound_channels": 8,
+            "sound_mode": "replace",
+            "phrase_cache": {
+                "enabled": True,
+                "dir": "~/.cache/pi_detector/phrases",
+                "max_memory_entries": 32,
+                "max_disk_entries": 256,
+                "preload": True
+            }
+        },
+        "gating": {
+            "enabled": False,
+            "triggers": ["ultrasonic"],
+            "hold_time": 10.0,
+            "standby_fps": 1.0,
+            "max_wake_latency": 0.5,
+            "ultrasonic": {
+                "trig_pin": 23,
+                "echo_pin": 24,
+                "enter_distance": 1.0,
+                "exit_distance": 1.2,
+                "simulate": None
+            },
+            "motion": {
+                "threshold": 25,
+                "min_area": 0.01
+            },
+            "schedule": {
+                "windows": [["07:00", "22:00"]]
+            }
+        },
+        "recording": {
+            "enabled": False,
+            "directory": "recordings",
+            "pre_seconds": 5.0,
+            "post_seconds": 10.0,
+            "max_clip_seconds": 60.0,
+            "fps": 10.0,
+            "quality": 80,
+            "max_memory_mb": 32.0,
+            "max_disk_mb": 1024.0
+        },
+        "preview": {
+            "enabled": False,
+            "host": "127.0.0.1",
+            "port": 8080,
+            "max_fps": 10.0,
+            "quality": 80
+        },
+        "history": {
+            "enabled": False,
+            "path": "~/.local/share/pi_detector/history.db",
+            "batch_size": 50,
+            "flush_interval": 1.0,
+            "retention_days": 30,
+            "max_rows": 200000
         },
         "logging": {
             "level": "INFO",
-            "file": "pi_detector.log"
+            "file": "pi_detector.log",
+            "max_bytes": 1048576,
+            "backup_count": 3,
+            "queue_size": 10000,
+            "rate_limit": {
+                "interval": 60.0,
+                "burst": 5
+            }
         }
     }
     
@@ -40,7 +154,8 @@ class Config:
             config_path: Path to configuration file
         """
         self.config_path = Path(config_path) if config_path else None
-        self.config = self.DEFAULT_CONFIG.copy()
+        # Deep copy: set() and load() modify nested sections in place
+        self.config = copy.deepcopy(self.DEFAULT_CONFIG)
         
         if self.config_path and self.config_path.exists():
             self.load()
@@ -1,21 +1,18 @@
 """
-Object detection module using TensorFlow Lite.
+Object detection module.
 """
 
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
 import numpy as np
 
-try:
-    import tflite_runtime.interpreter as tflite
-    TFLITE_AVAILABLE = True
-except ImportError:
-    TFLITE_AVAILABLE = False
-    logging.warning("tflite_runtime not available. Detection will not work.")
-
 import cv2
 
+from .backends import (InferenceBackend, StubBackend, SyntheticBackend,
+                       create_backend, select_backend)
+from .postprocess import RawOutputDecoder
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,51 +33,157 @@ LABELS = {
 
 
 class ObjectDetector:
-    """Object detector using TensorFlow Lite models."""
+    """Object detector running on a pluggable inference backend."""
     
-    def __init__(self, model_path: str, confidence_threshold: float = 0.5):
+    def __init__(self, model_path: str, confidence_threshold: float = 0.5,
+                 backend: str = "auto", benchmark_backends: bool = False,
+                 backend_options: Optional[Dict[str, Dict]] = None,
+                 cache_dir: Optional[str] = None,
+                 num_threads: Optional[int] = None,
+                 delegates: Optional[List] = None,
+                 auto_tune: bool = False,
+                 input_size: Optional[Sequence[int]] = None,
+                 screen_detector: Optional["ObjectDetector"] = None,
+                 crop_margin: float = 0.15,
+                 min_crop_fraction: float = 0.25,
+                 output_format: str = "postprocessed",
+                 decoder_options: Optional[Dict] = None):
         """
         Initialize object detector.
         
         Args:
-            model_path: Path to TFLite model file
+            model_path: Path to model file
             confidence_threshold: Minimum confidence for detections
+            backend: Backend name (tflite, opencv, onnx, stub) or "auto"
+            benchmark_backends: Time available backends at startup and pick the fastest
+            backend_options: Per-backend constructor arguments keyed by backend name
+            cache_dir: Directory for cached benchmark results
+            num_threads: Inference thread count (runtime default if None)
+            delegates: TFLite external delegates (library paths or option dicts)
+            auto_tune: Time TFLite thread/XNNPACK settings and cache the fastest
+            input_size: Override the model input size as (height, width)
+            screen_detector: Cheap detector that screens frames first (cascade mode)
+            crop_margin: Margin added around screened candidates, as a fraction
+                of the candidate region size
+            min_crop_fraction: Minimum crop side, as a fraction of the frame side
+            output_format: "postprocessed" for models with the built-in
+                detection op, or "ssd"/"yolo" for raw exports decoded in NumPy
+            decoder_options: RawOutputDecoder arguments for raw exports
+                (anchors_path, iou_threshold, top_k, soft_nms, ...)
         """
         self.model_path = Path(model_path)
         self.confidence_threshold = confidence_threshold
-        self.interpreter = None
-        self.input_details = None
-        self.output_details = None
+        self.backend_name = backend
+        self.benchmark_backends = benchmark_backends
+        self.cache_dir = cache_dir
+        self.backend_options = self._merge_backend_options(
+            backend_options or {}, num_threads, delegates, auto_tune, input_size
+        )
+        self.backend: Optional[InferenceBackend] = None
         self.labels = LABELS
+        self.screen_detector = screen_detector
+        self.crop_margin = crop_margin
+        self.min_crop_fraction = min_crop_fraction
+        self.output_format = output_format
+        self.decoder_options = decoder_options or {}
+        self.decoder: Optional[RawOutputDecoder] = None
         
-        if TFLITE_AVAILABLE:
-            self._load_model()
-        else:
-            logger.error("TFLite runtime not available. Cannot initialize detector.")
+        self._load_model()
+        self._create_decoder()
+    
+    def _merge_backend_options(self, backend_options: Dict[str, Dict],
+                               num_threads: Optional[int],
+                               delegates: Optional[List],
+                               auto_tune: bool,
+                               input_size: Optional[Sequence[int]]) -> Dict[str, Dict]:
+        """
+        Fold the top-level tuning arguments into per-backend options.
+        
+        Explicit entries in backend_options take precedence.
+        """
+        options = {name: dict(values) for name, values in backend_options.items()}
+        
+        tflite_options = options.setdefault("tflite", {})
+        if num_threads:
+            tflite_options.setdefault("num_threads", num_threads)
+            options.setdefault("onnx", {}).setdefault("num_threads", num_threads)
+        if delegates:
+            tflite_options.setdefault("delegates", delegates)
+        if auto_tune:
+            tflite_options.setdefault("auto_tune", True)
+            tflite_options.setdefault("cache_dir", self.cache_dir)
+        if input_size:
+            tflite_options.setdefault("input_size", list(input_size))
+            options.setdefault("opencv", {}).setdefault("input_size", list(input_size))
+        
+        return options
     
     def _load_model(self):
-        """Load the TFLite model."""
+        """Load the model on the configured backend."""
         try:
+            if self.backend_name in (StubBackend.name, SyntheticBackend.name):
+                self.backend = create_backend(
+                    self.backend_name,
+                    str(self.model_path),
+                    **self.backend_options.get(self.backend_name, {})
+                )
+                return
+            
             if not self.model_path.exists():
-                logger.warning(f"Model not found at {self.model_path}. Using dummy detector.")
+                logger.warning(f"Model not found at {self.model_path}. Using synthetic detector.")
+                self.backend = create_backend(
+                    SyntheticBackend.name,
+                    str(self.model_path),
+                    **self.backend_options.get(SyntheticBackend.name, {})
+                )
                 return
             
             logger.info(f"Loading model from {self.model_path}")
             
-            # Load TFLite model
-            self.interpreter = tflite.Interpreter(model_path=str(self.model_path))
-            self.interpreter.allocate_tensors()
+            if self.backend_name == "auto":
+                self.backend = select_backend(
+                    str(self.model_path),
+                    benchmark=self.benchmark_backends,
+                    options=self.backend_options,
+                    cache_dir=self.cache_dir
+                )
+            else:
+                self.backend = create_backend(
+                    self.backend_name,
+                    str(self.model_path),
+                    **self.backend_options.get(self.backend_name, {})
+                )
             
-            # Get input and output details
-            self.input_details = self.interpreter.get_input_details()
-            self.output_details = self.interpreter.get_output_details()
+            if self.backend is None:
+                logger.error(f"No inference backend available for {self.model_path}")
+                return
             
-            logger.info("Model loaded successfully")
-            logger.info(f"Input shape: {self.input_details[0]['shape']}")
+            logger.info(f"Model loaded successfully ({self.backend.name} backend)")
+            logger.info(f"Input size: {self.backend.input_size}")
             
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
-            self.interpreter = None
+            self.backend = None
+    
+    def _create_decoder(self):
+        """Create the NumPy decoder for models exported without post-processing."""
+        if self.output_format == "postprocessed":
+            return
+        
+        if self.backend is None or isinstance(self.backend, StubBackend):
+            # Stub and synthetic backends already emit post-processed outputs
+            return
+        
+        try:
+            options = dict(self.decoder_options)
+            options.setdefault("score_threshold", self.confidence_threshold)
+            options.setdefault("input_size", self.backend.input_size)
+            options.setdefault("class_ids", self.labels.keys())
+            self.decoder = RawOutputDecoder(self.output_format, **options)
+            logger.info(f"Decoding raw {self.output_format} outputs in NumPy")
+        except Exception as e:
+            logger.error(f"Failed to create output decoder: {e}")
+            self.backend = None
     
     def preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """
@@ -92,22 +195,18 @@ class ObjectDetector:
         Returns:
             Preprocessed image
         """
-        if self.interpreter is None:
+        if self.backend is None:
             return image
         
-        # Get input shape
-        input_shape = self.input_details[0]['shape']
-        height, width = input_shape[1], input_shape[2]
-        
         # Resize image
+        height, width = self.backend.input_size
         resized = cv2.resize(image, (width, height))
         
         # Normalize if required
-        input_type = self.input_details[0]['dtype']
-        if input_type == np.uint8:
+        if self.backend.input_dtype == np.uint8:
             return resized.astype(np.uint8)
         else:
-            # Normalize to [-1, 1] or [0, 1]
+            # Normalize to [-1, 1]
             return (resized.astype(np.float32) / 127.5) - 1.0
     
     def detect(self, image: np.ndarray) -> List[Dict]:
@@ -120,61 +219,150 @@ class ObjectDetector:
         Returns:
             List of detections with class, confidence, and bounding box
         """
-        if self.interpreter is None:
-            # Return dummy detections for testing without a model
-            return self._dummy_detect()
+        if self.backend is None:
+            return []
+        
+        if self.screen_detector is not None:
+            return self._detect_cascade(image)
         
+        return self._detect_full(image)
+    
+    def _detect_full(self, image: np.ndarray) -> List[Dict]:
+        """Run the main model on an image."""
         try:
             # Preprocess image
             input_data = self.preprocess_image(image)
             input_data = np.expand_dims(input_data, axis=0)
             
             # Run inference
-            self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
-            self.interpreter.invoke()
+            outputs = self.backend.invoke(input_data)
             
-            # Get outputs
-            # Assuming SSD MobileNet output format:
-            # boxes: [1, num_detections, 4]
-            # classes: [1, num_detections]
-            # scores: [1, num_detections]
-            
-            boxes = self.interpreter.get_tensor(self.output_details[0]['index'])[0]
-            classes = self.interpreter.get_tensor(self.output_details[1]['index'])[0]
-            scores = self.interpreter.get_tensor(self.output_details[2]['index'])[0]
-            
-            # Filter detections
-            detections = []
-            for i in range(len(scores)):
-                if scores[i] >= self.confidence_threshold:
-                    class_id = int(classes[i])
-                    
-                    # Only keep humans and animals
-                    if class_id in self.labels:
-                        detection = {
-                            'class': self.labels[class_id],
-                            'confidence': float(scores[i]),
-                            'bbox': boxes[i].tolist()  # [ymin, xmin, ymax, xmax]
-                        }
-                        detections.append(detection)
-            
-            return detections
+            return self.postprocess(outputs)
             
         except Exception as e:
             logger.error(f"Error during detection: {e}")
             return []
     
-    def _dummy_detect(self) -> List[Dict]:
+    def _detect_cascade(self, image: np.ndarray) -> List[Dict]:
         """
-        Return dummy detections for testing.
-        Used when model is not available.
+        Screen the frame with the cheap detector, then run the main model
+        on a full-resolution crop around the screened candidates.
         """
-        # Return empty list most of the time, occasionally return a test detection
-        import random
-        if random.random() < 0.1:  # 10% chance
-            return [{
-                'class': 'person',
-                'confidence': 0.85,
-                'bbox': [0.2, 0.3, 0.7, 0.6]
-            }]
-        return []
+        candidates = self.screen_detector.detect(image)
+        if not candidates:
+            return []
+        
+        frame_h, frame_w = image.shape[:2]
+        y0, x0, y1, x1 = self._candidate_region(candidates)
+        top, left = int(y0 * frame_h), int(x0 * frame_w)
+        bottom, right = int(np.ceil(y1 * frame_h)), int(np.ceil(x1 * frame_w))
+        if bottom <= top or right <= left:
+            return []
+        
+        detections = self._detect_full(image[top:bottom, left:right])
+        
+        # Map crop-relative boxes back to frame-relative coordinates
+        scale_y = (bottom - top) / frame_h
+        scale_x = (right - left) / frame_w
+        offset_y, offset_x = top / frame_h, left / frame_w
+        for detection in detections:
+            ymin, xmin, ymax, xmax = detection['bbox']
+            detection['bbox'] = [
+                offset_y + ymin * scale_y,
+                offset_x + xmin * scale_x,
+                offset_y + ymax * scale_y,
+                offset_x + xmax * scale_x,
+            ]
+        
+        return detections
+    
+    def _candidate_region(self, candidates: List[Dict]) -> List[float]:
+        """
+        Compute the normalized crop region covering all screened candidates.
+        
+        Args:
+            candidates: Screening detections
+            
+        Returns:
+            Region as [ymin, xmin, ymax, xmax] in [0, 1]
+        """
+        boxes = np.array([c['bbox'] for c in candidates], dtype=np.float32)
+        y0, x0 = boxes[:, 0].min(), boxes[:, 1].min()
+        y1, x1 = boxes[:, 2].max(), boxes[:, 3].max()
+        
+        region = []
+        for low, high in ((y0, y1), (x0, x1)):
+            size = max(high - low, 0.0)
+            margin = size * self.crop_margin
+            low, high = low - margin, high + margin
+            
+            # Grow small regions so the main model sees enough context
+            shortfall = self.min_crop_fraction - (high - low)
+            if shortfall > 0:
+                low, high = low - shortfall / 2, high + shortfall / 2
+            
+            # Shift back inside the frame before clipping
+            if low < 0:
+                low, high = 0.0, high - low
+            if high > 1:
+                low, high = low - (high - 1), 1.0
+            region.append((max(0.0, low), min(1.0, high)))
+        
+        (y0, y1), (x0, x1) = region
+        return [y0, x0, y1, x1]
+    
+    def postprocess(self, outputs: Sequence[np.ndarray]) -> List[Dict]:
+        """
+        Convert raw model outputs into detections.
+        
+        Args:
+            outputs: Backend outputs, each with a leading batch dimension
+            
+        Returns:
+            List of detections with class, confidence, and bounding box
+        """
+        if self.decoder is not None:
+            boxes, classes, scores = self.decoder.decode(outputs)
+            return [
+                {
+                    'class': self.labels[int(class_id)],
+                    'confidence': float(score),
+                    'bbox': box.tolist()  # [ymin, xmin, ymax, xmax]
+                }
+                for box, class_id, score in zip(boxes, classes, scores)
+                if int(class_id) in self.labels and score >= self.confidence_threshold
+            ]
+        
+        # Assuming SSD MobileNet output format:
+        # boxes: [1, num_detections, 4]
+        # classes: [1, num_detections]
+        # scores: [1, num_detections]
+        boxes = outputs[0][0]
+        classes = outputs[1][0]
+        scores = outputs[2][0]
+        
+        # Filter detections
+        detections = []
+        for i in range(len(scores)):
+            if scores[i] >= self.confidence_threshold:
+                class_id = int(classes[i])
+
+                # Only keep humans and animals
+                if class_id in self.labels:
+                    detection = {
+                        'class': self.labels[class_id],
+                        'confidence': float(scores[i]),
+                        'bbox': boxes[i].tolist()  # [ymin, xmin, ymax, xmax]
+                    }
+                    detections.append(detection)
+        
+        return detections
+    
+    def close(self):
+        """Release backend resources."""
+        if self.backend:
+            self.backend.close()
+            self.backend = None
+        
+        if self.screen_detector:
+            self.screen_detector.close()
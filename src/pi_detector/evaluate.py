@@ -0,0 +1,450 @@
+"""
+Offline evaluation of detection accuracy and throughput.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import struct
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .detector import ObjectDetector
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+REDUCED_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4,
+                 8: cv2.IMREAD_REDUCED_COLOR_8}
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+RECALL_POINTS = np.linspace(0.0, 1.0, 101)
+
+
+def image_size(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Read the (width, height) of a JPEG or PNG from its header, without decoding.
+
+    Args:
+        path: Image file
+
+    Returns:
+        (width, height), or None for other formats or unreadable headers
+    """
+    with open(path, "rb") as f:
+        head = f.read(24)
+        if head.startswith(b"\x89PNG") and len(head) >= 24:
+            return struct.unpack(">II", head[16:24])
+        if not head.startswith(b"\xff\xd8"):
+            return None
+
+        # Walk the JPEG markers to the start-of-frame segment
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            length = struct.unpack(">H", f.read(2))[0]
+            if marker[1] in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                             0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                height, width = struct.unpack(">xHH", f.read(5))
+                return width, height
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def reduction_for(size: Optional[Tuple[int, int]], input_size: Optional[Tuple[int, int]]) -> int:
+    """
+    Pick the largest decode reduction that still leaves the model input size.
+
+    Args:
+        size: Image (width, height), or None if unknown
+        input_size: Model input (height, width), or None if unknown
+
+    Returns:
+        Reduction factor (1, 2, 4 or 8)
+    """
+    if size is None or input_size is None:
+        return 1
+    width, height = size
+    for factor in (8, 4, 2):
+        if width // factor >= input_size[1] and height // factor >= input_size[0]:
+            return factor
+    return 1
+
+
+def decode_image(task: Tuple[int, str, object, Optional[Tuple[int, int]]]
+                 ) -> Tuple[int, str, Optional[np.ndarray], float]:
+    """
+    Decode one image (runs in a worker process).
+
+    Args:
+        task: (index, path, reduction, model input size); the reduction is
+            1/2/4/8, or "auto" to pick it from the image header
+
+    Returns:
+        (index, path, RGB image or None, decode seconds)
+    """
+    index, path, reduce, input_size = task
+    started = time.perf_counter()
+    if reduce == "auto":
+        reduce = reduction_for(image_size(path), input_size)
+    image = cv2.imread(path, REDUCED_FLAGS.get(int(reduce), cv2.IMREAD_COLOR))
+    if image is not None:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return index, path, image, time.perf_counter() - started
+
+
+def iter_images(paths: Sequence[str], workers: int, reduce,
+                input_size: Optional[Tuple[int, int]], prefetch: Optional[int] = None
+                ) -> Iterator[Tuple[int, str, Optional[np.ndarray], float]]:
+    """
+    Decode images in worker processes, in order.
+
+    Args:
+        paths: Image files
+        workers: Worker processes (0 decodes in this process)
+        reduce: Decode reduction (1/2/4/8 or "auto")
+        input_size: Model input (height, width) for "auto"
+        prefetch: Images decoded ahead of the consumer (2 per worker if None)
+
+    Yields:
+        (index, path, RGB image or None, decode seconds)
+    """
+    tasks = ((index, str(path), reduce, input_size) for index, path in enumerate(paths))
+    if workers <= 0:
+        yield from map(decode_image, tasks)
+        return
+    if prefetch is None:
+        prefetch = 2 * workers
+
+    # Submit only a few tasks ahead: Pool.imap would decode the whole directory
+    # into memory while the slower detector works through it
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(decode_image, (task,)))
+            if len(pending) >= max(prefetch, 1):
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def iter_video(path: str, prefetch: int = 8
+               ) -> Iterator[Tuple[int, str, Optional[np.ndarray], float]]:
+    """
+    Decode a video on a background thread.
+
+    Args:
+        path: Video file
+        prefetch: Frames decoded ahead of the consumer
+
+    Yields:
+        (frame index, path, RGB frame, decode seconds)
+    """
+    frames: "queue.Queue" = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def read():
+        capture = cv2.VideoCapture(path)
+        index = 0
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                frames.put((index, path, frame, time.perf_counter() - started))
+                index += 1
+        finally:
+            capture.release()
+            frames.put(None)
+
+    reader = threading.Thread(target=read, name="eval-video", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        stop.set()
+        while reader.is_alive():
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                reader.join(timeout=0.1)
+
+
+def load_coco(path: str) -> Tuple[Dict, Dict[int, Tuple[str, int, int]]]:
+    """
+    Load COCO-style ground truth.
+
+    Args:
+        path: Annotation JSON file
+
+    Returns:
+        (boxes, images) where boxes maps (image id, class name) to an array of
+        normalized [ymin, xmin, ymax, xmax] boxes, and images maps image id
+        to (file name, width, height). Crowd annotations are skipped.
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    categories = {c['id']: c['name'] for c in data.get('categories', [])}
+    images = {i['id']: (i.get('file_name', str(i['id'])), i['width'], i['height'])
+              for i in data['images']}
+
+    boxes = defaultdict(list)
+    for annotation in data.get('annotations', []):
+        if annotation.get('iscrowd'):
+            continue
+        _, width, height = images[annotation['image_id']]
+        x, y, w, h = annotation['bbox']
+        boxes[(annotation['image_id'], categories[annotation['category_id']])].append(
+            [y / height, x / width, (y + h) / height, (x + w) / width]
+        )
+    return {key: np.array(value, dtype=np.float32) for key, value in boxes.items()}, images
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU of one [ymin, xmin, ymax, xmax] box with each of several."""
+    top = np.maximum(box[0], boxes[:, 0])
+    left = np.maximum(box[1], boxes[:, 1])
+    bottom = np.minimum(box[2], boxes[:, 2])
+    right = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(bottom - top, 0, None) * np.clip(right - left, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+def average_precision(predictions: List[Tuple[float, int, np.ndarray]],
+                      truth: Dict[int, np.ndarray], iou_threshold: float) -> float:
+    """
+    COCO-style 101-point interpolated average precision for one class.
+
+    Args:
+        predictions: (score, image id, box) for every detection of the class
+        truth: Image id -> ground-truth boxes of the class
+        iou_threshold: Minimum IoU for a true positive
+
+    Returns:
+        Average precision (0-1)
+    """
+    total = sum(len(boxes) for boxes in truth.values())
+    if total == 0:
+        return float("nan")
+    if not predictions:
+        return 0.0
+
+    matched = {image_id: np.zeros(len(boxes), dtype=bool) for image_id, boxes in truth.items()}
+    hits = np.zeros(len(predictions), dtype=bool)
+    for i, (_, image_id, box) in enumerate(sorted(predictions, key=lambda p: -p[0])):
+        boxes = truth.get(image_id)
+        if boxes is None or len(boxes) == 0:
+            continue
+        ious = box_iou(box, boxes)
+        ious[matched[image_id]] = -1  # Each ground-truth box matches once
+        best = int(np.argmax(ious))
+        if ious[best] >= iou_threshold:
+            matched[image_id][best] = True
+            hits[i] = True
+
+    true_positives = np.cumsum(hits)
+    recall = true_positives / total
+    precision = true_positives / np.arange(1, len(hits) + 1)
+    # Precision envelope, sampled at fixed recall points
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    indices = np.searchsorted(recall, RECALL_POINTS, side="left")
+    sampled = np.where(indices < len(precision), precision[np.minimum(indices, len(precision) - 1)], 0.0)
+    return float(sampled.mean())
+
+
+def mean_average_precision(predictions: Dict[str, List[Tuple[float, int, np.ndarray]]],
+                           truth: Dict[Tuple[int, str], np.ndarray]) -> Dict[str, Dict[str, float]]:
+    """
+    Per-class AP over IoU 0.50:0.95 and at IoU 0.50.
+
+    Args:
+        predictions: Class name -> (score, image id, box) detections
+        truth: (image id, class name) -> ground-truth boxes
+
+    Returns:
+        Class name -> {"ap": AP@[.50:.95], "ap50": AP@.50, "instances": count}
+    """
+    by_class = defaultdict(dict)
+    for (image_id, class_name), boxes in truth.items():
+        by_class[class_name][image_id] = boxes
+
+    results = {}
+    for class_name, class_truth in sorted(by_class.items()):
+        class_predictions = predictions.get(class_name, [])
+        aps = [average_precision(class_predictions, class_truth, t) for t in IOU_THRESHOLDS]
+        results[class_name] = {
+            'ap': float(np.mean(aps)),
+            'ap50': aps[0],
+            'instances': int(sum(len(boxes) for boxes in class_truth.values()))
+        }
+    return results
+
+
+def timed_detect(detector: ObjectDetector, image: np.ndarray,
+                 timings: Dict[str, float]) -> Optional[List[Dict]]:
+    """
+    Run detection, adding the time of each stage to ``timings``.
+
+    Args:
+        detector: Detector
+        image: RGB image
+        timings: Seconds per stage, accumulated in place
+
+    Returns:
+        Detections, or None if detection failed
+    """
+    if detector.backend is None or detector.screen_detector is not None:
+        started = time.perf_counter()
+        detections = detector.detect(image)
+        timings['detect'] += time.perf_counter() - started
+        return detections
+
+    try:
+        started = time.perf_counter()
+        input_data = np.expand_dims(detector.preprocess_image(image), axis=0)
+        preprocessed = time.perf_counter()
+        outputs = detector.backend.invoke(input_data)
+        inferred = time.perf_counter()
+        detections = detector.postprocess(outputs)
+        finished = time.perf_counter()
+    except Exception as e:
+        logger.error(f"Error during detection: {e}")
+        return None
+
+    timings['preprocess'] += preprocessed - started
+    timings['inference'] += inferred - preprocessed
+    timings['postprocess'] += finished - inferred
+    return detections
+
+
+def evaluate(detector: ObjectDetector, source: str, annotations: Optional[str] = None,
+             workers: Optional[int] = None, reduce="auto", limit: Optional[int] = None) -> Dict:
+    """
+    Run a detector over a directory of images or a video.
+
+    Args:
+        detector: Detector to evaluate
+        source: Image directory or video file
+        annotations: COCO-style ground truth (image file names, or frame
+            indices as image ids for a video)
+        workers: Decode processes for image directories (CPU count - 1 if None)
+        reduce: Decode reduction for images: 1, 2, 4, 8 or "auto" (largest
+            that keeps the model input size)
+        limit: Evaluate at most this many images or frames
+
+    Returns:
+        Report with image count, throughput, per-stage seconds and, with
+        ground truth, per-class AP and mAP
+    """
+    truth, images = load_coco(annotations) if annotations else ({}, {})
+    input_size = tuple(detector.backend.input_size) if detector.backend is not None else None
+
+    source_path = Path(source)
+    if source_path.is_dir():
+        paths = sorted(p for p in source_path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if annotations:
+            # Only annotated images are worth running
+            names = {name for name, _, _ in images.values()}
+            paths = [p for p in paths if p.name in names]
+        paths = paths[:limit]
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        frames = iter_images(paths, workers, reduce, input_size)
+        image_ids = {name: image_id for image_id, (name, _, _) in images.items()}
+    else:
+        frames = iter_video(source)
+        image_ids = None
+
+    timings = defaultdict(float)
+    predictions = defaultdict(list)
+    evaluated = set()
+    count = failed = errors = 0
+    started = time.perf_counter()
+    for index, path, image, decode_seconds in frames:
+        if limit is not None and count >= limit:
+            break
+        timings['decode'] += decode_seconds
+        if image is None:
+            failed += 1
+            logger.warning(f"Could not decode {path}")
+            continue
+
+        detections = timed_detect(detector, image, timings)
+        if detections is None:
+            errors += 1
+            continue
+        count += 1
+
+        image_id = image_ids.get(Path(path).name) if image_ids is not None else index
+        evaluated.add(image_id)
+        for detection in detections:
+            predictions[detection['class']].append(
+                (detection['confidence'], image_id, np.array(detection['bbox'], dtype=np.float32))
+            )
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'images': count,
+        'failed': failed,
+        'errors': errors,
+        'seconds': elapsed,
+        'images_per_second': count / elapsed if elapsed > 0 else 0.0,
+        'stage_ms': {stage: 1000 * seconds / max(count, 1) for stage, seconds in timings.items()},
+        'detections': sum(len(p) for p in predictions.values())
+    }
+    if annotations:
+        # Score only images that were run: missing files, images past the limit, and
+        # images that failed to decode or detect must not count as missed objects
+        truth = {key: boxes for key, boxes in truth.items() if key[0] in evaluated}
+        per_class = mean_average_precision(predictions, truth)
+        report['classes'] = per_class
+        valid = [c for c in per_class.values() if not np.isnan(c['ap'])]
+        report['map'] = float(np.mean([c['ap'] for c in valid])) if valid else float("nan")
+        report['map50'] = float(np.mean([c['ap50'] for c in valid])) if valid else float("nan")
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """
+    Format an evaluation report as text.
+
+    Args:
+        report: Result of evaluate()
+
+    Returns:
+        Human-readable report
+    """
+    lines = [
+        f"Images:      {report['images']} ({report['failed']} failed to decode, "
+        f"{report['errors']} detection errors)",
+        f"Detections:  {report['detections']}",
+        f"Throughput:  {report['images_per_second']:.1f} images/s ({report['seconds']:.1f} s)",
+        "Stage times (ms per image, decode runs in parallel):"
+    ]
+    for stage, ms in report['stage_ms'].items():
+        lines.append(f"  {stage:<12}{ms:8.2f}")
+
+    if 'classes' in report:
+        lines.append(f"{'Class':<14}{'AP':>8}{'AP50':>8}{'Objects':>9}")
+        for class_name, result in report['classes'].items():
+            lines.append(f"{class_name:<14}{result['ap']:8.3f}{result['ap50']:8.3f}"
+                         f"{result['instances']:9d}")
+        lines.append(f"{'mAP':<14}{report['map']:8.3f}{report['map50']:8.3f}")
+    return "\n".join(lines)
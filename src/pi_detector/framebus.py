@@ -0,0 +1,316 @@
+"""
+Shared-memory frame bus between a capture process and detector processes.
+"""
+
+import logging
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0x50494642  # "PIFB"
+HEADER_FIELDS = 6  # magic, slots, height, width, channels, latest frame number
+ALIGN = 64
+
+
+class FrameBus:
+    """
+    Ring of fixed-size frame slots in shared memory, one writer and any number of readers.
+
+    Each slot has a sequence word used as a seqlock: the writer makes it
+    odd while copying a frame in and sets it to twice the frame number when
+    done. Readers never lock; they check the word before and after using a
+    slot and retry if the writer got there in between. With enough slots a
+    reader can work directly on a slot (zero-copy) and confirm afterwards
+    with ``valid()`` that it was not overwritten.
+    """
+
+    def __init__(self, name: Optional[str] = None, shape: Tuple[int, int, int] = (480, 640, 3),
+                 slots: int = 4, create: bool = True):
+        """
+        Create or attach to a frame bus.
+
+        Args:
+            name: Shared memory name (generated when creating if None)
+            shape: Frame shape as (height, width, channels), uint8
+            slots: Number of frame slots (creating only)
+            create: Create the bus (the writer), or attach to an existing one by name
+        """
+        if create:
+            self.shape = tuple(shape)
+            self.slots = slots
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=self._size())
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            _untrack(self.shm)
+            header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=self.shm.buf)
+            magic, self.slots = int(header[0]), int(header[1])
+            self.shape = (int(header[2]), int(header[3]), int(header[4]))
+            del header
+            if magic != MAGIC:
+                self.shm.close()
+                raise ValueError(f"Shared memory {name} is not a frame bus")
+
+        self.name = self.shm.name
+        self.owner = create
+        self._map()
+        if create:
+            self._header[:] = (MAGIC, self.slots, *self.shape, 0)
+            self._seq[:] = 0
+
+    def publish(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """
+        Copy a frame into the next slot (writer only).
+
+        Args:
+            frame: Frame with the bus's shape
+            timestamp: Capture time (now if None)
+
+        Returns:
+            Frame number of the published frame
+        """
+        number = int(self._header[5]) + 1
+        slot = number % self.slots
+        self._seq[slot] = 2 * number - 1  # Odd: write in progress
+        self._frames[slot][...] = frame
+        self._times[slot] = time.time() if timestamp is None else timestamp
+        self._seq[slot] = 2 * number
+        self._header[5] = number
+        return number
+
+    def latest(self) -> int:
+        """Number of the most recently published frame (0 before the first)."""
+        return int(self._header[5])
+
+    def read(self, last: int = 0, copy: bool = True
+             ) -> Optional[Tuple[int, float, np.ndarray]]:
+        """
+        Get the newest frame if it is newer than ``last``.
+
+        Args:
+            last: Frame number the caller already has
+            copy: Return a private copy; otherwise a read-only view of the
+                slot, which the caller must confirm with valid() after use
+
+        Returns:
+            (frame number, timestamp, frame), or None if there is nothing newer
+        """
+        while True:
+            number = self.latest()
+            if number <= last:
+                return None
+            slot = number % self.slots
+            if self._seq[slot] != 2 * number:
+                continue  # Overwritten since reading latest; try the newer frame
+
+            timestamp = float(self._times[slot])
+            frame = self._frames[slot].copy() if copy else self._views[slot]
+            if not copy or self._seq[slot] == 2 * number:
+                return number, timestamp, frame
+
+    def wait(self, last: int = 0, timeout: float = 1.0, copy: bool = True,
+             poll_interval: float = 0.001) -> Optional[Tuple[int, float, np.ndarray]]:
+        """
+        Wait for a frame newer than ``last``.
+
+        Args:
+            last: Frame number the caller already has
+            timeout: Seconds to wait
+            copy: See read()
+            poll_interval: Seconds between checks
+
+        Returns:
+            (frame number, timestamp, frame), or None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            result = self.read(last, copy)
+            if result is not None or time.monotonic() >= deadline:
+                return result
+            time.sleep(poll_interval)
+
+    def valid(self, number: int) -> bool:
+        """
+        Check that a zero-copy frame's slot still holds that frame.
+
+        Args:
+            number: Frame number returned by read()
+
+        Returns:
+            True if the frame was not overwritten, so results computed from it are sound
+        """
+        return self._seq[number % self.slots] == 2 * number
+
+    def close(self):
+        """Detach; the creator also frees the shared memory."""
+        self._header = self._seq = self._times = self._frames = self._views = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A caller still holds a zero-copy frame; the mapping goes when it does
+            logger.warning(f"Frame bus {self.name} still has frames in use")
+        if self.owner:
+            self.shm.unlink()
+
+    def _size(self) -> int:
+        return self._frames_offset() + self.slots * self._slot_size()
+
+    def _slot_size(self) -> int:
+        size = int(np.prod(self.shape))
+        return (size + ALIGN - 1) // ALIGN * ALIGN
+
+    def _frames_offset(self) -> int:
+        # header, per-slot sequence words and timestamps, then aligned frame slots
+        size = 8 * (HEADER_FIELDS + 2 * self.slots)
+        return (size + ALIGN - 1) // ALIGN * ALIGN
+
+    def _map(self):
+        buf = self.shm.buf
+        self._header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=buf)
+        self._seq = np.ndarray((self.slots,), dtype=np.uint64, buffer=buf, offset=8 * HEADER_FIELDS)
+        self._times = np.ndarray((self.slots,), dtype=np.float64, buffer=buf,
+                                 offset=8 * (HEADER_FIELDS + self.slots))
+        offset = self._frames_offset()
+        self._frames = [
+            np.ndarray(self.shape, dtype=np.uint8, buffer=buf, offset=offset + i * self._slot_size())
+            for i in range(self.slots)
+        ]
+        self._views = []
+        for frame in self._frames:
+            view = frame.view()
+            view.flags.writeable = False
+            self._views.append(view)
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    """Stop this process's resource tracker from unlinking memory it only attached to."""
+    # Child processes share their parent's tracker, which must keep the creator's entry
+    if multiprocessing.parent_process() is not None:
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _capture_main(bus_name: str, resolution: Tuple[int, int], framerate: float,
+                  device: Optional[Union[int, str]], requested_fps, stop):
+    """Capture process: open the camera and publish frames until stopped."""
+    from .camera import CameraHandler
+
+    bus = FrameBus(bus_name, create=False)
+    height, width = bus.shape[:2]
+    camera = None
+    try:
+        camera = CameraHandler(resolution=resolution, framerate=framerate, device=device)
+        current_fps = requested_fps.value
+        while not stop.is_set():
+            if requested_fps.value != current_fps:
+                current_fps = requested_fps.value
+                camera.set_framerate(current_fps)
+
+            frame = camera.capture_frame()
+            if frame is None:
+                time.sleep(0.1)
+                continue
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            bus.publish(frame[..., :bus.shape[2]])
+    except Exception as e:
+        logger.error(f"Capture process failed: {e}")
+    finally:
+        if camera:
+            camera.close()
+        bus.close()
+
+
+class ProcessCamera:
+    """
+    Camera captured in a separate process and read through a FrameBus.
+
+    Drop-in for CameraHandler in the detector process: capture, colour
+    conversion and the camera driver run in the child, so they no longer
+    compete with inference for this process's GIL.
+    """
+
+    def __init__(self, resolution: Tuple[int, int] = (640, 480), framerate: float = 30,
+                 device: Optional[Union[int, str]] = None, slots: int = 4,
+                 zero_copy: bool = False, start_timeout: float = 10.0):
+        """
+        Start the capture process.
+
+        Args:
+            resolution: Camera resolution as (width, height)
+            framerate: Camera framerate
+            device: Camera number or device path (see CameraHandler)
+            slots: Frame slots in the bus
+            zero_copy: Return read-only views of bus slots instead of copies;
+                check bus.valid(last_frame) after using a frame
+            start_timeout: Seconds to wait for the first frame
+
+        Raises:
+            RuntimeError: If the capture process delivers no frame in time
+        """
+        self.resolution = resolution
+        self.framerate = framerate
+        self.zero_copy = zero_copy
+        self.last_frame = 0
+        width, height = resolution
+        self.bus = FrameBus(shape=(height, width, 3), slots=slots)
+
+        context = multiprocessing.get_context("spawn")
+        self._stop = context.Event()
+        self._fps = context.Value("d", float(framerate))
+        self.process = context.Process(
+            target=_capture_main,
+            args=(self.bus.name, tuple(resolution), framerate, device, self._fps, self._stop),
+            name="pi-detector-capture",
+            daemon=True
+        )
+        self.process.start()
+
+        if self.bus.wait(timeout=start_timeout, copy=False) is None:
+            self.close()
+            raise RuntimeError("Capture process delivered no frames")
+        logger.info(f"Capture process started (pid {self.process.pid}, bus {self.bus.name})")
+
+    def capture_frame(self) -> Optional[np.ndarray]:
+        """
+        Wait for the next frame from the capture process.
+
+        Returns:
+            RGB frame, or None if no new frame arrived within a second
+        """
+        result = self.bus.wait(self.last_frame, timeout=1.0, copy=not self.zero_copy)
+        if result is None:
+            if not self.process.is_alive():
+                logger.error("Capture process exited")
+            return None
+        self.last_frame, _, frame = result
+        return frame
+
+    def set_framerate(self, framerate: float):
+        """
+        Change the capture frame rate in the capture process.
+
+        Args:
+            framerate: Frames per second
+        """
+        self._fps.value = float(framerate)
+
+    def close(self):
+        """Stop the capture process and free the bus."""
+        self._stop.set()
+        self.process.join(timeout=5.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.bus.close()
+
+    def is_available(self) -> bool:
+        return self.process.is_alive()
@@ -0,0 +1,306 @@
+"""
+Presence gating: idle capture and inference while nobody is around.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .ultrasonic import ACTIVATE, PresenceEstimator
+
+logger = logging.getLogger(__name__)
+
+
+class Trigger:
+    """
+    Base class of presence triggers.
+
+    A trigger reports whether something is present and calls its wake
+    callback when presence starts, so a sleeping gate resumes immediately.
+    """
+
+    name = "trigger"
+    needs_frames = False
+
+    def __init__(self):
+        self._wake: Optional[Callable[[], None]] = None
+
+    def attach(self, wake: Callable[[], None]):
+        """
+        Register the gate's wake-up callback.
+
+        Args:
+            wake: Called when presence starts
+        """
+        self._wake = wake
+
+    def start(self):
+        """Start any background sampling."""
+
+    def stop(self):
+        """Stop background sampling."""
+
+    def is_present(self) -> bool:
+        """
+        Check whether this trigger currently sees presence.
+
+        Returns:
+            True if something is present
+        """
+        raise NotImplementedError
+
+    def observe(self, frame: np.ndarray):
+        """
+        Feed a camera frame (only called when ``needs_frames`` is set).
+
+        Args:
+            frame: Camera frame
+        """
+
+    def _notify(self):
+        if self._wake:
+            self._wake()
+
+
+class UltrasonicTrigger(Trigger):
+    """Presence from an ultrasonic PresenceEstimator."""
+
+    name = "ultrasonic"
+
+    def __init__(self, estimator: PresenceEstimator):
+        """
+        Initialize ultrasonic trigger.
+
+        Args:
+            estimator: Presence estimator; started and stopped with the trigger,
+                which also releases the estimator's sensor when it stops
+        """
+        super().__init__()
+        self.estimator = estimator
+        self.estimator.subscribe(self._on_presence)
+
+    def start(self):
+        self.estimator.start()
+
+    def stop(self):
+        self.estimator.stop()
+        if self.estimator.sensor is not None:
+            self.estimator.sensor.close()
+
+    def is_present(self) -> bool:
+        return self.estimator.present
+
+    def _on_presence(self, event: str, distance: float):
+        if event == ACTIVATE:
+            self._notify()
+
+
+class MotionTrigger(Trigger):
+    """
+    Presence from frame differencing on a small grayscale copy of the frame.
+
+    During standby the gate asks for occasional probe frames, which are
+    only fed to this trigger and never reach the detector.
+    """
+
+    name = "motion"
+    needs_frames = True
+
+    def __init__(self, threshold: int = 25, min_area: float = 0.01,
+                 hold_time: float = 2.0, size: Tuple[int, int] = (80, 60)):
+        """
+        Initialize motion trigger.
+
+        Args:
+            threshold: Per-pixel intensity change counted as motion (0-255)
+            min_area: Fraction of changed pixels that counts as motion
+            hold_time: Seconds motion stays present after the last change
+            size: Analysis resolution as (width, height)
+        """
+        super().__init__()
+        self.threshold = threshold
+        self.min_area = min_area
+        self.hold_time = hold_time
+        self.size = size
+        self._previous: Optional[np.ndarray] = None
+        self._last_motion = float("-inf")
+
+    def is_present(self) -> bool:
+        return time.monotonic() - self._last_motion < self.hold_time
+
+    def observe(self, frame: np.ndarray):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        previous, self._previous = self._previous, small
+        if previous is None:
+            return
+
+        changed = np.count_nonzero(cv2.absdiff(small, previous) > self.threshold)
+        if changed >= self.min_area * small.size:
+            was_present = self.is_present()
+            self._last_motion = time.monotonic()
+            if not was_present:
+                self._notify()
+
+
+class ScheduleTrigger(Trigger):
+    """Presence during fixed daily time windows."""
+
+    name = "schedule"
+
+    def __init__(self, windows: Sequence[Sequence[str]],
+                 now: Callable[[], datetime.datetime] = datetime.datetime.now):
+        """
+        Initialize schedule trigger.
+
+        Args:
+            windows: ("HH:MM", "HH:MM") start/end pairs; a window may cross midnight
+            now: Clock returning the local time
+        """
+        super().__init__()
+        self.windows = [(self._parse(start), self._parse(end)) for start, end in windows]
+        self.now = now
+
+    def is_present(self) -> bool:
+        current = self.now().time()
+        for start, end in self.windows:
+            if start <= end:
+                if start <= current < end:
+                    return True
+            elif current >= start or current < end:
+                return True
+        return False
+
+    @staticmethod
+    def _parse(value: str) -> datetime.time:
+        return datetime.datetime.strptime(value, "%H:%M").time()
+
+
+class PresenceGate:
+    """
+    Decides when the capture/inference pipeline runs.
+
+    The pipeline is active while any trigger sees presence and for
+    ``hold_time`` seconds after. In standby ``wait()`` blocks instead of
+    returning frames to process, waking within ``max_wake_latency`` seconds
+    (immediately for triggers that signal presence). Frame-based triggers
+    get probe frames at ``standby_fps``.
+    """
+
+    def __init__(self, triggers: List[Trigger], hold_time: float = 10.0,
+                 standby_fps: float = 1.0, max_wake_latency: float = 0.5):
+        """
+        Initialize presence gate.
+
+        Args:
+            triggers: Presence triggers (any one keeps the pipeline active)
+            hold_time: Seconds to stay active after presence ends
+            standby_fps: Probe frame rate for frame triggers while in standby
+            max_wake_latency: Longest time wait() sleeps between presence checks
+        """
+        self.triggers = triggers
+        self.hold_time = hold_time
+        self.standby_fps = standby_fps
+        self.max_wake_latency = max_wake_latency
+        self.frame_triggers = [t for t in triggers if t.needs_frames]
+        self.active = False
+        self.activations = 0
+        self._last_present = float("-inf")
+        self._next_probe = 0.0
+        self._subscribers: List[Callable[[bool], None]] = []
+        self._condition = threading.Condition()
+        self._closed = False
+
+        for trigger in triggers:
+            trigger.attach(self.wake)
+
+    def subscribe(self, callback: Callable[[bool], None]):
+        """
+        Register a handler for active/standby transitions.
+
+        Args:
+            callback: Called with True on activation and False on standby
+        """
+        self._subscribers.append(callback)
+
+    def start(self):
+        """Start the triggers."""
+        for trigger in self.triggers:
+            trigger.start()
+        logger.info(f"Presence gate started ({', '.join(t.name for t in self.triggers)})")
+
+    def wait(self) -> bool:
+        """
+        Block while in standby.
+
+        Returns:
+            True when the next frame should go through detection, False when
+            a probe frame should only be passed to observe() (or after close())
+        """
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                if self._update(now):
+                    return True
+
+                if self.frame_triggers and now >= self._next_probe:
+                    self._next_probe = now + 1.0 / self.standby_fps
+                    return False
+
+                timeout = self.max_wake_latency
+                if self.frame_triggers:
+                    timeout = min(timeout, self._next_probe - now)
+                self._condition.wait(timeout)
+            return False
+
+    def observe(self, frame: np.ndarray):
+        """
+        Feed a captured frame to the frame-based triggers.
+
+        Args:
+            frame: Camera frame
+        """
+        for trigger in self.frame_triggers:
+            try:
+                trigger.observe(frame)
+            except Exception as e:
+                logger.error(f"{trigger.name} trigger failed: {e}")
+
+    def wake(self):
+        """Re-check presence now instead of at the next poll."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self):
+        """Stop the triggers and release any waiting caller."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for trigger in self.triggers:
+            trigger.stop()
+
+    def _update(self, now: float) -> bool:
+        """Recompute the active state and announce transitions. Caller holds the lock."""
+        if any(trigger.is_present() for trigger in self.triggers):
+            self._last_present = now
+        active = now - self._last_present <= self.hold_time
+
+        if active != self.active:
+            self.active = active
+            if active:
+                self.activations += 1
+            logger.info("Presence gate: " + ("active" if active else "standby"))
+            for callback in self._subscribers:
+                try:
+                    callback(active)
+                except Exception as e:
+                    logger.error(f"Presence gate subscriber failed: {e}")
+        return active
@@ -0,0 +1,357 @@
+"""
+Detection history stored in SQLite.
+"""
+
+import datetime
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    class TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    x REAL, y REAL, w REAL, h REAL
+);
+CREATE INDEX IF NOT EXISTS idx_detections_ts_class ON detections (ts, class);
+"""
+AUTO_VACUUM_INCREMENTAL = 2  # PRAGMA auto_vacuum value
+
+
+class DetectionHistory:
+    """
+    Append-only detection log with a background writer.
+
+    ``record()`` only puts the event on an in-memory queue. A writer thread
+    commits events in batches (one transaction per ``batch_size`` events
+    or ``flush_interval`` seconds) to a WAL-mode database, and periodically
+    deletes rows beyond the retention limits so the file stays bounded.
+    """
+
+    def __init__(self, path: str = "~/.local/share/pi_detector/history.db",
+                 batch_size: int = 50, flush_interval: float = 1.0,
+                 retention_days: Optional[float] = 30, max_rows: Optional[int] = 200000,
+                 compact_interval: float = 3600.0, max_pending: int = 10000):
+        """
+        Initialize detection history.
+
+        Args:
+            path: Database file
+            batch_size: Events per write transaction
+            flush_interval: Longest time an event waits before being written
+            retention_days: Delete events older than this (None keeps all)
+            max_rows: Keep at most this many events, oldest deleted first (None for no limit)
+            compact_interval: Seconds between retention passes
+            max_pending: Events buffered in memory before new ones are dropped
+        """
+        self.path = Path(path).expanduser()
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.max_rows = max_rows
+        self.compact_interval = compact_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._stop = object()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Plain connection: SQLite ignores auto_vacuum once WAL is enabled or tables exist
+        conn = sqlite3.connect(str(self.path), timeout=10.0)
+        try:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.executescript(SCHEMA)
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+                # Database created without it: a one-off VACUUM converts it
+                logger.info(f"Enabling incremental vacuum on {self.path}")
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+        self._thread = threading.Thread(target=self._writer, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, class_name: str, confidence: float,
+               box: Optional[Iterable[float]] = None,
+               timestamp: Optional[float] = None) -> bool:
+        """
+        Queue a detection for writing without blocking.
+
+        Args:
+            class_name: Detected object class
+            confidence: Detection confidence
+            box: Bounding box as (x, y, w, h), optional
+            timestamp: Unix time of the detection (now if None)
+
+        Returns:
+            True if queued, False if the buffer was full and the event was dropped
+        """
+        x, y, w, h = box if box is not None else (None, None, None, None)
+        event = (timestamp if timestamp is not None else time.time(),
+                 class_name, float(confidence), x, y, w, h)
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until everything queued so far is written.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            True if the writer caught up in time
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Write pending events and stop the writer."""
+        if self._thread.is_alive():
+            self._queue.put(self._stop)
+            self._thread.join(timeout=5.0)
+        logger.info(f"Detection history closed ({self.written} written, {self.dropped} dropped)")
+
+    def count(self, class_name: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, daily: Optional[Tuple[str, str]] = None) -> int:
+        """
+        Count detections.
+
+        Args:
+            class_name: Only this class
+            start: Unix time lower bound (inclusive)
+            end: Unix time upper bound (exclusive)
+            daily: Only events within this ("HH:MM", "HH:MM") local time-of-day window
+
+        Returns:
+            Number of matching detections
+        """
+        where, params = self._filter(class_name, start, end, daily)
+        return self._read(f"SELECT COUNT(*) FROM detections{where}", params)[0][0]
+
+    def summary(self, start: Optional[float] = None, end: Optional[float] = None,
+                daily: Optional[Tuple[str, str]] = None) -> Dict[str, int]:
+        """
+        Count detections per class.
+
+        Args:
+            start: Unix time lower bound (inclusive)
+            end: Unix time upper bound (exclusive)
+            daily: Only events within this ("HH:MM", "HH:MM") local time-of-day window
+
+        Returns:
+            Class name -> count, most frequent first
+        """
+        where, params = self._filter(None, start, end, daily)
+        rows = self._read(
+            f"SELECT class, COUNT(*) AS n FROM detections{where} GROUP BY class ORDER BY n DESC",
+            params
+        )
+        return {name: n for name, n in rows}
+
+    def query(self, class_name: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, daily: Optional[Tuple[str, str]] = None,
+              limit: int = 100) -> List[Dict]:
+        """
+        List detections, newest first.
+
+        Args:
+            class_name: Only this class
+            start: Unix time lower bound (inclusive)
+            end: Unix time upper bound (exclusive)
+            daily: Only events within this ("HH:MM", "HH:MM") local time-of-day window
+            limit: Maximum number of rows
+
+        Returns:
+            List of dicts with timestamp, class, confidence and box
+        """
+        where, params = self._filter(class_name, start, end, daily)
+        rows = self._read(
+            f"SELECT ts, class, confidence, x, y, w, h FROM detections{where} "
+            "ORDER BY ts DESC LIMIT ?",
+            params + [limit]
+        )
+        return [
+            {
+                'timestamp': ts,
+                'class': name,
+                'confidence': confidence,
+                'box': None if x is None else (x, y, w, h)
+            }
+            for ts, name, confidence, x, y, w, h in rows
+        ]
+
+    def compact(self) -> int:
+        """
+        Apply the retention policy and return freed pages to the filesystem.
+
+        Returns:
+            Number of deleted detections
+        """
+        conn = self._connect()
+        try:
+            return self._compact(conn)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the WAL settings."""
+        conn = sqlite3.connect(str(self.path), timeout=10.0)
+        conn.execute("PRAGMA journal_mode = WAL")
+        # NORMAL is durable across application crashes in WAL mode and skips per-commit fsync
+        conn.execute("PRAGMA synchronous = NORMAL")
+        # Truncate the WAL after checkpoints so it cannot grow without bound
+        conn.execute("PRAGMA journal_size_limit = 4194304")
+        return conn
+
+    def _read(self, sql: str, params: list) -> list:
+        """Run a read-only query on a short-lived connection."""
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _filter(class_name, start, end, daily) -> Tuple[str, list]:
+        """Build the WHERE clause shared by the query methods."""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if class_name is not None:
+            clauses.append("class = ?")
+            params.append(class_name)
+        if daily is not None:
+            tod = "strftime('%H:%M', ts, 'unixepoch', 'localtime')"
+            op = "AND" if daily[0] <= daily[1] else "OR"  # Windows may wrap past midnight
+            clauses.append(f"({tod} >= ? {op} {tod} < ?)")
+            params.extend(daily)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _writer(self):
+        """Background thread: batch events into transactions."""
+        conn = self._connect()
+        self._compact(conn)
+        next_compact = time.monotonic() + self.compact_interval
+        stopping = False
+
+        while not stopping:
+            batch, waiters = [], []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None:
+                if item is self._stop:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO detections (ts, class, confidence, x, y, w, h) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            batch
+                        )
+                    self.written += len(batch)
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to write detection history: {e}")
+
+            for waiter in waiters:
+                waiter.set()
+
+            if time.monotonic() >= next_compact:
+                self._compact(conn)
+                next_compact = time.monotonic() + self.compact_interval
+
+        conn.close()
+
+    def _compact(self, conn: sqlite3.Connection) -> int:
+        """Delete events beyond the retention limits."""
+        deleted = 0
+        try:
+            with conn:
+                if self.retention_days is not None:
+                    cutoff = time.time() - self.retention_days * 86400
+                    deleted += conn.execute("DELETE FROM detections WHERE ts < ?", (cutoff,)).rowcount
+                if self.max_rows is not None:
+                    deleted += conn.execute(
+                        "DELETE FROM detections WHERE id <= "
+                        "(SELECT id FROM detections ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                        (self.max_rows,)
+                    ).rowcount
+            if deleted:
+                # execute() steps the pragma once, freeing a single page; executescript() runs it to completion
+                conn.executescript("PRAGMA incremental_vacuum;")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                logger.info(f"Detection history compacted ({deleted} old events removed)")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to compact detection history: {e}")
+        return deleted
+
+
+def parse_time(value: str, now: Optional[datetime.datetime] = None) -> float:
+    """
+    Parse a time argument for history queries.
+
+    Accepts an ISO date/time ("2024-05-01", "2024-05-01T02:00"), a time of
+    day ("02:00", the most recent past occurrence) or an age ("30m", "2h",
+    "7d" ago).
+
+    Args:
+        value: Time argument
+        now: Reference time (current local time if None)
+
+    Returns:
+        Unix time
+
+    Raises:
+        ValueError: If the value is not in a supported format
+    """
+    now = now or datetime.datetime.now()
+
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value)
+    if match:
+        seconds = float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+        return (now - datetime.timedelta(seconds=seconds)).timestamp()
+
+    if re.fullmatch(r"\d{1,2}:\d{2}", value):
+        clock = datetime.datetime.strptime(value, "%H:%M").time()
+        moment = datetime.datetime.combine(now.date(), clock)
+        if moment > now:
+            moment -= datetime.timedelta(days=1)
+        return moment.timestamp()
+
+    return datetime.datetime.fromisoformat(value).timestamp()
@@ -0,0 +1,225 @@
+"""
+Logging pipeline: queued, rotated and rate-limited log output.
+"""
+
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Hashable, List, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most ``burst`` records per message key through every ``interval`` seconds.
+
+    The key is the call site (logger, file and line), so messages built
+    with f-strings still group together; pass ``extra={'rate_key': ...}``
+    to choose a key explicitly, or ``extra={'rate_limit': False}`` to
+    exempt a record. The number of suppressed records is reported once
+    the key's window ends, as "Suppressed N similar messages".
+    """
+
+    def __init__(self, interval: float = 60.0, burst: int = 5):
+        """
+        Initialize rate limit filter.
+
+        Args:
+            interval: Window length in seconds
+            burst: Records per key allowed in each window
+        """
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.suppressed_total = 0
+        self._windows: Dict[Hashable, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'rate_limit', True):
+            return True
+
+        key = getattr(record, 'rate_key', None) or (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                # [window start, records passed, records suppressed, last suppressed record]
+                self._windows[key] = [now, 1, 0, None]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} (suppressed {suppressed} similar messages)"
+                    record.args = None
+                return True
+
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+
+            window[2] += 1
+            window[3] = record
+            self.suppressed_total += 1
+            return False
+
+    def summaries(self, flush: bool = False) -> List[logging.LogRecord]:
+        """
+        Close finished windows that suppressed records.
+
+        Args:
+            flush: Close every window, finished or not (on shutdown)
+
+        Returns:
+            One summary record per closed window that suppressed records
+        """
+        now = time.monotonic()
+        summaries = []
+        with self._lock:
+            for key, window in list(self._windows.items()):
+                if not flush and now - window[0] < self.interval:
+                    continue
+                del self._windows[key]
+                if window[2]:
+                    summaries.append(self._summary(window[3], window[2]))
+        return summaries
+
+    @staticmethod
+    def _summary(record: logging.LogRecord, count: int) -> logging.LogRecord:
+        summary = logging.makeLogRecord(record.__dict__)
+        summary.msg = f"Suppressed {count} similar messages: {record.getMessage()}"
+        summary.args = None
+        summary.exc_info = summary.exc_text = summary.stack_info = None
+        summary.created = time.time()
+        summary.rate_limit = False
+        return summary
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """
+    Root logging through a queue, so log I/O never runs on the caller's thread.
+
+    Callers only format and enqueue a record (after the rate limit filter
+    has dropped floods). A listener thread writes to the console and a
+    size-rotated log file.
+    """
+
+    def __init__(self, level: str = "INFO", file: Optional[str] = "pi_detector.log",
+                 max_bytes: int = 1048576, backup_count: int = 3,
+                 rate_interval: float = 60.0, rate_burst: int = 5,
+                 queue_size: int = 10000):
+        """
+        Initialize logging pipeline.
+
+        Args:
+            level: Root log level name
+            file: Log file path (None logs to the console only)
+            max_bytes: Rotate the log file at this size
+            backup_count: Rotated files to keep
+            rate_interval: Rate limit window in seconds (0 disables rate limiting)
+            rate_burst: Records per call site allowed in each window
+            queue_size: Records buffered for the listener before new ones are dropped
+        """
+        self.level = level
+        self.rate_interval = rate_interval
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        self.handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+        if file:
+            self.handlers.append(logging.handlers.RotatingFileHandler(
+                file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            ))
+        for handler in self.handlers:
+            handler.setFormatter(formatter)
+
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        self.rate_filter = None
+        if rate_interval > 0:
+            self.rate_filter = RateLimitFilter(rate_interval, rate_burst)
+            self.queue_handler.addFilter(self.rate_filter)
+
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self._stop = threading.Event()
+        self._summary_thread = None
+
+    def start(self) -> "LogPipeline":
+        """
+        Replace the root logger's handlers with the queue and start writing.
+
+        Returns:
+            This pipeline
+        """
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.level.upper())
+
+        self.listener.start()
+        if self.rate_filter:
+            self._summary_thread = threading.Thread(
+                target=self._report_suppressed, name="log-summaries", daemon=True
+            )
+            self._summary_thread.start()
+        return self
+
+    def stop(self):
+        """Write out queued records and pending summaries, then detach from the root logger."""
+        self._stop.set()
+        if self._summary_thread:
+            self._summary_thread.join(timeout=2.0)
+        if self.rate_filter:
+            for summary in self.rate_filter.summaries(flush=True):
+                self.queue_handler.enqueue(summary)
+
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+    def _report_suppressed(self):
+        """Background thread: emit summaries for floods that have stopped."""
+        while not self._stop.wait(self.rate_interval / 2):
+            for summary in self.rate_filter.summaries():
+                self.queue_handler.enqueue(summary)
+
+
+def setup_logging(config) -> LogPipeline:
+    """
+    Start the logging pipeline from the ``logging`` configuration section.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        Started pipeline; call stop() on exit to flush it
+    """
+    return LogPipeline(
+        level=config.get("logging.level", "INFO"),
+        file=config.get("logging.file", "pi_detector.log"),
+        max_bytes=config.get("logging.max_bytes", 1048576),
+        backup_count=config.get("logging.backup_count", 3),
+        rate_interval=config.get("logging.rate_limit.interval", 60.0),
+        rate_burst=config.get("logging.rate_limit.burst", 5),
+        queue_size=config.get("logging.queue_size", 10000)
+    ).start()
@@ -2,27 +2,33 @@
 Main application entry point for the Pi Detector system.
 """
 
+import json
 import sys
 import time
 import logging
+from collections import Counter
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from .config import Config
 from .camera import CameraHandler
-from .detector import ObjectDetector
+from .detector import LABELS, ObjectDetector
+from .evaluate import evaluate, format_report
 from .audio import AudioOutputSystem
+from .backends import StubBackend, SyntheticBackend
+from .framebus import ProcessCamera
+from .announcements import PRIORITY_HIGH, PRIORITY_NORMAL
+from .gating import MotionTrigger, PresenceGate, ScheduleTrigger, UltrasonicTrigger
+from .history import DetectionHistory, parse_time
+from .logging_setup import setup_logging
+from .multicam import CameraSource, FairScheduler
+from .preview import PreviewServer
+from .recorder import ClipRecorder
+from .ultrasonic import FakeGPIO, PresenceEstimator, UltrasonicSensor
 
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('pi_detector.log')
-    ]
-)
+NUMBER_WORDS = ["zero", "one", "two", "three", "four", "five",
+                "six", "seven", "eight", "nine", "ten"]
+PLURALS = {"person": "people", "sheep": "sheep"}
 
 logger = logging.getLogger(__name__)
 
@@ -39,8 +45,13 @@ class PiDetectorApp:
         """
         self.config = Config(config_path)
         self.camera = None
+        self.cameras = []
+        self.scheduler = None
         self.detector = None
         self.audio = None
+        self.gate = None
+        self.history = None
+        self.preview = None
         self.running = False
         
     def initialize(self):
@@ -48,26 +59,63 @@ class PiDetectorApp:
         logger.info("Initializing Pi Detector...")
         
         try:
-            # Initialize camera
+            # Initialize cameras
             logger.info("Initializing camera...")
-            self.camera = CameraHandler(
-                resolution=tuple(self.config.get("camera.resolution", [640, 480])),
-                framerate=self.config.get("camera.framerate", 30)
-            )
+            self.cameras = self._create_cameras()
+            self.camera = self.cameras[0].camera
+            self.scheduler = FairScheduler(self.cameras)
             
-            # Initialize detector
+            # Initialize detector (one model shared by all cameras)
             logger.info("Initializing object detector...")
-            self.detector = ObjectDetector(
-                model_path=self.config.get("detection.model_path", "models/mobilenet_ssd_v2.tflite"),
-                confidence_threshold=self.config.get("detection.confidence_threshold", 0.5)
-            )
+            self.detector = self._create_detector()
             
             # Initialize audio system
             if self.config.get("audio.enabled", True):
                 logger.info("Initializing audio system...")
                 self.audio = AudioOutputSystem(
-                    volume=self.config.get("audio.volume", 80)
+                    volume=self.config.get("audio.volume", 80),
+                    rate=self.config.get("audio.rate", 150),
+                    phrase_cache_dir=(
+                        self.config.get("audio.phrase_cache.dir")
+                        if self.config.get("audio.phrase_cache.enabled", True) else None
+                    ),
+                    phrase_cache_entries=self.config.get("audio.phrase_cache.max_memory_entries", 32),
+                    phrase_cache_disk_entries=self.config.get("audio.phrase_cache.max_disk_entries", 256),
+                    queue_max_depth=self.config.get("audio.queue_max_depth", 5),
+                    max_message_age=self.config.get("audio.max_message_age", 5.0),
+                    out_of_process=self.config.get("audio.out_of_process", False),
+                    health_interval=self.config.get("audio.server_health_interval", 5.0),
+                    sounds=self.config.get("audio.sounds", {}),
+                    sound_channels=self.config.get("audio.sound_channels", 8)
                 )
+                
+                # Render the fixed announcement phrases before the first detection
+                if self.config.get("audio.phrase_cache.preload", True):
+                    self.audio.preload_phrases(
+                        self._format_detection_message(class_name, 1.0)
+                        for class_name in LABELS.values()
+                    )
+            
+            # Initialize presence gating
+            if self.config.get("gating.enabled", False):
+                logger.info("Initializing presence gate...")
+                self.gate = self._create_gate()
+            
+            # Initialize detection history
+            if self.config.get("history.enabled", False):
+                logger.info("Initializing detection history...")
+                self.history = create_history(self.config)
+            
+            # Initialize event recording
+            if self.config.get("recording.enabled", False):
+                logger.info("Initializing clip recorders...")
+                for source in self.cameras:
+                    source.recorder = self._create_recorder(source.name)
+            
+            # Initialize preview server
+            if self.config.get("preview.enabled", False):
+                logger.info("Initializing preview server...")
+                self.preview = self._create_preview()
             
             logger.info("Initialization complete!")
             return True
@@ -76,6 +124,158 @@ class PiDetectorApp:
             logger.error(f"Initialization failed: {e}")
             return False
     
+    def _create_cameras(self) -> List[CameraSource]:
+        """
+        Open the cameras listed in ``cameras``, or the single ``camera``.
+        
+        Entries in ``cameras`` fall back to the ``camera`` settings for any
+        key they leave out. A camera that fails to open is skipped.
+        
+        Returns:
+            Opened cameras
+            
+        Raises:
+            RuntimeError: If no camera could be opened
+        """
+        definitions = self.config.get("cameras") or [{}]
+        sources = []
+        for index, definition in enumerate(definitions):
+            name = definition.get("name", f"camera{index}")
+            camera_kwargs = dict(
+                resolution=tuple(definition.get(
+                    "resolution", self.config.get("camera.resolution", [640, 480]))),
+                framerate=definition.get("framerate", self.config.get("camera.framerate", 30)),
+                device=definition.get("device", self.config.get("camera.device"))
+            )
+            try:
+                if definition.get("capture_process", self.config.get("camera.capture_process", False)):
+                    # Capture in a child process, frames arrive through shared memory
+                    camera = ProcessCamera(
+                        slots=definition.get("bus_slots", self.config.get("camera.bus_slots", 4)),
+                        zero_copy=definition.get("zero_copy", self.config.get("camera.zero_copy", False)),
+                        **camera_kwargs
+                    )
+                else:
+                    camera = CameraHandler(**camera_kwargs)
+            except Exception as e:
+                if len(definitions) == 1:
+                    raise
+                logger.error(f"Camera {name} unavailable: {e}")
+                continue
+            sources.append(CameraSource(
+                name, camera, definition.get("max_fps", self.config.get("camera.max_fps"))
+            ))
+        
+        if not sources:
+            raise RuntimeError("No camera could be opened")
+        return sources
+    
+    def _create_detector(self) -> ObjectDetector:
+        """
+        Create the object detector, with a screening stage if cascade mode is enabled.
+        
+        Returns:
+            Configured detector
+        """
+        return create_detector(self.config)
+    
+    def _create_gate(self) -> Optional[PresenceGate]:
+        """
+        Create the presence gate from the configured triggers.
+        
+        Returns:
+            Started gate, or None if no trigger could be set up
+        """
+        triggers = []
+        for name in self.config.get("gating.triggers", ["ultrasonic"]):
+            if name == "ultrasonic":
+                simulate = self.config.get("gating.ultrasonic.simulate")
+                sensor = UltrasonicSensor(
+                    trig_pin=self.config.get("gating.ultrasonic.trig_pin", 23),
+                    echo_pin=self.config.get("gating.ultrasonic.echo_pin", 24),
+                    gpio=FakeGPIO.load(simulate) if simulate else None
+                )
+                if not sensor.setup():
+                    logger.warning("Ultrasonic trigger unavailable")
+                    continue
+                triggers.append(UltrasonicTrigger(PresenceEstimator(
+                    sensor,
+                    enter_distance=self.config.get("gating.ultrasonic.enter_distance", 1.0),
+                    exit_distance=self.config.get("gating.ultrasonic.exit_distance", 1.2)
+                )))
+            elif name == "motion":
+                triggers.append(MotionTrigger(
+                    threshold=self.config.get("gating.motion.threshold", 25),
+                    min_area=self.config.get("gating.motion.min_area", 0.01)
+                ))
+            elif name == "schedule":
+                triggers.append(ScheduleTrigger(self.config.get("gating.schedule.windows", [])))
+            else:
+                logger.warning(f"Unknown gating trigger: {name}")
+        
+        if not triggers:
+            logger.warning("No presence triggers available. Running ungated.")
+            return None
+        
+        gate = PresenceGate(
+            triggers,
+            hold_time=self.config.get("gating.hold_time", 10.0),
+            standby_fps=self.config.get("gating.standby_fps", 1.0),
+            max_wake_latency=self.config.get("gating.max_wake_latency", 0.5)
+        )
+        
+        # Slow the sensors and capture threads down in standby and restore them on wake-up
+        def set_framerates(active: bool):
+            for source in self.cameras:
+                source.camera.set_framerate(
+                    source.camera.framerate if active else gate.standby_fps
+                )
+                source.set_capture_fps(None if active else gate.standby_fps)
+        gate.subscribe(set_framerates)
+        gate.start()
+        # The gate starts in standby and only notifies on changes, so apply the standby rate now
+        set_framerates(gate.active)
+        return gate
+    
+    def _create_recorder(self, camera_name: str) -> ClipRecorder:
+        """
+        Create a clip recorder for one camera.
+        
+        Args:
+            camera_name: Camera name used in clip file names
+            
+        Returns:
+            Running recorder
+        """
+        return ClipRecorder(
+            directory=self.config.get("recording.directory", "recordings"),
+            name=camera_name,
+            pre_seconds=self.config.get("recording.pre_seconds", 5.0),
+            post_seconds=self.config.get("recording.post_seconds", 10.0),
+            max_clip_seconds=self.config.get("recording.max_clip_seconds", 60.0),
+            fps=self.config.get("recording.fps", 10.0),
+            quality=self.config.get("recording.quality", 80),
+            max_memory_mb=self.config.get("recording.max_memory_mb", 32.0),
+            max_disk_mb=self.config.get("recording.max_disk_mb", 1024.0)
+        )
+    
+    def _create_preview(self) -> Optional[PreviewServer]:
+        """
+        Start the MJPEG preview server with a stream per camera.
+        
+        Returns:
+            Running server, or None if it could not start
+        """
+        preview = PreviewServer(
+            host=self.config.get("preview.host", "127.0.0.1"),
+            port=self.config.get("preview.port", 8080),
+            max_fps=self.config.get("preview.max_fps", 10.0),
+            quality=self.config.get("preview.quality", 80)
+        )
+        for source in self.cameras:
+            preview.add_channel(source.name)
+        return preview if preview.start() else None
+    
     def run(self):
         """Run the main detection loop."""
         if not self.initialize():
@@ -84,41 +284,78 @@ class PiDetectorApp:
         
         self.running = True
         logger.info("Starting detection loop...")
+        self.scheduler.start()
         
         try:
             frame_count = 0
-            last_detection = {}
             detection_cooldown = 3  # seconds between announcements
             
             while self.running:
-                # Capture frame
-                frame = self.camera.capture_frame()
-                if frame is None:
+                # Sleep through standby; frame triggers get occasional probe frames
+                active = self.gate.wait() if self.gate else True
+                if not self.running:
+                    break
+                
+                # Newest frame of the camera whose turn it is
+                item = self.scheduler.next(timeout=1.0)
+                if item is None:
                     logger.warning("Failed to capture frame")
                     continue
+                source, frame = item
+                
+                if self.gate:
+                    self.gate.observe(frame)
+                    if not active:
+                        continue
                 
                 # Run detection
                 detections = self.detector.detect(frame)
                 
-                # Process detections
+                # A zero-copy frame whose bus slot was reused meanwhile gave torn results
+                if not source.frame_valid():
+                    logger.debug(f"Frame from {source.name} was overwritten during detection")
+                    continue
+                
+                # Only referenced here; drawn and encoded by the preview thread if watched
+                if self.preview:
+                    self.preview.submit(frame, detections, source.name)
+                
+                # Process detections (cooldowns are tracked per camera)
                 current_time = time.time()
+                counts = Counter(detection['class'] for detection in detections)
+                last_detection = source.last_detection
+                due = {}
                 for detection in detections:
                     class_name = detection['class']
                     confidence = detection['confidence']
                     
                     # Check if we should announce this detection
-                    if class_name not in last_detection or \
+                    if class_name in due or class_name not in last_detection or \
                        (current_time - last_detection[class_name]) > detection_cooldown:
                         
-                        logger.info(f"Detected: {class_name} ({confidence:.2f})")
-                        
-                        # Announce detection via audio
-                        if self.audio:
-                            message = self._format_detection_message(class_name, confidence)
-                            self.audio.speak(message)
-                        
+                        # Already limited by the announcement cooldown; every sighting stays in the log
+                        logger.info(f"Detected: {class_name} ({confidence:.2f}) on {source.name}",
+                                    extra={'rate_limit': False})
+                        due[class_name] = counts[class_name]
                         last_detection[class_name] = current_time
                 
+                # Save a clip around new sightings (written in the background)
+                if due and source.recorder:
+                    source.recorder.trigger(current_time)
+                
+                # Log new sightings (queued; written by the history thread)
+                if due and self.history:
+                    for detection in detections:
+                        if detection['class'] in due:
+                            ymin, xmin, ymax, xmax = detection['bbox']
+                            self.history.record(detection['class'], detection['confidence'],
+                                                (xmin, ymin, xmax - xmin, ymax - ymin),
+                                                current_time)
+                
+                # Announce the whole frame as one utterance
+                if due and self.audio:
+                    self._announce(due, source.name if len(self.cameras) > 1 else None)
+                
                 frame_count += 1
                 
                 # Optional: Add a small delay to prevent CPU overload
@@ -131,6 +368,67 @@ class PiDetectorApp:
         finally:
             self.cleanup()
     
+    def _announce(self, counts: Dict[str, int], camera_name: Optional[str] = None):
+        """
+        Announce one frame's new detections with alert sounds, speech, or both.
+        
+        Args:
+            counts: Number of detections per class, in announcement order
+            camera_name: Camera to name at the start of the message (multi-camera setups)
+        """
+        replace = self.config.get("audio.sound_mode", "replace") == "replace"
+        spoken = {}
+        for class_name, count in counts.items():
+            if self.audio.has_alert_sound(class_name) and self.audio.play_alert(class_name):
+                # "replace" skips speech for classes with a sound; "both" speaks as well
+                if replace:
+                    continue
+            spoken[class_name] = count
+        
+        if not spoken:
+            return
+        
+        message = self._format_summary_message(spoken)
+        if camera_name:
+            message = f"{camera_name}: {message}"
+        priority = PRIORITY_HIGH if "person" in spoken else PRIORITY_NORMAL
+        self.audio.speak(message, priority)
+    
+    def _format_summary_message(self, counts: Dict[str, int]) -> str:
+        """
+        Summarise a frame's detections in one sentence, e.g. "Two dogs and a person".
+        
+        A single object uses the regular detection message so it matches
+        the preloaded phrases.
+        
+        Args:
+            counts: Number of detections per class
+            
+        Returns:
+            Formatted message string
+        """
+        if len(counts) == 1:
+            class_name, count = next(iter(counts.items()))
+            if count == 1:
+                return self._format_detection_message(class_name, 1.0)
+        
+        # Most numerous first; ties keep detection order
+        ordered = sorted(counts.items(), key=lambda item: -item[1])
+        parts = []
+        for class_name, count in ordered:
+            if count == 1:
+                article = "an" if class_name[0] in "aeiou" else "a"
+                parts.append(f"{article} {class_name}")
+            else:
+                number = NUMBER_WORDS[count] if count < len(NUMBER_WORDS) else str(count)
+                parts.append(f"{number} {PLURALS.get(class_name, class_name + 's')}")
+        
+        if len(parts) == 1:
+            message = f"{parts[0]} detected"
+        else:
+            message = ", ".join(parts[:-1]) + " and " + parts[-1]
+        return message[0].upper() + message[1:]
+    
     def _format_detection_message(self, class_name: str, confidence: float) -> str:
         """
         Format detection message for audio output.
@@ -155,15 +453,200 @@ class PiDetectorApp:
         logger.info("Cleaning up...")
         self.running = False
         
-        if self.camera:
-            self.camera.close()
+        if self.gate:
+            self.gate.close()
+        
+        if self.preview:
+            self.preview.close()
+        
+        if self.scheduler:
+            logger.info(f"Camera stats: {self.scheduler.stats()}")
+            self.scheduler.close()
+        
+        for source in self.cameras:
+            if source.recorder:
+                source.recorder.close()
+            source.camera.close()
+        
+        if self.detector:
+            self.detector.close()
         
         if self.audio:
+            logger.info(f"Announcement queue stats: {self.audio.queue_stats()}")
             self.audio.close()
         
+        if self.history:
+            self.history.close()
+        
         logger.info("Cleanup complete. Goodbye!")
 
 
+def create_detector(config: Config) -> ObjectDetector:
+    """
+    Create the object detector, with a screening stage if cascade mode is enabled.
+    
+    Args:
+        config: Application configuration
+        
+    Returns:
+        Configured detector
+    """
+    backend_options = dict(config.get("detection.backend_options", {}))
+    backend_options.setdefault("synthetic", config.get("detection.synthetic", {}))
+    
+    backend_kwargs = dict(
+        backend=config.get("detection.backend", "auto"),
+        benchmark_backends=config.get("detection.benchmark_backends", False),
+        backend_options=backend_options,
+        cache_dir=config.get("detection.cache_dir"),
+        num_threads=config.get("detection.num_threads"),
+        delegates=config.get("detection.delegates", []),
+        auto_tune=config.get("detection.auto_tune", False)
+    )
+    model_path = config.get("detection.model_path", "models/mobilenet_ssd_v2.tflite")
+    
+    screen_detector = None
+    if config.get("detection.cascade.enabled", False):
+        logger.info("Initializing cascade screening detector...")
+        screen_model_path = config.get("detection.cascade.screen_model_path") or model_path
+        # The synthetic fallback would invent candidates, so a screen stage needs a real model
+        simulated = backend_kwargs["backend"] in (StubBackend.name, SyntheticBackend.name)
+        if not simulated and not Path(screen_model_path).exists():
+            logger.error(f"Cascade screen model not found at {screen_model_path}. "
+                         "Cascade mode disabled.")
+        else:
+            screen_detector = ObjectDetector(
+                model_path=screen_model_path,
+                confidence_threshold=config.get("detection.cascade.screen_threshold", 0.3),
+                input_size=config.get("detection.cascade.screen_input_size"),
+                **backend_kwargs
+            )
+            if screen_detector.backend is None:
+                logger.error(f"Cascade screen model {screen_model_path} could not be loaded. "
+                             "Cascade mode disabled.")
+                screen_detector = None
+    
+    return ObjectDetector(
+        model_path=model_path,
+        confidence_threshold=config.get("detection.confidence_threshold", 0.5),
+        screen_detector=screen_detector,
+        crop_margin=config.get("detection.cascade.crop_margin", 0.15),
+        min_crop_fraction=config.get("detection.cascade.min_crop_fraction", 0.25),
+        output_format=config.get("detection.output_format", "postprocessed"),
+        decoder_options=config.get("detection.decoder", {}),
+        **backend_kwargs
+    )
+
+
+def create_history(config: Config) -> DetectionHistory:
+    """
+    Create the detection history store from the configuration.
+    
+    Args:
+        config: Application configuration
+        
+    Returns:
+        Detection history
+    """
+    return DetectionHistory(
+        path=config.get("history.path", "~/.local/share/pi_detector/history.db"),
+        batch_size=config.get("history.batch_size", 50),
+        flush_interval=config.get("history.flush_interval", 1.0),
+        retention_days=config.get("history.retention_days", 30),
+        max_rows=config.get("history.max_rows", 200000)
+    )
+
+
+def history_command(args) -> int:
+    """
+    Run a `pi-detector history` query and print the result.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Process exit code
+    """
+    try:
+        start = parse_time(args.start) if args.start else None
+        end = parse_time(args.end) if args.end else None
+        daily = tuple(args.daily.split("-")) if args.daily else None
+        if daily is not None and len(daily) != 2:
+            raise ValueError(f"Invalid --daily window: {args.daily}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    
+    history = create_history(Config(args.config))
+    try:
+        if args.action == "count":
+            print(history.count(args.class_name, start, end, daily))
+        elif args.action == "summary":
+            for class_name, count in history.summary(start, end, daily).items():
+                print(f"{class_name}\t{count}")
+        elif args.action == "list":
+            for event in history.query(args.class_name, start, end, daily, limit=args.limit):
+                when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event['timestamp']))
+                print(f"{when}\t{event['class']}\t{event['confidence']:.2f}")
+        elif args.action == "compact":
+            print(f"Removed {history.compact()} events")
+    finally:
+        history.close()
+    return 0
+
+
+def eval_command(args) -> int:
+    """
+    Run `pi-detector eval` over images or a video and print the report.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Process exit code
+    """
+    if not Path(args.source).exists():
+        print(f"Error: {args.source} not found", file=sys.stderr)
+        return 2
+    
+    config = Config(args.config)
+    if args.backend is not None:
+        config.set("detection.backend", args.backend)
+    if args.threshold is not None:
+        config.set("detection.confidence_threshold", args.threshold)
+    
+    # Without a model the detector falls back to random synthetic detections,
+    # which would be reported as if they were the model's accuracy
+    simulated = config.get("detection.backend", "auto") in (StubBackend.name, SyntheticBackend.name)
+    model_path = config.get("detection.model_path", "models/mobilenet_ssd_v2.tflite")
+    if not simulated and not Path(model_path).exists():
+        print(f"Error: model {model_path} not found "
+              "(use --backend synthetic to evaluate the simulated detector)", file=sys.stderr)
+        return 2
+    
+    detector = create_detector(config)
+    if detector.backend is None:
+        print(f"Error: model {model_path} could not be loaded", file=sys.stderr)
+        detector.close()
+        return 2
+    try:
+        report = evaluate(
+            detector, args.source,
+            annotations=args.annotations,
+            workers=args.workers,
+            reduce=args.reduce if args.reduce == "auto" else int(args.reduce),
+            limit=args.limit
+        )
+    finally:
+        detector.close()
+    
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
 def main():
     """Main entry point."""
     import argparse
@@ -176,11 +659,64 @@ def main():
         help="Path to configuration file"
     )
     
+    subparsers = parser.add_subparsers(dest="command")
+    history_parser = subparsers.add_parser(
+        "history",
+        help="Query the detection history",
+        description="Query the detection history, e.g. "
+                    "'pi-detector history count --class dog --start 7d --daily 02:00-04:00'"
+    )
+    history_parser.add_argument("action", choices=["count", "list", "summary", "compact"])
+    history_parser.add_argument("--class", dest="class_name", help="Only this object class")
+    history_parser.add_argument(
+        "--start",
+        help="Start time: ISO date/time, HH:MM (most recent), or age such as 2h or 7d"
+    )
+    history_parser.add_argument("--end", help="End time, same formats as --start")
+    history_parser.add_argument("--daily", help="Time-of-day window HH:MM-HH:MM (may cross midnight)")
+    history_parser.add_argument("--limit", type=int, default=50, help="Rows shown by 'list'")
+    
+    eval_parser = subparsers.add_parser(
+        "eval",
+        help="Measure accuracy and throughput offline",
+        description="Run the configured detector over an image directory or a video, e.g. "
+                    "'pi-detector eval images/ --annotations instances.json'"
+    )
+    eval_parser.add_argument("source", help="Image directory or video file")
+    eval_parser.add_argument(
+        "--annotations",
+        help="COCO-format ground truth for per-class AP (video: image id = frame index)"
+    )
+    eval_parser.add_argument("--workers", type=int, help="Image decode processes (default: CPUs - 1)")
+    eval_parser.add_argument(
+        "--reduce", choices=["auto", "1", "2", "4", "8"], default="auto",
+        help="Decode images at 1/N size; 'auto' uses the largest N that keeps the model input size"
+    )
+    eval_parser.add_argument("--limit", type=int, help="Evaluate at most this many images or frames")
+    eval_parser.add_argument("--threshold", type=float, help="Override the confidence threshold")
+    eval_parser.add_argument(
+        "--backend",
+        help="Override the inference backend; 'stub' or 'synthetic' evaluate without a model"
+    )
+    eval_parser.add_argument("--json", help="Also write the report to this JSON file")
+    
     args = parser.parse_args()
     
+    if args.command == "history":
+        sys.exit(history_command(args))
+    if args.command == "eval":
+        logging.basicConfig(level=logging.WARNING)
+        sys.exit(eval_command(args))
+    
+    # Log through a background writer so file I/O stays off the detection loop
+    log_pipeline = setup_logging(Config(args.config))
+    
     # Create and run application
-    app = PiDetectorApp(config_path=args.config)
-    app.run()
+    try:
+        app = PiDetectorApp(config_path=args.config)
+        app.run()
+    finally:
+        log_pipeline.stop()
 
 
 if __name__ == "__main__":
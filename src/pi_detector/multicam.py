@@ -0,0 +1,229 @@
+"""
+Multiple cameras feeding one shared detector.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .camera import CameraHandler
+
+logger = logging.getLogger(__name__)
+
+
+class CameraSource:
+    """
+    One camera with its own capture thread and detection state.
+
+    The capture thread keeps only the newest frame, so a camera that is
+    waiting for the shared detector never builds up a backlog.
+    """
+
+    def __init__(self, name: str, camera: CameraHandler, max_fps: Optional[float] = None):
+        """
+        Initialize camera source.
+
+        Args:
+            name: Camera name used in logs and announcements
+            camera: Opened camera
+            max_fps: Most frames per second this camera may send to the detector
+                (None for no cap)
+        """
+        self.name = name
+        self.camera = camera
+        self.max_fps = max_fps
+        self.last_detection: Dict[str, float] = {}
+        self.frames_processed = 0
+        self.frames_overwritten = 0
+        self.capture_failures = 0
+        self.last_served = float("-inf")
+        self.recorder = None
+        self.capture_fps: Optional[float] = None
+        self._latest: Tuple[int, Optional[np.ndarray], Optional[int]] = (0, None, None)
+        self._served_id = 0
+        self._served_number: Optional[int] = None
+        self._on_frame = None
+        self._running = False
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, on_frame):
+        """
+        Start the capture thread.
+
+        Args:
+            on_frame: Called after each new frame
+        """
+        self._on_frame = on_frame
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture thread (the camera stays open)."""
+        self._running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def set_capture_fps(self, fps: Optional[float]):
+        """
+        Limit how often the capture thread reads the camera.
+
+        Used in standby, where only the occasional probe frame is needed, so
+        capture and colour conversion stop costing CPU. Takes effect at once,
+        even while the thread is sleeping.
+
+        Args:
+            fps: Most camera reads per second (None for as fast as the camera delivers)
+        """
+        self.capture_fps = fps
+        self._wake.set()
+
+    def has_new_frame(self) -> bool:
+        """Whether a frame has arrived since the last one was processed."""
+        return self._latest[0] > self._served_id
+
+    def next_due(self) -> float:
+        """Earliest monotonic time the FPS cap allows another frame."""
+        if not self.max_fps:
+            return float("-inf")
+        return self.last_served + 1.0 / self.max_fps
+
+    def take(self, now: float) -> Optional[np.ndarray]:
+        """Hand the newest frame to the detector and mark it served."""
+        frame_id, frame, number = self._latest
+        self._served_id = frame_id
+        self._served_number = number
+        self.last_served = now
+        self.frames_processed += 1
+        return frame
+
+    def frame_valid(self) -> bool:
+        """
+        Check that the last frame handed out was not overwritten while in use.
+
+        Zero-copy frames are views of a frame bus slot that the capture
+        process reuses; copied frames are always valid.
+
+        Returns:
+            True if results computed from the frame are sound
+        """
+        if self._served_number is None or self.camera.bus.valid(self._served_number):
+            return True
+        self.frames_overwritten += 1
+        return False
+
+    def _run(self):
+        """Background thread: keep the newest frame."""
+        frame_id = 0
+        while self._running:
+            started = time.monotonic()
+            frame = self.camera.capture_frame()
+            if frame is None:
+                self.capture_failures += 1
+                time.sleep(0.1)
+                continue
+            frame_id += 1
+            # Bus frame number of a zero-copy view, to check the slot after detection
+            number = self.camera.last_frame if getattr(self.camera, "zero_copy", False) else None
+            # One reference assignment, so readers see a matching id and frame
+            self._latest = (frame_id, frame, number)
+            self._on_frame()
+            # Every captured frame, not only the ones the detector gets, feeds the pre-roll
+            if self.recorder:
+                self.recorder.add_frame(frame)
+
+            # Clear before reading the limit, so a change made meanwhile still wakes the wait
+            self._wake.clear()
+            fps = self.capture_fps
+            if fps:
+                self._wake.wait(max(0.0, started + 1.0 / fps - time.monotonic()))
+
+
+class FairScheduler:
+    """
+    Picks which camera's frame the shared detector processes next.
+
+    Among cameras with an unprocessed frame whose FPS cap allows another
+    one, the camera served least recently goes first. With no caps this is
+    round-robin over the cameras that have frames; a capped camera waits
+    for its deadline without holding up the others.
+    """
+
+    def __init__(self, sources: List[CameraSource]):
+        """
+        Initialize scheduler.
+
+        Args:
+            sources: Cameras to schedule
+        """
+        self.sources = sources
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def start(self):
+        """Start the capture threads."""
+        for source in self.sources:
+            source.start(self._frame_ready)
+        logger.info(f"Scheduling {len(self.sources)} camera(s): "
+                    + ", ".join(source.name for source in self.sources))
+
+    def next(self, timeout: float = 1.0) -> Optional[Tuple[CameraSource, np.ndarray]]:
+        """
+        Wait for the next frame to process.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            (camera, frame), or None on timeout or after close()
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                pending = [source for source in self.sources if source.has_new_frame()]
+                ready = [source for source in pending if source.next_due() <= now]
+                if ready:
+                    source = min(ready, key=lambda s: s.last_served)
+                    return source, source.take(now)
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    return None
+                # Sleep until a new frame arrives or a capped camera becomes due
+                self._condition.wait(min([remaining] + [s.next_due() - now for s in pending]))
+            return None
+
+    def close(self):
+        """Release any waiting caller and stop the capture threads."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for source in self.sources:
+            source.stop()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get per-camera counters.
+
+        Returns:
+            Camera name -> frames processed, frames overwritten during detection
+            and capture failures
+        """
+        return {
+            source.name: {
+                'frames_processed': source.frames_processed,
+                'frames_overwritten': source.frames_overwritten,
+                'capture_failures': source.capture_failures
+            }
+            for source in self.sources
+        }
+
+    def _frame_ready(self):
+        with self._condition:
+            self._condition.notify_all()
@@ -0,0 +1,221 @@
+"""
+Detection overlay drawing for preview frames.
+"""
+
+import logging
+import re
+from collections import OrderedDict
+from typing import Generic, Optional, Sequence, Tuple, TypeVar
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Color = Tuple[int, int, int]
+
+# Labels are built from runs of text and single digits, so new confidence values reuse glyphs
+LABEL_PIECES = re.compile(r"[0-9.]|[^0-9.]+")
+
+
+class DoubleBuffer(Generic[T]):
+    """
+    Single-producer hand-off of the latest result to a reader thread.
+
+    The producer fills the back slot and then flips the front index; both
+    steps are single reference assignments, so the reader never blocks
+    and always sees a complete value.
+    """
+
+    def __init__(self, initial: Optional[T] = None):
+        self._slots = [initial, initial]
+        self._front = 0
+        self.version = 0
+
+    def publish(self, value: T):
+        """
+        Make a new value visible to readers.
+
+        Args:
+            value: Latest result
+        """
+        back = 1 - self._front
+        self._slots[back] = value
+        self._front = back
+        self.version += 1
+
+    def read(self) -> Optional[T]:
+        """
+        Get the most recently published value.
+
+        Returns:
+            Latest value (the initial value before the first publish)
+        """
+        return self._slots[self._front]
+
+
+class OverlayRenderer:
+    """
+    Draws boxes and labels onto frames in place.
+
+    Label backgrounds are blended only inside their own rectangles rather
+    than over a full-frame copy. Label text is assembled from cached
+    pieces (the class name and the individual digits), so a label with a
+    confidence not seen before costs array copies instead of text
+    rasterization, and per-frame cost scales with label area.
+    """
+
+    def __init__(self, font: int = cv2.FONT_HERSHEY_SIMPLEX, font_scale: float = 0.5,
+                 thickness: int = 1, alpha: float = 0.3,
+                 background: Color = (255, 255, 255), max_sprites: int = 256):
+        """
+        Initialize overlay renderer.
+
+        Args:
+            font: OpenCV Hershey font
+            font_scale: Font scale
+            thickness: Text stroke thickness
+            alpha: Opacity of label backgrounds (0-1)
+            background: Label background color
+            max_sprites: Assembled labels, and separately rendered pieces, kept in the caches
+        """
+        self.font = font
+        self.font_scale = font_scale
+        self.thickness = thickness
+        self.alpha = alpha
+        self.background = background
+        self.max_sprites = max_sprites
+        self._sprites: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pieces: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def sprite(self, text: str) -> Tuple[np.ndarray, int, int]:
+        """
+        Get the rendered mask of a label.
+
+        Args:
+            text: Label text
+
+        Returns:
+            (mask, text height above the baseline, baseline) where mask holds
+            the text's coverage (0-1, anti-aliased edges) over its bounding box
+        """
+        cached = self._sprites.get(text)
+        if cached is not None:
+            self._sprites.move_to_end(text)
+            return cached
+
+        (width, height), baseline = cv2.getTextSize(text, self.font, self.font_scale, self.thickness)
+        canvas = np.zeros((height + baseline + self.thickness, width + self.thickness), dtype=np.uint8)
+        for match in LABEL_PIECES.finditer(text):
+            piece = self._piece(match.group())
+            # Where putText would start this piece (getTextSize includes one pixel past the end)
+            x = cv2.getTextSize(text[:match.start()], self.font, self.font_scale,
+                                self.thickness)[0][0] - 1 if match.start() else 0
+            # Pieces share the text height; a piece's descent is at most the whole label's
+            region = canvas[:piece.shape[0], x:x + piece.shape[1]]
+            np.maximum(region, piece[:region.shape[0], :region.shape[1]], out=region)
+
+        mask = (canvas.astype(np.float32) / 255.0)[..., np.newaxis]
+        cached = (mask, height, baseline)
+        self._remember(self._sprites, text, cached)
+        return cached
+
+    def _piece(self, text: str) -> np.ndarray:
+        """Get the rendered coverage of one label piece, rendering it on first use."""
+        piece = self._pieces.get(text)
+        if piece is not None:
+            self._pieces.move_to_end(text)
+            return piece
+
+        (width, height), baseline = cv2.getTextSize(text, self.font, self.font_scale, self.thickness)
+        piece = np.zeros((height + baseline + self.thickness, width + self.thickness), dtype=np.uint8)
+        cv2.putText(piece, text, (0, height), self.font, self.font_scale, 255, self.thickness)
+        self._remember(self._pieces, text, piece)
+        return piece
+
+    def _remember(self, cache: OrderedDict, key: str, value):
+        """Add to an LRU cache bounded by max_sprites."""
+        cache[key] = value
+        while len(cache) > self.max_sprites:
+            cache.popitem(last=False)
+
+    def draw_text(self, frame: np.ndarray, text: str, x: int, y: int, color: Color,
+                  background: bool = False):
+        """
+        Draw a label with its baseline origin at (x, y).
+
+        Args:
+            frame: Image to draw on (modified in place)
+            text: Label text
+            x: Left edge of the text
+            y: Baseline of the text
+            color: Text color
+            background: Blend the background color behind the text first
+        """
+        mask, height, baseline = self.sprite(text)
+        top = y - height
+
+        if background:
+            rows, cols = mask.shape[:2]
+            # Same extent as a filled cv2.rectangle, which includes both corners
+            self._blend(frame, x, top, cols - self.thickness + 1, rows - self.thickness + 1)
+
+        region, mask = self._clip(frame, mask, x, top)
+        if region is None:
+            return
+        if frame.ndim == 2:
+            mask = mask[..., 0]
+        pixel = np.array(self._pixel(color, frame), dtype=np.float32)
+        region[:] = (region * (1.0 - mask) + pixel * mask + 0.5).astype(frame.dtype)
+
+    def draw_detections(self, frame: np.ndarray, boxes: Sequence[Sequence[int]],
+                        texts: Sequence[str], box_colors: Sequence[Color],
+                        text_colors: Sequence[Color], label_offset: Tuple[int, int] = (5, 15),
+                        box_thickness: int = 2):
+        """
+        Draw labelled detection boxes.
+
+        Args:
+            frame: Image to draw on (modified in place)
+            boxes: Boxes as (x, y, w, h) in pixels
+            texts: Label per box
+            box_colors: Box color per box
+            text_colors: Text color per box
+            label_offset: Label baseline origin relative to the box's top-left corner
+            box_thickness: Box line thickness
+        """
+        dx, dy = label_offset
+        for (x, y, w, h), text, box_color, text_color in zip(boxes, texts, box_colors, text_colors):
+            self.draw_text(frame, text, x + dx, y + dy, text_color, background=True)
+            cv2.rectangle(frame, (x, y), (x + w, y + h), box_color, thickness=box_thickness)
+
+    def _blend(self, frame: np.ndarray, x: int, y: int, w: int, h: int):
+        """Blend the background color into one rectangle of the frame."""
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, frame.shape[1]), min(y + h, frame.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        roi = frame[y0:y1, x0:x1]
+        fill = np.empty_like(roi)
+        fill[:] = self._pixel(self.background, frame)
+        # roi is a strided view, which cv2 would not write through via dst
+        roi[:] = cv2.addWeighted(fill, self.alpha, roi, 1 - self.alpha, 0)
+
+    @staticmethod
+    def _clip(frame: np.ndarray, mask: np.ndarray, x: int, y: int):
+        """Cut the frame region under a sprite placed at (x, y) and the matching mask part."""
+        rows, cols = mask.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + cols, frame.shape[1]), min(y + rows, frame.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return None, None
+        return frame[y0:y1, x0:x1], mask[y0 - y:y1 - y, x0 - x:x1 - x]
+
+    @staticmethod
+    def _pixel(color: Color, frame: np.ndarray):
+        """Match a color to the frame's channel count (extra channels are zero, as in cv2)."""
+        channels = 1 if frame.ndim == 2 else frame.shape[2]
+        return (tuple(color) + (0,) * channels)[:channels]
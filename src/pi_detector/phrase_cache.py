@@ -0,0 +1,156 @@
+"""
+Cache of pre-rendered text-to-speech phrases.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PhraseCache:
+    """
+    Two-level (memory LRU + disk) cache of synthesized WAV audio.
+
+    Entries are keyed by text, voice, rate and volume, so changing any
+    speech setting renders fresh audio instead of replaying stale files.
+    """
+
+    def __init__(self, synthesize: Callable[[str, Path], None],
+                 cache_dir: str = "~/.cache/pi_detector/phrases",
+                 voice: str = "", rate: int = 150, volume: int = 80,
+                 max_memory_entries: int = 32, max_disk_entries: int = 256):
+        """
+        Initialize phrase cache.
+
+        Args:
+            synthesize: Function that renders text to a WAV file at the given path
+            cache_dir: Directory for rendered WAV files
+            voice: Voice identifier used for synthesis
+            rate: Speech rate used for synthesis
+            volume: Volume used for synthesis (0-100)
+            max_memory_entries: Phrases kept in memory
+            max_disk_entries: Phrases kept on disk
+        """
+        self.synthesize = synthesize
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.voice = voice
+        self.rate = rate
+        self.volume = volume
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, text: str) -> str:
+        """
+        Build the cache key for a phrase.
+
+        Args:
+            text: Phrase text
+
+        Returns:
+            Hex digest identifying text and speech settings
+        """
+        ident = f"{text}|{self.voice}|{self.rate}|{self.volume}"
+        return hashlib.sha1(ident.encode('utf-8')).hexdigest()
+
+    def get(self, text: str) -> Optional[bytes]:
+        """
+        Look up a phrase in memory, then on disk.
+
+        Args:
+            text: Phrase text
+
+        Returns:
+            WAV bytes, or None if the phrase has not been rendered
+        """
+        key = self.key(text)
+
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+
+        path = self.cache_dir / f"{key}.wav"
+        try:
+            data = path.read_bytes()
+            path.touch()  # Keep disk eviction least-recently-used
+        except OSError:
+            return None
+
+        self._remember(key, data)
+        return data
+
+    def get_or_render(self, text: str) -> Optional[bytes]:
+        """
+        Return cached audio for a phrase, rendering it on first use.
+
+        Args:
+            text: Phrase text
+
+        Returns:
+            WAV bytes, or None if synthesis failed
+        """
+        data = self.get(text)
+        if data is not None:
+            return data
+
+        key = self.key(text)
+        path = self.cache_dir / f"{key}.wav"
+        tmp_path = path.with_suffix('.tmp.wav')
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.synthesize(text, tmp_path)
+            data = tmp_path.read_bytes()
+            if not data:
+                raise RuntimeError("synthesizer produced no audio")
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.error(f"Failed to render phrase '{text}': {e}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+
+        logger.debug(f"Rendered phrase: {text}")
+        self._remember(key, data)
+        self._trim_disk()
+        return data
+
+    def warm(self, texts: Iterable[str]):
+        """
+        Render and load a set of phrases ahead of time.
+
+        Args:
+            texts: Phrases to prepare
+        """
+        count = 0
+        for text in dict.fromkeys(texts):
+            if self.get_or_render(text) is not None:
+                count += 1
+        logger.info(f"Phrase cache ready ({count} phrases)")
+
+    def _remember(self, key: str, data: bytes):
+        """Insert into the memory LRU, evicting the least recently used entry."""
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        """Delete the oldest rendered files beyond the disk limit."""
+        try:
+            files = sorted(
+                (p for p in self.cache_dir.glob("*.wav") if not p.name.endswith(".tmp.wav")),
+                key=lambda p: p.stat().st_mtime
+            )
+            for path in files[:max(0, len(files) - self.max_disk_entries)]:
+                path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to trim phrase cache: {e}")
@@ -0,0 +1,361 @@
+"""
+Post-processing for models exported without the built-in detection op.
+
+Decodes raw SSD (anchor-based) and YOLO outputs into boxes, classes and
+scores with whole-array NumPy operations, then applies class-aware NMS.
+"""
+
+import logging
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def load_anchors(path: str) -> np.ndarray:
+    """
+    Load a precomputed SSD anchor table.
+
+    Args:
+        path: .npy or .csv file with one [ycenter, xcenter, height, width]
+            row per anchor, in normalized coordinates
+
+    Returns:
+        Anchor array of shape (N, 4)
+    """
+    path = Path(path)
+    if path.suffix == ".npy":
+        anchors = np.load(path)
+    else:
+        anchors = np.loadtxt(path, delimiter=",", dtype=np.float32)
+
+    anchors = np.asarray(anchors, dtype=np.float32).reshape(-1, 4)
+    logger.info(f"Loaded {len(anchors)} anchors from {path}")
+    return anchors
+
+
+def decode_ssd_boxes(raw_boxes: np.ndarray, anchors: np.ndarray,
+                     scales: Sequence[float] = (10.0, 10.0, 5.0, 5.0)) -> np.ndarray:
+    """
+    Decode SSD box regressions against their anchors.
+
+    Args:
+        raw_boxes: Regressions of shape (N, 4) as [ty, tx, th, tw]
+        anchors: Anchors of shape (N, 4) as [ycenter, xcenter, height, width]
+        scales: Box coder scale factors (y, x, h, w)
+
+    Returns:
+        Boxes of shape (N, 4) as [ymin, xmin, ymax, xmax]
+    """
+    scales = np.asarray(scales, dtype=np.float32)
+    rel = raw_boxes / scales
+
+    centers = rel[:, 0:2] * anchors[:, 2:4] + anchors[:, 0:2]
+    half_sizes = 0.5 * np.exp(rel[:, 2:4]) * anchors[:, 2:4]
+
+    return np.concatenate([centers - half_sizes, centers + half_sizes], axis=1)
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """
+    Compute IoU of one box against many.
+
+    Args:
+        box: Box of shape (4,) as [ymin, xmin, ymax, xmax]
+        boxes: Boxes of shape (N, 4)
+
+    Returns:
+        IoU values of shape (N,)
+    """
+    top_left = np.maximum(box[:2], boxes[:, :2])
+    bottom_right = np.minimum(box[2:], boxes[:, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=1)
+
+    area = np.prod(box[2:] - box[:2])
+    areas = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def pairwise_iou(boxes: np.ndarray) -> np.ndarray:
+    """
+    Compute the IoU matrix of a set of boxes.
+
+    Args:
+        boxes: Boxes of shape (N, 4) as [ymin, xmin, ymax, xmax]
+
+    Returns:
+        IoU matrix of shape (N, N)
+    """
+    top_left = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+
+    areas = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+    return inter / np.maximum(areas[:, None] + areas[None, :] - inter, 1e-9)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, sorted descending.
+
+    Uses argpartition so only the selected k elements are fully sorted.
+
+    Args:
+        scores: Score array of shape (N,)
+        k: Number of indices to keep
+
+    Returns:
+        Index array of length min(k, N), empty for k <= 0
+    """
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    if len(scores) > k:
+        idx = np.argpartition(scores, -k)[-k:]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def class_aware_nms(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray,
+                    iou_threshold: float = 0.5,
+                    max_detections: int = 100) -> np.ndarray:
+    """
+    Greedy non-maximum suppression applied separately per class.
+
+    Boxes of different classes are shifted apart by a per-class offset so a
+    single pass over one IoU matrix suppresses only within each class.
+
+    Args:
+        boxes: Boxes of shape (N, 4) as [ymin, xmin, ymax, xmax]
+        scores: Scores of shape (N,)
+        classes: Class ids of shape (N,)
+        iou_threshold: Overlap above which the lower-scoring box is dropped
+        max_detections: Maximum number of boxes to keep
+
+    Returns:
+        Indices of kept boxes, ordered by descending score
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(-scores, kind="stable")
+    offset = (boxes.max() - boxes.min() + 1.0) * classes[order].astype(boxes.dtype)
+    shifted = boxes[order] + offset[:, None]
+
+    overlaps = pairwise_iou(shifted) > iou_threshold
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        if len(keep) >= max_detections:
+            break
+        suppressed |= overlaps[i]
+
+    return order[keep]
+
+
+def soft_nms(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray,
+             sigma: float = 0.5, score_threshold: float = 0.001,
+             max_detections: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gaussian soft-NMS applied separately per class.
+
+    Instead of dropping overlapping boxes their scores are decayed by
+    exp(-iou^2 / sigma), which keeps partially occluded neighbours.
+
+    Args:
+        boxes: Boxes of shape (N, 4) as [ymin, xmin, ymax, xmax]
+        scores: Scores of shape (N,)
+        classes: Class ids of shape (N,)
+        sigma: Gaussian decay width
+        score_threshold: Boxes decayed below this score are dropped
+        max_detections: Maximum number of boxes to keep
+
+    Returns:
+        (indices, decayed scores) of kept boxes, ordered by descending score
+    """
+    scores = scores.astype(np.float32, copy=True)
+    remaining = np.arange(len(boxes))
+    keep = []
+    kept_scores = []
+
+    while len(remaining) and len(keep) < max_detections:
+        best = np.argmax(scores[remaining])
+        i = remaining[best]
+        keep.append(i)
+        kept_scores.append(scores[i])
+        remaining = np.delete(remaining, best)
+        if not len(remaining):
+            break
+
+        same_class = classes[remaining] == classes[i]
+        iou = box_iou(boxes[i], boxes[remaining]) * same_class
+        scores[remaining] *= np.exp(-(iou ** 2) / sigma)
+        remaining = remaining[scores[remaining] >= score_threshold]
+
+    return np.array(keep, dtype=np.int64), np.array(kept_scores, dtype=np.float32)
+
+
+class RawOutputDecoder:
+    """Turns raw SSD or YOLO model outputs into final detections."""
+
+    FORMATS = ("ssd", "yolo")
+
+    def __init__(self, output_format: str = "ssd", anchors_path: Optional[str] = None,
+                 input_size: Sequence[int] = (300, 300),
+                 score_threshold: float = 0.5, iou_threshold: float = 0.5,
+                 top_k: int = 200, max_detections: int = 25,
+                 soft_nms: bool = False, soft_nms_sigma: float = 0.5,
+                 box_scales: Sequence[float] = (10.0, 10.0, 5.0, 5.0),
+                 sigmoid_scores: bool = True, background_class: bool = True,
+                 class_ids: Optional[Iterable[int]] = None,
+                 num_classes: int = 80, objectness: Optional[bool] = None):
+        """
+        Initialize raw output decoder.
+
+        Args:
+            output_format: "ssd" (anchor regressions) or "yolo" (decoded xywh rows)
+            anchors_path: Anchor table for SSD models
+            input_size: Model input size as (height, width), used to
+                normalize YOLO boxes given in pixels
+            score_threshold: Minimum class score
+            iou_threshold: NMS overlap threshold
+            top_k: Candidates kept (by score) before NMS
+            max_detections: Maximum detections returned
+            soft_nms: Use Gaussian soft-NMS instead of hard NMS
+            soft_nms_sigma: Soft-NMS decay width
+            box_scales: SSD box coder scale factors (y, x, h, w)
+            sigmoid_scores: SSD class outputs are logits
+            background_class: SSD class column 0 is background
+            class_ids: Only decode these class ids (all classes if None)
+            num_classes: Number of YOLO classes
+            objectness: Whether YOLO rows include an objectness column
+                (inferred from the row length if None)
+        """
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'. "
+                             f"Choose from: {', '.join(self.FORMATS)}")
+        if output_format == "ssd" and not anchors_path:
+            raise ValueError("SSD decoding requires an anchors_path")
+
+        self.output_format = output_format
+        self.anchors = load_anchors(anchors_path) if anchors_path else None
+        self.input_size = tuple(input_size)
+        self.score_threshold = score_threshold
+        self.iou_threshold = iou_threshold
+        self.top_k = top_k
+        self.max_detections = max_detections
+        self.soft_nms = soft_nms
+        self.soft_nms_sigma = soft_nms_sigma
+        self.box_scales = box_scales
+        self.sigmoid_scores = sigmoid_scores
+        self.background_class = background_class
+        self.class_ids = None if class_ids is None else np.array(sorted(class_ids), dtype=np.int64)
+        self.num_classes = num_classes
+        self.objectness = objectness
+
+    def decode(self, outputs: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decode raw outputs.
+
+        Args:
+            outputs: Backend outputs, each with a leading batch dimension
+
+        Returns:
+            (boxes, classes, scores) with boxes as normalized
+            [ymin, xmin, ymax, xmax]
+        """
+        if self.output_format == "ssd":
+            boxes, class_scores, threshold = self._split_ssd(outputs)
+        else:
+            boxes, class_scores, threshold = self._split_yolo(outputs)
+
+        if self.class_ids is not None:
+            class_scores = class_scores[:, self.class_ids]
+
+        # Candidate (anchor, class) pairs above threshold, then top-k
+        num_classes = class_scores.shape[1]
+        flat = class_scores.ravel()
+        candidates = np.flatnonzero(flat > threshold)
+        candidates = candidates[top_k(flat[candidates], self.top_k)]
+
+        anchor_idx = candidates // num_classes
+        class_idx = candidates % num_classes
+        scores = flat[candidates]
+        if self.output_format == "ssd" and self.sigmoid_scores:
+            # Only the survivors pay for the sigmoid
+            scores = 1.0 / (1.0 + np.exp(-scores))
+
+        if self.output_format == "ssd":
+            cand_boxes = decode_ssd_boxes(boxes[anchor_idx], self.anchors[anchor_idx], self.box_scales)
+        else:
+            cand_boxes = boxes[anchor_idx]
+        classes = class_idx if self.class_ids is None else self.class_ids[class_idx]
+
+        if self.soft_nms:
+            keep, scores_kept = soft_nms(cand_boxes, scores, classes,
+                                         sigma=self.soft_nms_sigma,
+                                         score_threshold=self.score_threshold,
+                                         max_detections=self.max_detections)
+        else:
+            keep = class_aware_nms(cand_boxes, scores, classes,
+                                   iou_threshold=self.iou_threshold,
+                                   max_detections=self.max_detections)
+            scores_kept = scores[keep]
+
+        return np.clip(cand_boxes[keep], 0.0, 1.0), classes[keep], scores_kept
+
+    def _split_ssd(self, outputs: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Pick box regressions and class scores out of raw SSD outputs."""
+        arrays = [np.asarray(o)[0] for o in outputs]
+        raw_boxes = next(a for a in arrays if a.ndim == 2 and a.shape[-1] == 4)
+        class_scores = next(a for a in arrays if a.ndim == 2 and a.shape[-1] != 4)
+
+        if len(raw_boxes) != len(self.anchors):
+            raise ValueError(f"Model has {len(raw_boxes)} boxes but {len(self.anchors)} anchors were loaded")
+
+        if self.background_class:
+            class_scores = class_scores[:, 1:]
+
+        threshold = self.score_threshold
+        if self.sigmoid_scores:
+            # Compare logits against logit(threshold); sigmoid is monotonic.
+            # Clamp so thresholds of 0 and 1 still have a finite logit
+            threshold = min(max(threshold, 1e-6), 1.0 - 1e-6)
+            threshold = float(np.log(threshold / (1.0 - threshold)))
+
+        return raw_boxes.astype(np.float32), class_scores, threshold
+
+    def _split_yolo(self, outputs: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Convert YOLO rows of [cx, cy, w, h, (objectness,) classes...]."""
+        rows = np.asarray(outputs[0])[0].astype(np.float32)
+        if rows.shape[0] < rows.shape[1]:
+            # YOLOv8 exports are channel-first: (4 + classes, N)
+            rows = rows.T
+
+        centers, sizes = rows[:, 0:2], rows[:, 2:4]
+
+        # YOLOv5 rows carry an objectness column; YOLOv8 rows do not
+        objectness = self.objectness
+        if objectness is None:
+            objectness = rows.shape[1] == self.num_classes + 5
+        if objectness:
+            class_scores = rows[:, 5:] * rows[:, 4:5]
+        else:
+            class_scores = rows[:, 4:]
+
+        # Boxes may be given in input pixels rather than normalized units
+        if centers.max(initial=0.0) > 1.5:
+            height, width = self.input_size
+            norm = np.array([width, height], dtype=np.float32)
+            centers, sizes = centers / norm, sizes / norm
+
+        # xywh -> [ymin, xmin, ymax, xmax]
+        half = sizes / 2
+        boxes = np.concatenate([(centers - half)[:, ::-1], (centers + half)[:, ::-1]], axis=1)
+
+        return boxes, class_scores, self.score_threshold
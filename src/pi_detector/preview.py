@@ -0,0 +1,295 @@
+"""
+MJPEG preview server for annotated camera frames.
+"""
+
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+from .overlay import OverlayRenderer
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = "frame"
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Pi Detector</title></head>
+<body style="margin:0;background:#111;color:#eee;font-family:sans-serif">
+{streams}
+</body></html>
+"""
+
+PERSON_COLOR = (0, 0, 255)  # BGR
+OBJECT_COLOR = (0, 200, 0)
+
+
+class PreviewChannel:
+    """Latest submitted frame and latest encoded JPEG of one camera."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pending: Optional[Tuple[np.ndarray, List[Dict]]] = None
+        self.jpeg: Optional[bytes] = None
+        self.seq = 0
+        self.clients = 0
+
+
+class PreviewServer:
+    """
+    Serves annotated frames as an MJPEG stream over HTTP.
+
+    ``submit()`` only stores a reference to the frame, and does nothing at
+    all while nobody is watching. A single encoder thread draws the overlay
+    and JPEG-encodes each channel's newest frame once, at most ``max_fps``
+    times per second, and every client is sent the same bytes. Each client
+    thread sends the newest JPEG when its own frame-rate cap allows, so a
+    slow client skips frames instead of holding anything up.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, max_fps: float = 10.0,
+                 quality: int = 80, renderer: Optional[OverlayRenderer] = None):
+        """
+        Initialize preview server.
+
+        Args:
+            host: Address to listen on (localhost by default)
+            port: TCP port (0 picks a free port)
+            max_fps: Most frames per second encoded and sent to any client
+            quality: JPEG quality (0-100)
+            renderer: Overlay renderer for boxes and labels
+        """
+        self.host = host
+        self.port = port
+        self.max_fps = max_fps
+        self.quality = quality
+        self.renderer = renderer or OverlayRenderer(alpha=0.5)
+        self.frames_encoded = 0
+        self.channels: Dict[str, PreviewChannel] = {}
+        self._condition = threading.Condition()
+        self._running = False
+        self._httpd = None
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> bool:
+        """
+        Start listening and the encoder thread.
+
+        Returns:
+            True if the server is listening
+        """
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        except OSError as e:
+            logger.error(f"Preview server failed to start: {e}")
+            return False
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._running = True
+
+        self._threads = [
+            threading.Thread(target=self._httpd.serve_forever, name="preview-http", daemon=True),
+            threading.Thread(target=self._encode_loop, name="preview-encoder", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Preview at http://{self.host}:{self.port}/")
+        return True
+
+    def add_channel(self, camera: str):
+        """
+        Register a camera so its stream can be opened before its first frame.
+
+        Args:
+            camera: Camera name
+        """
+        with self._condition:
+            self.channels.setdefault(camera, PreviewChannel(camera))
+
+    def watching(self, camera: str = "camera0") -> bool:
+        """
+        Check whether anyone is watching a camera.
+
+        Args:
+            camera: Camera name
+
+        Returns:
+            True if at least one client is connected to the camera's stream
+        """
+        channel = self.channels.get(camera)
+        return channel is not None and channel.clients > 0
+
+    def submit(self, frame: np.ndarray, detections: List[Dict], camera: str = "camera0"):
+        """
+        Offer a frame and its detections for the preview.
+
+        Never blocks and never copies: the frame is only referenced until the
+        encoder picks it up, so it must not be modified afterwards.
+
+        Args:
+            frame: RGB camera frame
+            detections: Detections with normalized [ymin, xmin, ymax, xmax] boxes
+            camera: Camera name
+        """
+        channel = self.channels.get(camera)
+        if channel is None:
+            self.add_channel(camera)
+            return
+        if channel.clients == 0:
+            return
+        channel.pending = (frame, detections)
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self):
+        """Stop the server and disconnect clients."""
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+
+    def render(self, frame: np.ndarray, detections: List[Dict]) -> Optional[bytes]:
+        """
+        Draw detections on a copy of the frame and encode it.
+
+        Args:
+            frame: RGB camera frame
+            detections: Detections with normalized [ymin, xmin, ymax, xmax] boxes
+
+        Returns:
+            JPEG bytes, or None if encoding failed
+        """
+        # The conversion makes the copy the overlay is drawn on
+        image = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        if detections:
+            height, width = image.shape[:2]
+            boxes, texts, colors = [], [], []
+            for detection in detections:
+                ymin, xmin, ymax, xmax = detection['bbox']
+                x, y = int(xmin * width), int(ymin * height)
+                boxes.append((x, y, int(xmax * width) - x, int(ymax * height) - y))
+                texts.append(f"{detection['class']} {detection['confidence']:.2f}")
+                colors.append(PERSON_COLOR if detection['class'] == "person" else OBJECT_COLOR)
+            self.renderer.draw_detections(image, boxes, texts, colors, [(0, 0, 0)] * len(boxes))
+
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return encoded.tobytes() if ok else None
+
+    def _encode_loop(self):
+        """Background thread: encode each watched channel's newest frame once."""
+        interval = 1.0 / self.max_fps
+        while self._running:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: not self._running or any(
+                        c.pending is not None and c.clients for c in self.channels.values()
+                    ),
+                    timeout=1.0
+                )
+            started = time.monotonic()
+
+            for channel in list(self.channels.values()):
+                item, channel.pending = channel.pending, None
+                if item is None or not channel.clients:
+                    continue
+                try:
+                    jpeg = self.render(*item)
+                except Exception as e:
+                    logger.error(f"Preview rendering failed: {e}")
+                    continue
+                if jpeg is None:
+                    continue
+                with self._condition:
+                    channel.jpeg = jpeg
+                    channel.seq += 1
+                    self.frames_encoded += 1
+                    self._condition.notify_all()
+
+            # Frames submitted meanwhile are replaced by newer ones, not queued
+            remaining = interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _stream(self, handler: BaseHTTPRequestHandler, channel: PreviewChannel, fps: float):
+        """Send a channel's JPEGs to one client until it disconnects."""
+        interval = 1.0 / min(fps, self.max_fps)
+        handler.send_response(200)
+        handler.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        handler.send_header("Cache-Control", "no-cache, private")
+        handler.send_header("Pragma", "no-cache")
+        handler.end_headers()
+
+        with self._condition:
+            channel.clients += 1
+        logger.info(f"Preview client connected to {channel.name} ({channel.clients} watching)")
+        seq = 0
+        try:
+            while self._running:
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: not self._running or channel.seq > seq, timeout=1.0
+                    )
+                    if channel.seq <= seq:
+                        continue
+                    seq, jpeg = channel.seq, channel.jpeg
+                sent = time.monotonic()
+                handler.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                )
+                handler.wfile.write(jpeg)
+                handler.wfile.write(b"\r\n")
+                # Frames published while this client waits out its cap are skipped
+                remaining = interval - (time.monotonic() - sent)
+                if remaining > 0:
+                    time.sleep(remaining)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._condition:
+                channel.clients -= 1
+            logger.info(f"Preview client left {channel.name} ({channel.clients} watching)")
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                names = list(server.channels)
+                name = query.get("camera", names[:1] or ["camera0"])[0]
+
+                if url.path == "/":
+                    streams = "\n".join(
+                        f'<h3>{n}</h3><img src="/stream.mjpg?camera={n}">' for n in names
+                    ) or "<p>No camera frames yet.</p>"
+                    body = PAGE.format(streams=streams).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif url.path == "/stream.mjpg" and name in server.channels:
+                    try:
+                        fps = float(query.get("fps", [server.max_fps])[0])
+                    except ValueError:
+                        fps = server.max_fps
+                    server._stream(self, server.channels[name], max(fps, 0.1))
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                logger.debug(f"Preview {self.address_string()}: {format % args}")
+
+        return Handler
+
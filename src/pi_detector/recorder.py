@@ -0,0 +1,254 @@
+"""
+Event clip recording with a pre-event ring buffer.
+"""
+
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CLIP_SUFFIX = ".avi"
+
+
+class ClipRecorder:
+    """
+    Records clips that start before the event that triggered them.
+
+    ``add_frame()`` hands frames to an encoder thread that keeps the last
+    ``pre_seconds`` of them as JPEG bytes in a memory-bounded ring.
+    ``trigger()`` marks an event: the ring becomes the clip's pre-roll and
+    frames keep being added for ``post_seconds`` after the last trigger, up
+    to ``max_clip_seconds``. A writer thread turns clips into video files
+    and deletes the oldest clips once the directory exceeds its quota.
+    Neither call blocks; when a thread falls behind, frames are dropped.
+    """
+
+    def __init__(self, directory: str = "recordings", name: str = "camera0",
+                 pre_seconds: float = 5.0, post_seconds: float = 10.0,
+                 max_clip_seconds: float = 60.0, fps: float = 10.0, quality: int = 80,
+                 max_memory_mb: float = 32.0, max_disk_mb: float = 1024.0):
+        """
+        Initialize clip recorder.
+
+        Args:
+            directory: Directory the clips are written to
+            name: Camera name used in clip file names
+            pre_seconds: Seconds of video kept from before a trigger
+            post_seconds: Seconds recorded after the last trigger
+            max_clip_seconds: Longest clip, pre-roll included
+            fps: Frames per second kept (extra frames are skipped)
+            quality: JPEG quality of buffered frames (0-100)
+            max_memory_mb: Memory limit of the pre-event ring
+            max_disk_mb: Disk quota of the clip directory
+        """
+        self.directory = Path(directory).expanduser()
+        self.name = re.sub(r"[^\w-]+", "_", name)
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.max_clip_seconds = max_clip_seconds
+        self.fps = fps
+        self.quality = quality
+        self.max_memory = int(max_memory_mb * 1024 * 1024)
+        self.max_disk = int(max_disk_mb * 1024 * 1024)
+
+        self.clips_written = 0
+        self.frames_dropped = 0
+        self.ring: Deque[Tuple[float, bytes]] = deque()
+        self.ring_bytes = 0
+
+        self._next_due = float("-inf")
+        self._lock = threading.Lock()
+        self._trigger_time: Optional[float] = None
+        self._clip_until: Optional[float] = None
+        self._clip_start: Optional[float] = None
+        self._written_until = float("-inf")
+        self._frames: "queue.Queue" = queue.Queue(maxsize=4)
+        self._clips: "queue.Queue" = queue.Queue(maxsize=int(fps * max_clip_seconds) + 16)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._encoder = threading.Thread(target=self._encode_loop, name=f"recorder-encode-{self.name}",
+                                         daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name=f"recorder-write-{self.name}",
+                                        daemon=True)
+        self._encoder.start()
+        self._writer.start()
+
+    @property
+    def recording(self) -> bool:
+        """Whether a clip is being recorded."""
+        return self._clip_until is not None
+
+    def add_frame(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """
+        Offer a camera frame without blocking.
+
+        The frame is only referenced until it is encoded, so it must not be
+        modified afterwards. Read-only frames, such as zero-copy views of a
+        frame bus slot that will be reused, are copied once accepted.
+
+        Args:
+            frame: RGB camera frame
+            timestamp: Unix time of the frame (now if None)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if timestamp < self._next_due:
+            return
+        # Half an interval of slack keeps the rate at fps when camera frames arrive with jitter
+        interval = 1.0 / self.fps
+        self._next_due = max(self._next_due, timestamp - interval / 2) + interval
+        if not frame.flags.writeable:
+            frame = frame.copy()
+        try:
+            self._frames.put_nowait((timestamp, frame))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def trigger(self, timestamp: Optional[float] = None):
+        """
+        Start a clip, or extend the current one's post-roll.
+
+        Args:
+            timestamp: Unix time of the event (now if None)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if self._clip_until is None:
+                self._trigger_time = timestamp
+            self._clip_until = timestamp + self.post_seconds
+
+    def close(self):
+        """Finish the current clip and stop the threads."""
+        self._frames.put((None, None))
+        self._encoder.join(timeout=5.0)
+        self._clips.put(None)
+        self._writer.join(timeout=30.0)
+        logger.info(f"Recorder {self.name} closed ({self.clips_written} clips, "
+                    f"{self.frames_dropped} frames dropped)")
+
+    def _encode_loop(self):
+        """Background thread: JPEG-encode frames into the ring and open/feed/close clips."""
+        while True:
+            timestamp, frame = self._frames.get()
+            if frame is None:
+                if self._clip_start is not None:
+                    self._send(("end",))
+                return
+
+            ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR),
+                                       [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                continue
+            jpeg = encoded.tobytes()
+            self.ring.append((timestamp, jpeg))
+            self.ring_bytes += len(jpeg)
+
+            with self._lock:
+                until, trigger_time = self._clip_until, self._trigger_time
+
+            if until is not None:
+                if self._clip_start is None:
+                    # New clip: buffered frames from the pre-roll window not already in a clip
+                    preroll = [item for item in self.ring
+                               if item[0] >= trigger_time - self.pre_seconds
+                               and item[0] > self._written_until] or [(timestamp, jpeg)]
+                    self._clip_start = preroll[0][0]
+                    self._send(("start", self._clip_path(trigger_time), preroll))
+                else:
+                    self._send(("frame", jpeg))
+
+                if timestamp >= until or timestamp - self._clip_start >= self.max_clip_seconds:
+                    self._send(("end",))
+                    self._clip_start = None
+                    self._written_until = timestamp
+                    with self._lock:
+                        if self._clip_until == until and timestamp >= until:
+                            self._clip_until = self._trigger_time = None
+                        else:
+                            # Cut at the length limit, or triggered again meanwhile: continue in a new clip
+                            self._trigger_time = timestamp
+
+            # Keep only the pre-roll window, within the memory limit
+            while self.ring and (self.ring[0][0] < timestamp - self.pre_seconds
+                                 or self.ring_bytes > self.max_memory):
+                self.ring_bytes -= len(self.ring.popleft()[1])
+
+    def _send(self, message: tuple):
+        try:
+            self._clips.put_nowait(message)
+        except queue.Full:
+            # Keep clip boundaries; only frame payloads may be dropped
+            if message[0] == "frame":
+                self.frames_dropped += 1
+            else:
+                self._clips.put(message)
+
+    def _write_loop(self):
+        """Background thread: write clips to disk."""
+        writer = None
+        path = None
+        while True:
+            message = self._clips.get()
+            if message is None:
+                break
+            kind = message[0]
+            try:
+                if kind == "start":
+                    path, preroll = message[1], message[2]
+                    self._enforce_quota()
+                    writer = None
+                    for _, jpeg in preroll:
+                        writer = self._write_frame(writer, path, jpeg)
+                elif kind == "frame" and path is not None:
+                    writer = self._write_frame(writer, path, message[1])
+                elif kind == "end":
+                    if writer is not None:
+                        writer.release()
+                        self.clips_written += 1
+                        logger.info(f"Saved clip {path}")
+                    writer, path = None, None
+                    self._enforce_quota()
+            except Exception as e:
+                logger.error(f"Failed to write clip {path}: {e}")
+                writer, path = None, None
+
+        if writer is not None:
+            writer.release()
+
+    def _write_frame(self, writer, path: Path, jpeg: bytes):
+        """Decode a buffered frame and append it to the clip, opening the file on first use."""
+        image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+        if writer is None:
+            height, width = image.shape[:2]
+            writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), self.fps,
+                                     (width, height))
+        writer.write(image)
+        return writer
+
+    def _clip_path(self, timestamp: float) -> Path:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(timestamp))
+        path = self.directory / f"{self.name}-{stamp}{CLIP_SUFFIX}"
+        index = 1
+        while path.exists():
+            path = self.directory / f"{self.name}-{stamp}-{index}{CLIP_SUFFIX}"
+            index += 1
+        return path
+
+    def _enforce_quota(self):
+        """Delete the oldest clips until the directory is within its quota (keeping the newest)."""
+        clips: List[Path] = sorted(self.directory.glob(f"*{CLIP_SUFFIX}"),
+                                   key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in clips)
+        while len(clips) > 1 and total > self.max_disk:
+            oldest = clips.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink()
+            logger.info(f"Deleted {oldest.name} to stay within the recording quota")
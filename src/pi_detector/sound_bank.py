@@ -0,0 +1,186 @@
+"""
+Preloaded alert sounds played on a shared pygame mixer.
+"""
+
+import io
+import logging
+import threading
+from typing import Dict, Optional
+
+try:
+    import pygame
+    PYGAME_AVAILABLE = True
+except ImportError:
+    PYGAME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class SoundBank:
+    """
+    Initializes the mixer once and keeps alert sounds decoded in memory.
+
+    Sounds play on a pool of mixer channels, so several alerts can overlap
+    and starting one never waits for the audio device or the disk.
+    """
+
+    def __init__(self, sounds: Optional[Dict[str, str]] = None,
+                 channels: int = 8, volume: int = 80):
+        """
+        Initialize sound bank.
+
+        Args:
+            sounds: Sound name (e.g. class name) -> sound file path
+            channels: Number of mixer channels available for overlapping sounds
+            volume: Volume level (0-100)
+        """
+        self.sound_files = dict(sounds or {})
+        self.channels = channels
+        self.volume = min(100, max(0, volume))
+        self.sounds: Dict[str, "pygame.mixer.Sound"] = {}
+        self.ready = False
+        self._lock = threading.Lock()
+
+    def init(self) -> bool:
+        """
+        Initialize the mixer and preload the configured sounds.
+
+        Safe to call repeatedly; only the first successful call does work.
+
+        Returns:
+            True if the mixer is ready
+        """
+        with self._lock:
+            if self.ready:
+                return True
+            if not PYGAME_AVAILABLE:
+                return False
+
+            try:
+                pygame.mixer.init()
+                pygame.mixer.set_num_channels(self.channels)
+                self.ready = True
+            except Exception as e:
+                logger.error(f"Failed to initialize audio mixer: {e}")
+                return False
+
+        for name, path in self.sound_files.items():
+            self._load(name, path)
+        logger.info(f"Sound bank ready ({len(self.sounds)} sounds, {self.channels} channels)")
+        return True
+
+    def has(self, name: str) -> bool:
+        """
+        Check whether a named sound is configured.
+
+        Args:
+            name: Sound name
+
+        Returns:
+            True if the sound has a file configured
+        """
+        return name in self.sound_files
+
+    def play(self, name: str) -> bool:
+        """
+        Play a named sound without waiting for it to finish.
+
+        Args:
+            name: Sound name
+
+        Returns:
+            True if playback started
+        """
+        if not self.init():
+            return False
+
+        sound = self.sounds.get(name)
+        if sound is None:
+            return False
+        return self._play(sound)
+
+    def play_file(self, path: str) -> bool:
+        """
+        Play a sound file, loading and keeping it on first use.
+
+        Args:
+            path: Sound file path
+
+        Returns:
+            True if playback started
+        """
+        if not self.init():
+            return False
+
+        sound = self.sounds.get(path) or self._load(path, path)
+        if sound is None:
+            return False
+        return self._play(sound)
+
+    def play_buffer(self, data: bytes) -> Optional[float]:
+        """
+        Play in-memory WAV data.
+
+        Args:
+            data: WAV file contents
+
+        Returns:
+            Length of the sound in seconds, or None if it could not be played
+        """
+        if not self.init():
+            return None
+
+        try:
+            sound = pygame.mixer.Sound(file=io.BytesIO(data))
+        except Exception as e:
+            logger.error(f"Error decoding audio: {e}")
+            return None
+
+        if not self._play(sound):
+            return None
+        return sound.get_length()
+
+    def set_volume(self, volume: int):
+        """
+        Set volume of all loaded sounds.
+
+        Args:
+            volume: Volume level (0-100)
+        """
+        self.volume = min(100, max(0, volume))
+        for sound in self.sounds.values():
+            sound.set_volume(self.volume / 100.0)
+
+    def close(self):
+        """Release the mixer."""
+        with self._lock:
+            if self.ready:
+                try:
+                    pygame.mixer.quit()
+                except Exception as e:
+                    logger.error(f"Error closing audio mixer: {e}")
+            self.ready = False
+            self.sounds.clear()
+
+    def _load(self, name: str, path: str) -> Optional["pygame.mixer.Sound"]:
+        """Decode a sound file and keep it under the given name."""
+        try:
+            sound = pygame.mixer.Sound(path)
+            sound.set_volume(self.volume / 100.0)
+            self.sounds[name] = sound
+            return sound
+        except Exception as e:
+            logger.error(f"Failed to load sound '{path}': {e}")
+            return None
+
+    def _play(self, sound: "pygame.mixer.Sound") -> bool:
+        """Play a sound on a free channel, stealing the oldest if all are busy."""
+        try:
+            channel = pygame.mixer.find_channel(True)
+            if channel is None:
+                return False
+            channel.play(sound)
+            return True
+        except Exception as e:
+            logger.error(f"Error playing sound: {e}")
+            return False
@@ -0,0 +1,526 @@
+"""
+HC-SR04 ultrasonic ranging timed from GPIO edge events.
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import RPi.GPIO as GPIO
+    GPIO_AVAILABLE = True
+except ImportError:
+    GPIO = None
+    GPIO_AVAILABLE = False
+    logging.warning("RPi.GPIO not available. Ultrasonic sensor needs a simulated GPIO backend.")
+
+logger = logging.getLogger(__name__)
+
+SPEED_OF_SOUND = 343.0  # m/s at about 20 C
+
+
+def pulse_to_distance(duration: float) -> float:
+    """
+    Convert an echo pulse width to a distance.
+
+    Args:
+        duration: Echo pulse width in seconds (sound travels there and back)
+
+    Returns:
+        Distance in meters
+    """
+    return duration * SPEED_OF_SOUND / 2
+
+
+def distance_to_pulse(distance: float) -> float:
+    """
+    Convert a distance to the echo pulse width the sensor would produce.
+
+    Args:
+        distance: Distance in meters
+
+    Returns:
+        Echo pulse width in seconds
+    """
+    return 2 * distance / SPEED_OF_SOUND
+
+
+class FakeGPIO:
+    """
+    Simulated subset of the RPi.GPIO API that answers trigger pulses with
+    scripted or recorded echo pulses.
+
+    Each trigger (an output pin going high then low) consumes the next
+    pulse width: ``None`` produces no echo and ``float("inf")`` leaves the
+    echo line stuck high. Time is simulated: ``clock()`` only moves when an
+    echo edge is produced, and edges are delivered to ``add_event_detect``
+    callbacks before ``output()`` returns, so simulated pulse widths come
+    back exactly however busy the machine is. With a ``callback_delay``
+    each callback runs that long after its edge, and the pin level may
+    already have changed again, as with RPi.GPIO's callback thread.
+    """
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, pulses: Iterable[Optional[float]] = (), loop: bool = True,
+                 echo_delay: float = 0.0005, start_time: float = 0.0,
+                 callback_delay: float = 0.0):
+        """
+        Initialize simulated GPIO.
+
+        Args:
+            pulses: Echo pulse widths in seconds, one per trigger
+            loop: Start again from the first pulse when the script runs out
+            echo_delay: Simulated seconds between the trigger and the rising echo edge
+            start_time: Initial reading of the simulated clock
+            callback_delay: Simulated seconds between an edge and its callback
+        """
+        self.pulses = list(pulses)
+        self.loop = loop
+        self.echo_delay = echo_delay
+        self.now = start_time
+        self.callback_delay = callback_delay
+        self.triggers = 0
+        self._index = 0
+        self._modes: Dict[int, int] = {}
+        self._levels: Dict[int, int] = {}
+        self._callbacks: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_distances(cls, distances: Iterable[Optional[float]], **kwargs) -> "FakeGPIO":
+        """
+        Create a simulated sensor from a script of distances.
+
+        Args:
+            distances: Distances in meters (None for a missing echo)
+            **kwargs: FakeGPIO arguments
+
+        Returns:
+            FakeGPIO instance
+        """
+        pulses = [None if d is None else distance_to_pulse(d) for d in distances]
+        return cls(pulses, **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "FakeGPIO":
+        """
+        Create a simulated sensor from a recording.
+
+        The file holds JSON: a list of pulse widths in seconds, or an object
+        with a "pulses" or "distances" list.
+
+        Args:
+            path: Recording file
+            **kwargs: FakeGPIO arguments
+
+        Returns:
+            FakeGPIO instance
+        """
+        with open(Path(path).expanduser(), 'r') as f:
+            data = json.load(f)
+
+        if isinstance(data, dict) and "distances" in data:
+            return cls.from_distances(data["distances"], **kwargs)
+        if isinstance(data, dict):
+            data = data.get("pulses", [])
+        return cls(data, **kwargs)
+
+    def clock(self) -> float:
+        """Current simulated time in seconds (use as the sensor's clock)."""
+        return self.now
+
+    def setmode(self, mode: int):
+        pass
+
+    def setwarnings(self, enabled: bool):
+        pass
+
+    def setup(self, pin: int, mode: int, **kwargs):
+        with self._lock:
+            self._modes[pin] = mode
+            self._levels[pin] = self.LOW
+
+    def input(self, pin: int) -> int:
+        return self._levels.get(pin, self.LOW)
+
+    def output(self, pin: int, value):
+        with self._lock:
+            previous = self._levels.get(pin, self.LOW)
+            self._levels[pin] = self.HIGH if value else self.LOW
+            triggered = previous == self.HIGH and not value
+
+        if triggered:
+            self.triggers += 1
+            pulse = self._next_pulse()
+            if pulse is not None:
+                self._echo(pulse)
+
+    def add_event_detect(self, pin: int, edge: int, callback: Optional[Callable] = None,
+                         bouncetime: Optional[int] = None):
+        self._callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin: int):
+        self._callbacks.pop(pin, None)
+
+    def cleanup(self, pins=None):
+        for pin in ([pins] if isinstance(pins, int) else pins or list(self._modes)):
+            self._callbacks.pop(pin, None)
+            self._modes.pop(pin, None)
+            self._levels.pop(pin, None)
+
+    def _next_pulse(self) -> Optional[float]:
+        """Take the next scripted pulse width."""
+        if not self.pulses:
+            return None
+        if self._index >= len(self.pulses):
+            if not self.loop:
+                return None
+            self._index = 0
+        pulse = self.pulses[self._index]
+        self._index += 1
+        return pulse
+
+    def _echo(self, pulse: float):
+        """Drive the echo inputs high for the pulse width of simulated time."""
+        rise = self.now + self.echo_delay
+        edges = [(rise, self.HIGH)]
+        if pulse != float("inf"):
+            edges.append((rise + pulse, self.LOW))
+
+        pending = list(edges)
+        for at, level in edges:
+            # Pins follow every edge up to the moment the callback runs
+            self.now = at + self.callback_delay
+            while pending and pending[0][0] <= self.now:
+                self._set_inputs(pending.pop(0)[1])
+            self._fire(self.RISING if level == self.HIGH else self.FALLING)
+
+    def _inputs(self) -> List[int]:
+        """Pins configured as inputs."""
+        return [pin for pin, mode in self._modes.items() if mode == self.IN]
+
+    def _set_inputs(self, level: int):
+        """Change every input pin."""
+        for pin in self._inputs():
+            self._levels[pin] = level
+
+    def _fire(self, edge: int):
+        """Call the edge callbacks of input pins that watch this edge."""
+        for pin in self._inputs():
+            wanted, callback = self._callbacks.get(pin, (None, None))
+            if callback and wanted in (edge, self.BOTH):
+                callback(pin)
+
+
+class UltrasonicSensor:
+    """
+    HC-SR04 distance sensor.
+
+    The echo pulse is timed from edge callbacks instead of polling the
+    echo pin, so a measurement sleeps on an event and costs no CPU while
+    it waits.
+    """
+
+    def __init__(self, trig_pin: int = 23, echo_pin: int = 24, gpio=None,
+                 timeout: float = 0.1, settle_time: float = 0.1,
+                 min_distance: float = 0.02, max_distance: float = 4.0,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize ultrasonic sensor.
+
+        Args:
+            trig_pin: BCM pin wired to TRIG
+            echo_pin: BCM pin wired to ECHO (through a voltage divider)
+            gpio: GPIO backend (RPi.GPIO if None, or a FakeGPIO)
+            timeout: Seconds to wait for a complete echo
+            settle_time: Seconds to let the sensor settle after setup
+            min_distance: Shortest valid reading in meters
+            max_distance: Longest valid reading in meters
+            clock: Edge timestamp source in seconds (the GPIO backend's own
+                clock if it has one, such as FakeGPIO's, else time.perf_counter)
+        """
+        self.trig_pin = trig_pin
+        self.echo_pin = echo_pin
+        self.gpio = gpio if gpio is not None else GPIO
+        self.clock = clock or getattr(self.gpio, "clock", time.perf_counter)
+        self.timeout = timeout
+        self.settle_time = settle_time
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.ready = False
+        self.last_pulse: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.pulses: List[Optional[float]] = []
+        self.record = False
+        self.stats = {"readings": 0, "no_echo": 0, "stuck_high": 0, "out_of_range": 0}
+        self._rise: Optional[float] = None
+        self._fall: Optional[float] = None
+        self._echo = threading.Event()
+        self._lock = threading.Lock()
+
+    def setup(self) -> bool:
+        """
+        Configure the pins and register the echo edge callback.
+
+        Returns:
+            True if the sensor is ready
+        """
+        if self.gpio is None:
+            logger.warning("Ultrasonic sensor not available (RPi.GPIO missing)")
+            return False
+
+        try:
+            self.gpio.setmode(self.gpio.BCM)
+            self.gpio.setup(self.trig_pin, self.gpio.OUT)
+            self.gpio.setup(self.echo_pin, self.gpio.IN)
+            self.gpio.output(self.trig_pin, False)
+            self.gpio.add_event_detect(self.echo_pin, self.gpio.BOTH, callback=self._on_edge)
+            time.sleep(self.settle_time)
+            self.ready = True
+            logger.info(f"Ultrasonic sensor initialized on GPIO {self.trig_pin} (TRIG) "
+                        f"and {self.echo_pin} (ECHO)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to setup ultrasonic sensor: {e}")
+            return False
+
+    def measure(self) -> Optional[float]:
+        """
+        Trigger one measurement and wait for its echo.
+
+        Returns:
+            Distance in meters, or None if there was no valid echo
+            (the reason is left in ``last_error``)
+        """
+        if not self.ready:
+            return None
+
+        with self._lock:
+            # Edges are told apart by order, so the line must start low
+            if self.gpio.input(self.echo_pin):
+                return self._fail("stuck_high")
+
+            self._rise = None
+            self._fall = None
+            self._echo.clear()
+
+            # 10 us trigger pulse
+            self.gpio.output(self.trig_pin, True)
+            time.sleep(0.00001)
+            self.gpio.output(self.trig_pin, False)
+
+            if not self._echo.wait(self.timeout):
+                stuck = self.gpio.input(self.echo_pin)
+                return self._fail("stuck_high" if stuck else "no_echo")
+
+            pulse = self._fall - self._rise
+            self.last_pulse = pulse
+            if self.record:
+                self.pulses.append(pulse)
+
+            distance = pulse_to_distance(pulse)
+            if not self.min_distance <= distance <= self.max_distance:
+                return self._fail("out_of_range", recorded=True)
+
+            self.stats["readings"] += 1
+            self.last_error = None
+            return distance
+
+    def reset_echo(self):
+        """Pull a stuck-high echo line low and re-arm edge detection."""
+        try:
+            self.gpio.remove_event_detect(self.echo_pin)
+            self.gpio.setup(self.echo_pin, self.gpio.OUT)
+            self.gpio.output(self.echo_pin, False)
+            time.sleep(0.01)
+            self.gpio.setup(self.echo_pin, self.gpio.IN)
+            self.gpio.add_event_detect(self.echo_pin, self.gpio.BOTH, callback=self._on_edge)
+        except Exception as e:
+            logger.error(f"Failed to reset ECHO pin: {e}")
+
+    def save_recording(self, path: str):
+        """
+        Write the recorded pulse widths for replay with FakeGPIO.load().
+
+        Args:
+            path: Output JSON file
+        """
+        with open(Path(path).expanduser(), 'w') as f:
+            json.dump({"pulses": self.pulses}, f)
+
+    def close(self):
+        """Release the GPIO pins."""
+        if not self.ready:
+            return
+        try:
+            self.gpio.remove_event_detect(self.echo_pin)
+            self.gpio.cleanup([self.trig_pin, self.echo_pin])
+        except Exception as e:
+            logger.error(f"Error cleaning up ultrasonic sensor: {e}")
+        self.ready = False
+
+    def _fail(self, reason: str, recorded: bool = False) -> None:
+        """Record a failed measurement."""
+        if self.record and not recorded:
+            self.pulses.append(None if reason == "no_echo" else float("inf"))
+        self.stats[reason] += 1
+        self.last_error = reason
+        return None
+
+    def _on_edge(self, channel: int):
+        """Timestamp echo edges (called from the GPIO callback thread)."""
+        now = self.clock()
+        # The callback runs some time after the edge, and for a short echo the
+        # pin has already fallen again, so the first edge after the trigger is
+        # the rise and the second the fall, whatever the pin reads now
+        if self._rise is None:
+            self._rise = now
+        elif self._fall is None:
+            self._fall = now
+            self._echo.set()
+
+
+ACTIVATE = "activate"
+DEACTIVATE = "deactivate"
+
+
+class PresenceEstimator:
+    """
+    Turns raw distance readings into clean presence events.
+
+    Readings pass through a median filter (rejects single-sample spikes)
+    and an exponential moving average, then enter/exit thresholds with a
+    hysteresis gap decide presence. The sampling interval adapts to the
+    filtered distance: slow while the range is clear, fast as something
+    approaches or is present.
+    """
+
+    def __init__(self, sensor: Optional[UltrasonicSensor] = None,
+                 enter_distance: float = 1.0, exit_distance: float = 1.2,
+                 window: int = 5, alpha: float = 0.5,
+                 active_interval: float = 0.1, idle_interval: float = 0.5,
+                 approach_distance: float = 2.5, clear_distance: float = 4.0):
+        """
+        Initialize presence estimator.
+
+        Args:
+            sensor: Sensor sampled by start() (None to feed update() directly)
+            enter_distance: Filtered distance at or below which presence starts
+            exit_distance: Filtered distance above which presence ends
+            window: Median filter length in samples
+            alpha: EMA weight of the newest median (1.0 disables smoothing)
+            active_interval: Seconds between samples when something is near
+            idle_interval: Seconds between samples when the range is clear
+            approach_distance: Distance from which sampling speeds up
+            clear_distance: Distance assumed for readings without an echo
+        """
+        self.sensor = sensor
+        self.enter_distance = enter_distance
+        self.exit_distance = max(exit_distance, enter_distance)
+        self.window = max(1, window)
+        self.alpha = alpha
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.approach_distance = max(approach_distance, self.exit_distance)
+        self.clear_distance = clear_distance
+        self.present = False
+        self.distance: Optional[float] = None
+        self._samples: List[float] = []
+        self._subscribers: List[Callable[[str, float], None]] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback: Callable[[str, float], None]):
+        """
+        Register a presence event handler.
+
+        Args:
+            callback: Called with (ACTIVATE or DEACTIVATE, filtered distance)
+        """
+        self._subscribers.append(callback)
+
+    def update(self, reading: Optional[float]) -> Optional[str]:
+        """
+        Feed one raw reading.
+
+        Args:
+            reading: Distance in meters, or None if there was no echo
+
+        Returns:
+            ACTIVATE or DEACTIVATE if presence changed, otherwise None
+        """
+        self._samples.append(self.clear_distance if reading is None else reading)
+        del self._samples[:-self.window]
+        median = sorted(self._samples)[len(self._samples) // 2]
+
+        if self.distance is None:
+            self.distance = median
+        else:
+            self.distance += self.alpha * (median - self.distance)
+
+        event = None
+        if not self.present and self.distance <= self.enter_distance:
+            self.present = True
+            event = ACTIVATE
+        elif self.present and self.distance > self.exit_distance:
+            self.present = False
+            event = DEACTIVATE
+
+        if event:
+            logger.info(f"Presence {event} at {self.distance:.2f}m")
+            for callback in self._subscribers:
+                try:
+                    callback(event, self.distance)
+                except Exception as e:
+                    logger.error(f"Presence subscriber failed: {e}")
+        return event
+
+    def next_interval(self) -> float:
+        """
+        Get the delay before the next sample.
+
+        Returns:
+            active_interval while present, idle_interval beyond
+            approach_distance, and a linear ramp in between
+        """
+        if self.present or self.distance is None:
+            return self.active_interval
+        if self.distance >= self.approach_distance:
+            return self.idle_interval
+
+        span = self.approach_distance - self.exit_distance
+        fraction = 0.0 if span <= 0 else max(0.0, self.distance - self.exit_distance) / span
+        return self.active_interval + fraction * (self.idle_interval - self.active_interval)
+
+    def start(self):
+        """Sample the sensor in a background thread."""
+        if self.sensor is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="presence", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sampling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self):
+        """Sampling loop."""
+        while not self._stop.is_set():
+            self.update(self.sensor.measure())
+            self._stop.wait(self.next_interval())
@@ -0,0 +1,59 @@
+"""
+Tests for the announcement queue.
+"""
+
+import time
+from pi_detector.announcements import PRIORITY_HIGH, PRIORITY_NORMAL, AnnouncementQueue
+
+
+class TestAnnouncementQueue:
+    """Test cases for AnnouncementQueue."""
+
+    def test_identical_messages_coalesce(self):
+        """Test duplicate pending messages are merged."""
+        q = AnnouncementQueue()
+        q.put("Dog detected")
+        q.put("Dog detected")
+
+        assert len(q) == 1
+        assert q.stats()["coalesced"] == 1
+
+    def test_person_jumps_ahead(self):
+        """Test high priority messages are delivered first."""
+        q = AnnouncementQueue()
+        q.put("Dog detected", PRIORITY_NORMAL)
+        q.put("Cat detected", PRIORITY_NORMAL)
+        q.put("Human detected", PRIORITY_HIGH)
+
+        assert [q.get(0), q.get(0), q.get(0)] == ["Human detected", "Dog detected", "Cat detected"]
+
+    def test_stale_messages_dropped(self):
+        """Test messages older than max_age are never delivered."""
+        q = AnnouncementQueue(max_age=0.01)
+        q.put("Dog detected")
+        time.sleep(0.02)
+
+        assert q.get(0) is None
+        assert q.stats()["dropped_stale"] == 1
+
+    def test_depth_is_capped(self):
+        """Test a full queue drops normal messages but admits high priority ones."""
+        q = AnnouncementQueue(max_depth=2)
+        q.put("Dog detected")
+        q.put("Cat detected")
+
+        assert q.put("Bird detected") is False
+        assert q.put("Human detected", PRIORITY_HIGH) is True
+
+        stats = q.stats()
+        assert stats["depth"] == 2
+        assert stats["dropped_full"] == 2
+        assert q.get(0) == "Human detected"
+        assert q.get(0) == "Dog detected"
+
+    def test_close_wakes_consumer(self):
+        """Test get() returns None once the queue is closed."""
+        q = AnnouncementQueue()
+        q.close()
+        assert q.get(timeout=1.0) is None
+        assert q.put("Dog detected") is False
@@ -0,0 +1,45 @@
+"""
+Tests for the audio output system.
+"""
+
+import time
+
+from pi_detector import audio as audio_module
+from pi_detector.audio import AudioOutputSystem
+
+
+class TestAudioOutputSystem:
+    """Test cases for AudioOutputSystem."""
+
+    def test_espeak_fallback(self, monkeypatch):
+        """Test queued messages are spoken with espeak when pyttsx3 is missing."""
+        spoken = []
+        monkeypatch.setattr(audio_module, "PYTTSX3_AVAILABLE", False)
+        monkeypatch.setattr(audio_module.shutil, "which",
+                            lambda name: "/usr/bin/espeak" if name == "espeak" else None)
+        monkeypatch.setattr(audio_module.subprocess, "run",
+                            lambda cmd, **kwargs: spoken.append(cmd))
+
+        audio = AudioOutputSystem(volume=50, rate=120)
+        try:
+            assert audio.is_available()
+            audio.speak("Human detected")
+            deadline = time.monotonic() + 2.0
+            while not spoken and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            audio.close()
+
+        assert spoken == [["/usr/bin/espeak", "-s", "120", "-a", "100", "Human detected"]]
+
+    def test_unavailable_without_engines(self, monkeypatch):
+        """Test speech is only logged when no synthesizer is installed."""
+        monkeypatch.setattr(audio_module, "PYTTSX3_AVAILABLE", False)
+        monkeypatch.setattr(audio_module.shutil, "which", lambda name: None)
+
+        audio = AudioOutputSystem()
+        assert not audio.is_available()
+        assert audio.worker_thread is None
+        audio.speak("Human detected")
+        assert audio.queue_stats()["enqueued"] == 0
+        audio.close()
@@ -0,0 +1,28 @@
+"""
+Tests for the out-of-process audio server.
+"""
+
+from pi_detector.audio_server import AudioServerProcess
+
+
+class TestAudioServer:
+    """Test cases for AudioServerProcess."""
+
+    def test_speak_and_respawn(self):
+        """Test the worker speaks, answers pings and is respawned after dying."""
+        server = AudioServerProcess(respawn_delay=0.0, health_timeout=10.0)
+        server.start()
+        try:
+            assert server.check_health()
+            assert server.speak_sync("Human detected")
+
+            server.process.kill()
+            server.process.join()
+            assert not server.is_alive()
+
+            assert server.speak_sync("Dog detected")
+            assert server.respawns == 1
+        finally:
+            server.close()
+
+        assert not server.is_alive()
@@ -0,0 +1,186 @@
+"""
+Tests for inference backends and backend selection.
+"""
+
+import numpy as np
+import pytest
+from pi_detector import backends
+from pi_detector.backends import InferenceBackend, StubBackend, select_backend
+from pi_detector.detector import ObjectDetector
+
+
+class FakeBackend(InferenceBackend):
+    """Backend with a configurable fixed latency."""
+
+    name = "fake"
+    suffixes = (".bin",)
+    delay = 0.0
+
+    def invoke(self, input_data):
+        import time
+        time.sleep(self.delay)
+        return StubBackend().invoke(input_data)
+
+
+class SlowBackend(FakeBackend):
+    name = "slow"
+    delay = 0.005
+
+
+class FastBackend(FakeBackend):
+    name = "fast"
+    delay = 0.0
+
+
+@pytest.fixture
+def fake_backends(monkeypatch):
+    monkeypatch.setitem(backends.BACKENDS, "slow", SlowBackend)
+    monkeypatch.setitem(backends.BACKENDS, "fast", FastBackend)
+
+
+class TestBackends:
+    """Test cases for backend selection."""
+
+    def test_stub_backend_detector(self):
+        """Test detector runs end to end on the stub backend."""
+        detector = ObjectDetector("missing.tflite", backend="stub")
+        assert detector.backend.name == "stub"
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        assert detector.detect(frame) == []
+
+    def test_benchmark_picks_fastest_and_caches(self, fake_backends, tmp_path):
+        """Test benchmark selects the fastest backend and caches the choice."""
+        model = tmp_path / "model.bin"
+        model.write_bytes(b"model")
+
+        backend = select_backend(str(model), candidates=["slow", "fast"],
+                                 benchmark=True, cache_dir=str(tmp_path))
+        assert backend.name == "fast"
+        assert (tmp_path / "backends.json").exists()
+
+        # A cached choice is reused even if it is listed last
+        FastBackend.delay = 0.01
+        try:
+            backend = select_backend(str(model), candidates=["slow", "fast"],
+                                     benchmark=True, cache_dir=str(tmp_path))
+        finally:
+            FastBackend.delay = 0.0
+        assert backend.name == "fast"
+
+    def test_unknown_backend_rejected(self):
+        """Test creating an unknown backend raises."""
+        with pytest.raises(ValueError):
+            backends.create_backend("nope", "model.tflite")
+
+
+class FakeInterpreter:
+    """Minimal stand-in for tflite.Interpreter; two threads is fastest."""
+
+    created = []
+
+    def __init__(self, model_path, num_threads=None, **kwargs):
+        self.num_threads = num_threads
+        FakeInterpreter.created.append(num_threads)
+
+    def allocate_tensors(self):
+        pass
+
+    def resize_tensor_input(self, index, shape):
+        pass
+
+    def get_input_details(self):
+        return [{'index': 0, 'shape': [1, 8, 8, 3], 'dtype': np.uint8}]
+
+    def get_output_details(self):
+        return [{'index': i} for i in range(3)]
+
+    def set_tensor(self, index, value):
+        pass
+
+    def invoke(self):
+        import time
+        time.sleep(0.0 if self.num_threads == 2 else 0.003)
+
+    def get_tensor(self, index):
+        return np.zeros((1, 1, 4))
+
+
+class TestTFLiteAutoTune:
+    """Test cases for TFLite thread auto-tuning."""
+
+    def test_auto_tune_caches_winner(self, monkeypatch, tmp_path):
+        """Test auto-tune picks the fastest setting and reuses it from cache."""
+        fake_tflite = type("tflite", (), {"Interpreter": FakeInterpreter})
+        monkeypatch.setattr(backends, "tflite", fake_tflite, raising=False)
+        monkeypatch.setattr(backends.os, "cpu_count", lambda: 4)
+        model = tmp_path / "model.tflite"
+        model.write_bytes(b"model")
+
+        FakeInterpreter.created = []
+        backend = backends.TFLiteBackend(str(model), auto_tune=True, cache_dir=str(tmp_path))
+        assert backend.num_threads == 2
+        assert len(FakeInterpreter.created) > 1
+
+        FakeInterpreter.created = []
+        backend = backends.TFLiteBackend(str(model), auto_tune=True, cache_dir=str(tmp_path))
+        assert backend.num_threads == 2
+        assert FakeInterpreter.created == [2]
+
+        # Settings timed for one input size are not reused for another
+        FakeInterpreter.created = []
+        backend = backends.TFLiteBackend(str(model), auto_tune=True, cache_dir=str(tmp_path),
+                                         input_size=(8, 8))
+        assert len(FakeInterpreter.created) > 1
+
+    def test_auto_tune_keeps_explicit_threads(self, monkeypatch, tmp_path):
+        """Test an explicit thread count is never overridden by tuning."""
+        fake_tflite = type("tflite", (), {"Interpreter": FakeInterpreter})
+        monkeypatch.setattr(backends, "tflite", fake_tflite, raising=False)
+        monkeypatch.setattr(backends.os, "cpu_count", lambda: 4)
+        model = tmp_path / "model.tflite"
+        model.write_bytes(b"model")
+
+        FakeInterpreter.created = []
+        backend = backends.TFLiteBackend(str(model), num_threads=4, auto_tune=True,
+                                         cache_dir=str(tmp_path))
+        assert backend.num_threads == 4
+        assert set(FakeInterpreter.created) == {4}
+
+
+class TestSyntheticBackend:
+    """Test cases for the synthetic backend."""
+
+    def test_same_seed_replays_stream(self):
+        """Test two backends with the same seed emit identical streams."""
+        frame = np.zeros((1, 300, 300, 3), dtype=np.uint8)
+        first = backends.SyntheticBackend(seed=7, spawn_rate=0.5)
+        second = backends.SyntheticBackend(seed=7, spawn_rate=0.5)
+
+        for _ in range(50):
+            for a, b in zip(first.invoke(frame), second.invoke(frame)):
+                assert np.array_equal(a, b)
+
+    def test_scripted_stream_through_detector(self):
+        """Test scripted frames come out of the detector in order."""
+        script = [
+            [],
+            [{"class_id": 16, "score": 0.9, "bbox": [0.1, 0.1, 0.5, 0.5]}],
+        ]
+        detector = ObjectDetector("missing.tflite", backend="synthetic",
+                                  backend_options={"synthetic": {"script": script}})
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+        assert detector.detect(frame) == []
+        detections = detector.detect(frame)
+        assert [d['class'] for d in detections] == ["dog"]
+        assert detector.detect(frame) == []
+
+    def test_latency_is_clamped(self):
+        """Test sampled latencies respect the configured bounds."""
+        model = backends.LatencyModel("normal", mean_ms=50, std_ms=30,
+                                      min_ms=40, max_ms=60,
+                                      rng=np.random.default_rng(0))
+        samples = [model.sample() for _ in range(200)]
+        assert min(samples) >= 0.040
+        assert max(samples) <= 0.060
@@ -0,0 +1,61 @@
+"""
+Tests for the object detector.
+"""
+
+import numpy as np
+from pi_detector.backends import StubBackend
+from pi_detector.detector import ObjectDetector
+
+
+class FixedBackend(StubBackend):
+    """Stub backend that reports one fixed detection."""
+
+    def __init__(self, box, class_id=0, score=0.9):
+        super().__init__()
+        self.box = box
+        self.class_id = class_id
+        self.score = score
+        self.calls = 0
+
+    def invoke(self, input_data):
+        self.calls += 1
+        outputs = super().invoke(input_data)
+        outputs[0][0, 0] = self.box
+        outputs[1][0, 0] = self.class_id
+        outputs[2][0, 0] = self.score
+        return outputs
+
+
+def make_detector(backend, **kwargs):
+    detector = ObjectDetector("unused.tflite", backend="stub", **kwargs)
+    detector.backend = backend
+    return detector
+
+
+class TestCascade:
+    """Test cases for cascade mode."""
+
+    def test_empty_screen_skips_main_model(self):
+        """Test the main model does not run when screening finds nothing."""
+        screen = make_detector(StubBackend())
+        main_backend = FixedBackend([0.0, 0.0, 1.0, 1.0])
+        detector = make_detector(main_backend, screen_detector=screen)
+
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        assert detector.detect(frame) == []
+        assert main_backend.calls == 0
+
+    def test_crop_boxes_mapped_to_frame(self):
+        """Test detections on the crop are mapped back to frame coordinates."""
+        screen = make_detector(FixedBackend([0.4, 0.4, 0.6, 0.6], score=0.4),
+                               confidence_threshold=0.3)
+        main_backend = FixedBackend([0.0, 0.0, 1.0, 1.0])
+        detector = make_detector(main_backend, screen_detector=screen,
+                                 crop_margin=0.5, min_crop_fraction=0.0)
+
+        frame = np.zeros((400, 400, 3), dtype=np.uint8)
+        detections = detector.detect(frame)
+
+        assert main_backend.calls == 1
+        assert len(detections) == 1
+        assert np.allclose(detections[0]['bbox'], [0.3, 0.3, 0.7, 0.7], atol=1e-2)
@@ -0,0 +1,251 @@
+"""
+Tests for offline evaluation.
+"""
+
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from pi_detector import evaluate as evaluate_module
+from pi_detector.backends import StubBackend
+from pi_detector.detector import ObjectDetector
+from pi_detector.evaluate import (
+    average_precision, decode_image, evaluate, format_report, image_size, iter_images,
+    reduction_for
+)
+
+BOX = [0.25, 0.25, 0.75, 0.75]
+
+
+class PersonBackend(StubBackend):
+    """Stub backend that always sees a person in the middle of the frame."""
+
+    def invoke(self, input_data):
+        outputs = super().invoke(input_data)
+        outputs[0][0, 0] = BOX
+        outputs[2][0, 0] = 0.9
+        return outputs
+
+
+class FailingBackend(PersonBackend):
+    """Stub backend whose every other call fails."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def invoke(self, input_data):
+        self.calls += 1
+        if self.calls % 2 == 0:
+            raise RuntimeError("delegate error")
+        return super().invoke(input_data)
+
+
+class FakeResult:
+    """Async result that runs its task when collected."""
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+    def get(self):
+        return self.func(*self.args)
+
+
+class FakePool:
+    """Inline process pool that records how many tasks were submitted."""
+
+    def __init__(self, workers):
+        self.submitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def apply_async(self, func, args):
+        self.submitted += 1
+        return FakeResult(func, args)
+
+
+@pytest.fixture
+def detector():
+    detector = ObjectDetector("unused.tflite", backend="stub")
+    detector.backend = PersonBackend()
+    return detector
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Two 640x480 images, each with a centred person; the second also has a cat."""
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    for name in ("a.jpg", "b.png"):
+        cv2.imwrite(str(images_dir / name), np.full((480, 640, 3), 128, dtype=np.uint8))
+
+    coco = {
+        "images": [
+            {"id": 1, "file_name": "a.jpg", "width": 640, "height": 480},
+            {"id": 2, "file_name": "b.png", "width": 640, "height": 480},
+        ],
+        "categories": [{"id": 1, "name": "person"}, {"id": 17, "name": "cat"}],
+        "annotations": [
+            {"image_id": 1, "category_id": 1, "bbox": [160, 120, 320, 240]},
+            {"image_id": 2, "category_id": 1, "bbox": [160, 120, 320, 240]},
+            {"image_id": 2, "category_id": 17, "bbox": [0, 0, 50, 50]},
+            {"image_id": 2, "category_id": 17, "bbox": [0, 0, 640, 480], "iscrowd": 1},
+        ],
+    }
+    annotations = tmp_path / "instances.json"
+    annotations.write_text(json.dumps(coco))
+    return images_dir, annotations
+
+
+class TestAveragePrecision:
+    """Test cases for the AP computation."""
+
+    def test_perfect_and_missed(self):
+        """Test exact matches score 1 and a class never detected scores 0."""
+        truth = {1: np.array([BOX], dtype=np.float32)}
+        predictions = [(0.9, 1, np.array(BOX, dtype=np.float32))]
+
+        assert average_precision(predictions, truth, 0.5) == pytest.approx(1.0)
+        assert average_precision([], truth, 0.5) == 0.0
+
+    def test_false_positive_ranked_first(self):
+        """Test a higher-scored false positive halves precision at full recall."""
+        truth = {1: np.array([BOX], dtype=np.float32)}
+        predictions = [
+            (0.9, 1, np.array([0.0, 0.0, 0.1, 0.1], dtype=np.float32)),
+            (0.8, 1, np.array(BOX, dtype=np.float32)),
+        ]
+
+        assert average_precision(predictions, truth, 0.5) == pytest.approx(0.5)
+
+    def test_duplicates_match_once(self):
+        """Test a second detection of the same object is a false positive."""
+        truth = {1: np.array([BOX], dtype=np.float32)}
+        box = np.array(BOX, dtype=np.float32)
+        predictions = [(0.9, 1, box), (0.8, 1, box)]
+
+        assert average_precision(predictions, truth, 0.5) == pytest.approx(1.0)
+        # With a second image the duplicate cannot count for it: recall stops at 0.5,
+        # so 51 of the 101 recall points have precision 1
+        two_images = {1: truth[1], 2: truth[1]}
+        assert average_precision(predictions, two_images, 0.5) == pytest.approx(51 / 101)
+
+
+class TestDecoding:
+    """Test cases for image decoding."""
+
+    def test_header_sizes(self, dataset):
+        """Test sizes are read from JPEG and PNG headers."""
+        images_dir, _ = dataset
+        assert image_size(str(images_dir / "a.jpg")) == (640, 480)
+        assert image_size(str(images_dir / "b.png")) == (640, 480)
+
+    def test_reduction_keeps_input_size(self):
+        """Test the reduction never shrinks the image below the model input."""
+        assert reduction_for((640, 480), (300, 300)) == 1
+        assert reduction_for((1280, 960), (300, 300)) == 2
+        assert reduction_for((4056, 3040), (300, 300)) == 8
+        assert reduction_for(None, (300, 300)) == 1
+
+    def test_decode_ahead_is_bounded(self, dataset, monkeypatch):
+        """Test workers decode only a few images ahead of the consumer."""
+        images_dir, _ = dataset
+        pools = []
+
+        class Context:
+            def Pool(self, workers):
+                pools.append(FakePool(workers))
+                return pools[-1]
+
+        monkeypatch.setattr(evaluate_module.multiprocessing, "get_context", lambda method: Context())
+        paths = [images_dir / "a.jpg"] * 20
+        frames = iter_images(paths, 2, 1, None)
+
+        index, _, image, _ = next(frames)
+        assert index == 0 and image is not None
+        assert pools[0].submitted == 4
+        assert [item[0] for item in frames] == list(range(1, 20))
+        assert pools[0].submitted == 20
+
+    def test_reduced_decode(self, dataset):
+        """Test automatic reduction decodes a smaller RGB image."""
+        images_dir, _ = dataset
+        index, _, image, seconds = decode_image((3, str(images_dir / "a.jpg"), "auto", (100, 100)))
+
+        assert index == 3
+        assert image.shape == (120, 160, 3)
+        assert seconds > 0
+
+
+class TestEvaluate:
+    """Test cases for evaluate()."""
+
+    def test_images_with_ground_truth(self, detector, dataset):
+        """Test per-class AP, mAP and stage timings on an image directory."""
+        images_dir, annotations = dataset
+        report = evaluate(detector, str(images_dir), str(annotations), workers=0)
+
+        assert report['images'] == 2
+        assert report['detections'] == 2
+        assert report['classes']['person']['ap'] == pytest.approx(1.0)
+        assert report['classes']['cat']['ap'] == 0.0
+        assert report['classes']['cat']['instances'] == 1
+        assert report['map'] == pytest.approx(0.5)
+        assert set(report['stage_ms']) == {'decode', 'preprocess', 'inference', 'postprocess'}
+        assert "person" in format_report(report)
+
+    def test_worker_processes(self, detector, dataset):
+        """Test decoding in worker processes gives the same results."""
+        images_dir, annotations = dataset
+        report = evaluate(detector, str(images_dir), str(annotations), workers=1)
+
+        assert report['images'] == 2
+        assert report['map'] == pytest.approx(0.5)
+        json.dumps(report)
+
+    def test_truth_limited_to_evaluated_images(self, detector, dataset):
+        """Test images that were not run do not count as missed objects."""
+        images_dir, annotations = dataset
+        (images_dir / "b.png").unlink()
+        report = evaluate(detector, str(images_dir), str(annotations), workers=0)
+
+        assert report['images'] == 1
+        assert report['classes'] == {'person': {'ap': pytest.approx(1.0), 'ap50': pytest.approx(1.0),
+                                                'instances': 1}}
+        assert report['map'] == pytest.approx(1.0)
+
+    def test_limit(self, detector, dataset):
+        """Test a limit scores only the images it lets through."""
+        images_dir, annotations = dataset
+        report = evaluate(detector, str(images_dir), str(annotations), workers=0, limit=1)
+
+        assert report['images'] == 1
+        assert report['map'] == pytest.approx(1.0)
+
+    def test_detection_errors_skip_image(self, detector, dataset):
+        """Test a backend error skips that image instead of aborting the run."""
+        images_dir, annotations = dataset
+        detector.backend = FailingBackend()
+        report = evaluate(detector, str(images_dir), str(annotations), workers=0)
+
+        assert report['images'] == 1
+        assert report['errors'] == 1
+        assert report['map'] == pytest.approx(1.0)
+
+    def test_video(self, detector, tmp_path):
+        """Test every frame of a video is evaluated, up to the limit."""
+        path = tmp_path / "clip.avi"
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+        for _ in range(5):
+            writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        writer.release()
+
+        assert evaluate(detector, str(path))['images'] == 5
+        assert evaluate(detector, str(path), limit=3)['images'] == 3
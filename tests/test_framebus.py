@@ -0,0 +1,110 @@
+"""
+Tests for the shared-memory frame bus.
+"""
+
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from pi_detector.framebus import FrameBus
+
+SHAPE = (48, 64, 3)
+
+
+def frame_of(number):
+    return np.full(SHAPE, number % 256, dtype=np.uint8)
+
+
+def consume(name, count, results):
+    """Reader process: check every frame it sees is whole and matches its number."""
+    bus = FrameBus(name, create=False)
+    last, seen, torn = 0, 0, 0
+    while seen < count:
+        result = bus.wait(last, timeout=5.0)
+        if result is None:
+            break
+        last, _, frame = result
+        if frame.min() != frame.max() or frame[0, 0, 0] != last % 256:
+            torn += 1
+        seen += 1
+    frame = result = None
+    bus.close()
+    results.put((seen, torn))
+
+
+@pytest.fixture
+def bus():
+    frame_bus = FrameBus(shape=SHAPE, slots=4)
+    yield frame_bus
+    frame_bus.close()
+
+
+class TestFrameBus:
+    """Test cases for FrameBus."""
+
+    def test_publish_and_read(self, bus):
+        """Test the newest frame is returned once."""
+        assert bus.read() is None
+
+        bus.publish(frame_of(1), timestamp=10.0)
+        bus.publish(frame_of(2), timestamp=11.0)
+        number, timestamp, frame = bus.read()
+
+        assert (number, timestamp) == (2, 11.0)
+        assert np.array_equal(frame, frame_of(2))
+        assert bus.read(last=2) is None
+
+    def test_copy_is_private(self, bus):
+        """Test copies survive the slot being reused."""
+        bus.publish(frame_of(1))
+        number, _, frame = bus.read()
+        for n in range(2, 10):
+            bus.publish(frame_of(n))
+
+        assert frame[0, 0, 0] == 1
+
+    def test_zero_copy_validity(self, bus):
+        """Test a zero-copy view is reported stale once its slot is rewritten."""
+        bus.publish(frame_of(1))
+        number, _, view = bus.read(copy=False)
+
+        assert not view.flags.writeable
+        assert bus.valid(number)
+        for n in range(2, 2 + bus.slots):
+            bus.publish(frame_of(n))
+        assert not bus.valid(number)
+        view = None
+
+    def test_attach_by_name(self, bus):
+        """Test a reader attached by name sees the writer's shape and frames."""
+        reader = FrameBus(bus.name, create=False)
+        try:
+            assert reader.shape == SHAPE
+            assert reader.slots == 4
+            bus.publish(frame_of(7))
+            number, _, frame = reader.read()
+            assert number == 1 and frame[0, 0, 0] == 7
+            frame = None
+        finally:
+            reader.close()
+
+    def test_reader_process(self, bus):
+        """Test a reader in another process gets whole frames while the writer runs."""
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        process = context.Process(target=consume, args=(bus.name, 50, results))
+        process.start()
+
+        number = 0
+        deadline = time.monotonic() + 20.0
+        while process.is_alive() and time.monotonic() < deadline:
+            number += 1
+            bus.publish(frame_of(number))
+            time.sleep(0.001)
+        process.join(timeout=5.0)
+
+        seen, torn = results.get(timeout=5.0)
+        assert seen == 50
+        assert torn == 0
@@ -0,0 +1,105 @@
+"""
+Tests for presence gating.
+"""
+
+import datetime
+import threading
+import time
+
+import numpy as np
+
+from pi_detector.gating import MotionTrigger, PresenceGate, ScheduleTrigger, Trigger
+
+
+class ManualTrigger(Trigger):
+    """Trigger switched by the test."""
+
+    name = "manual"
+
+    def __init__(self):
+        super().__init__()
+        self.present = False
+
+    def is_present(self):
+        return self.present
+
+    def set(self, present):
+        self.present = present
+        if present:
+            self._notify()
+
+
+class TestTriggers:
+    """Test cases for the presence triggers."""
+
+    def test_schedule_windows(self):
+        """Test daily windows, including one that crosses midnight."""
+        clock = {"now": datetime.datetime(2024, 1, 1, 12, 0)}
+        trigger = ScheduleTrigger([["08:00", "18:00"], ["22:00", "02:00"]],
+                                  now=lambda: clock["now"])
+
+        assert trigger.is_present()
+        clock["now"] = datetime.datetime(2024, 1, 1, 20, 0)
+        assert not trigger.is_present()
+        clock["now"] = datetime.datetime(2024, 1, 2, 1, 30)
+        assert trigger.is_present()
+
+    def test_motion_from_frame_difference(self):
+        """Test a changed region counts as motion and a static scene does not."""
+        trigger = MotionTrigger(min_area=0.05)
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+        trigger.observe(frame)
+        trigger.observe(frame.copy())
+        assert not trigger.is_present()
+
+        moved = frame.copy()
+        moved[60:180, 80:240] = 255
+        trigger.observe(moved)
+        assert trigger.is_present()
+
+
+class TestPresenceGate:
+    """Test cases for PresenceGate."""
+
+    def test_standby_blocks_until_trigger(self):
+        """Test wait() sleeps in standby and wakes promptly on presence."""
+        trigger = ManualTrigger()
+        gate = PresenceGate([trigger], hold_time=0.0, max_wake_latency=5.0)
+        transitions = []
+        gate.subscribe(transitions.append)
+        result = {}
+
+        def consumer():
+            start = time.monotonic()
+            result["active"] = gate.wait()
+            result["elapsed"] = time.monotonic() - start
+
+        thread = threading.Thread(target=consumer)
+        thread.start()
+        time.sleep(0.1)
+        assert thread.is_alive()
+
+        trigger.set(True)
+        thread.join(timeout=1.0)
+        assert result["active"] is True
+        assert 0.1 <= result["elapsed"] < 1.0
+        assert transitions == [True]
+
+    def test_hold_time_and_probe_frames(self):
+        """Test the gate stays active for hold_time, then asks for probe frames."""
+        trigger = MotionTrigger(hold_time=0.0)
+        gate = PresenceGate([trigger], hold_time=0.2, standby_fps=100.0)
+        gate._last_present = time.monotonic()
+
+        assert gate.wait() is True
+        time.sleep(0.25)
+        assert gate.wait() is False
+        assert not gate.active
+
+    def test_close_releases_waiter(self):
+        """Test close() wakes a blocked wait()."""
+        gate = PresenceGate([ManualTrigger()], max_wake_latency=5.0)
+        threading.Timer(0.05, gate.close).start()
+
+        assert gate.wait() is False
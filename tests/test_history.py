@@ -0,0 +1,155 @@
+"""
+Tests for the detection history store.
+"""
+
+import datetime
+import os
+import sqlite3
+import time
+
+import pytest
+
+from pi_detector.history import DetectionHistory, parse_time
+
+
+def at(hour, minute=0, day=1):
+    """Unix time of a local time of day in January 2024."""
+    return datetime.datetime(2024, 1, day, hour, minute).timestamp()
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = DetectionHistory(str(tmp_path / "history.db"), batch_size=10,
+                             flush_interval=0.05, retention_days=None, max_rows=None)
+    yield store
+    store.close()
+
+
+class TestDetectionHistory:
+    """Test cases for DetectionHistory."""
+
+    def test_record_and_count(self, history):
+        """Test that queued events are written and counted by class and time."""
+        for hour in (1, 2, 3, 3, 5):
+            history.record("dog", 0.9, (0.1, 0.2, 0.3, 0.4), timestamp=at(hour, 30))
+        history.record("cat", 0.8, timestamp=at(3))
+        assert history.flush()
+
+        assert history.written == 6
+        assert history.count() == 6
+        assert history.count("dog") == 5
+        assert history.count("dog", start=at(2), end=at(4)) == 3
+        assert history.summary(start=at(2), end=at(4)) == {"dog": 3, "cat": 1}
+
+    def test_daily_window(self, history):
+        """Test the time-of-day filter across several days and past midnight."""
+        for day in (1, 2, 3):
+            history.record("dog", 0.9, timestamp=at(2, 30, day))
+            history.record("dog", 0.9, timestamp=at(12, 0, day))
+            history.record("dog", 0.9, timestamp=at(23, 30, day))
+        assert history.flush()
+
+        assert history.count("dog", daily=("02:00", "04:00")) == 3
+        assert history.count("dog", daily=("22:00", "04:00")) == 6
+        assert history.count("dog", start=at(0, 0, 2), daily=("02:00", "04:00")) == 2
+
+    def test_query_newest_first(self, history):
+        """Test listing events with their boxes."""
+        history.record("bird", 0.6, timestamp=at(1))
+        history.record("bird", 0.7, (0.1, 0.2, 0.3, 0.4), timestamp=at(2))
+        assert history.flush()
+
+        events = history.query("bird", limit=1)
+        assert len(events) == 1
+        assert events[0]['timestamp'] == at(2)
+        assert events[0]['box'] == pytest.approx((0.1, 0.2, 0.3, 0.4))
+
+    def test_full_queue_drops(self, tmp_path):
+        """Test that record() never blocks when the buffer is full."""
+        store = DetectionHistory(str(tmp_path / "history.db"), max_pending=1)
+        store._queue.put(object())  # Occupy the only slot
+        try:
+            assert not store.record("dog", 0.9)
+            assert store.dropped == 1
+        finally:
+            store._queue.get_nowait()
+            store.close()
+
+    def test_compact(self, tmp_path):
+        """Test that old and excess events are removed."""
+        store = DetectionHistory(str(tmp_path / "history.db"), flush_interval=0.05,
+                                 retention_days=1, max_rows=3)
+        now = time.time()
+        store.record("dog", 0.9, timestamp=now - 3 * 86400)
+        for i in range(5):
+            store.record("cat", 0.9, timestamp=now - i)
+        assert store.flush()
+
+        assert store.compact() == 3
+        assert store.summary() == {"cat": 3}
+        store.close()
+
+    def test_compact_shrinks_file(self, tmp_path):
+        """Test that incremental vacuum is enabled and compact() returns space to the filesystem."""
+        path = tmp_path / "history.db"
+        store = DetectionHistory(str(path), batch_size=500, flush_interval=0.05,
+                                 retention_days=1, max_rows=None)
+        for i in range(5000):
+            store.record("dog", 0.9, (0.1, 0.2, 0.3, 0.4), timestamp=1000.0 + i)
+        assert store.flush()
+        conn = sqlite3.connect(str(path))
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.close()
+        size = os.path.getsize(path)
+
+        assert store.compact() == 5000
+        assert os.path.getsize(path) < size / 2
+        store.close()
+
+    def test_converts_database_without_auto_vacuum(self, tmp_path):
+        """Test that a database created without auto_vacuum is converted on open."""
+        path = str(tmp_path / "history.db")
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE detections (id INTEGER PRIMARY KEY, ts REAL NOT NULL, "
+                     "class TEXT NOT NULL, confidence REAL NOT NULL, x REAL, y REAL, w REAL, h REAL)")
+        conn.close()
+
+        DetectionHistory(path).close()
+        conn = sqlite3.connect(path)
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that events written before close() are readable later."""
+        path = str(tmp_path / "history.db")
+        store = DetectionHistory(path, retention_days=None)
+        store.record("person", 0.95, timestamp=at(8))
+        store.close()
+
+        reopened = DetectionHistory(path, retention_days=None)
+        assert reopened.count("person") == 1
+        reopened.close()
+
+
+class TestParseTime:
+    """Test cases for parse_time."""
+
+    NOW = datetime.datetime(2024, 1, 2, 10, 0)
+
+    def test_relative(self):
+        """Test ages such as 2h and 7d."""
+        assert parse_time("2h", self.NOW) == at(8, 0, 2)
+        assert parse_time("1d", self.NOW) == at(10, 0, 1)
+
+    def test_time_of_day(self):
+        """Test that HH:MM means the most recent past occurrence."""
+        assert parse_time("02:00", self.NOW) == at(2, 0, 2)
+        assert parse_time("22:00", self.NOW) == at(22, 0, 1)
+
+    def test_iso(self):
+        """Test ISO date/time values and rejection of other text."""
+        assert parse_time("2024-01-01T02:30", self.NOW) == at(2, 30)
+        with pytest.raises(ValueError):
+            parse_time("yesterday", self.NOW)
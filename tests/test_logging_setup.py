@@ -0,0 +1,84 @@
+"""
+Tests for the logging pipeline.
+"""
+
+import logging
+import time
+
+from pi_detector.logging_setup import LogPipeline, RateLimitFilter
+
+
+def make_record(msg="Failed to capture frame", lineno=10, **extra):
+    record = logging.LogRecord("pi_detector.test", logging.WARNING, "main.py", lineno, msg, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestRateLimitFilter:
+    """Test cases for RateLimitFilter."""
+
+    def test_burst_then_suppress(self):
+        """Test that records beyond the burst are dropped and counted."""
+        rate_filter = RateLimitFilter(interval=60.0, burst=3)
+        passed = [rate_filter.filter(make_record()) for _ in range(10)]
+
+        assert passed == [True] * 3 + [False] * 7
+        assert rate_filter.suppressed_total == 7
+
+    def test_keys_are_separate(self):
+        """Test that call sites and explicit keys are limited independently."""
+        rate_filter = RateLimitFilter(interval=60.0, burst=1)
+        assert rate_filter.filter(make_record(lineno=1))
+        assert rate_filter.filter(make_record(lineno=2))
+        assert not rate_filter.filter(make_record(lineno=2))
+        assert rate_filter.filter(make_record(lineno=2, rate_key="dog"))
+        assert rate_filter.filter(make_record(lineno=2, rate_limit=False))
+
+    def test_summary_after_window(self):
+        """Test that suppressed counts are reported when the window ends."""
+        rate_filter = RateLimitFilter(interval=0.05, burst=1)
+        for _ in range(5):
+            rate_filter.filter(make_record())
+        assert rate_filter.summaries() == []
+
+        time.sleep(0.06)
+        summaries = rate_filter.summaries()
+        assert len(summaries) == 1
+        assert summaries[0].getMessage() == "Suppressed 4 similar messages: Failed to capture frame"
+
+    def test_summary_on_next_record(self):
+        """Test that the first record of a new window carries the previous count."""
+        rate_filter = RateLimitFilter(interval=0.05, burst=1)
+        for _ in range(3):
+            rate_filter.filter(make_record())
+
+        time.sleep(0.06)
+        record = make_record()
+        assert rate_filter.filter(record)
+        assert record.getMessage() == "Failed to capture frame (suppressed 2 similar messages)"
+
+
+class TestLogPipeline:
+    """Test cases for LogPipeline."""
+
+    def test_writes_file_in_background(self, tmp_path):
+        """Test that records reach the log file, with floods summarised on stop."""
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        path = tmp_path / "test.log"
+        pipeline = LogPipeline(file=str(path), rate_interval=60.0, rate_burst=2).start()
+        try:
+            logger = logging.getLogger("pi_detector.test")
+            logger.info("Started")
+            for _ in range(50):
+                logger.warning("Failed to capture frame")
+        finally:
+            pipeline.stop()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 4
+        assert lines[0].endswith("Started")
+        assert lines[-1].endswith("Suppressed 48 similar messages: Failed to capture frame")
@@ -2,9 +2,16 @@
 Tests for the main Pi Detector application.
 """
 
+import argparse
+import json
+
+import cv2
+import numpy as np
 import pytest
 from unittest.mock import Mock, patch
-from pi_detector.main import PiDetectorApp
+from pi_detector.announcements import PRIORITY_HIGH
+from pi_detector.config import Config
+from pi_detector.main import PiDetectorApp, create_detector, eval_command
 
 
 class TestPiDetectorApp:
@@ -40,3 +47,161 @@ class TestPiDetectorApp:
         assert mock_camera.called
         assert mock_detector.called
         assert mock_audio.called
+    
+    def test_format_summary_message(self):
+        """Test a frame's detections are summarised in one sentence."""
+        app = PiDetectorApp()
+        
+        assert app._format_summary_message({"person": 1}) == "Human detected"
+        assert app._format_summary_message({"dog": 2, "person": 1}) == "Two dogs and a person"
+        assert app._format_summary_message({"person": 3}) == "Three people detected"
+        assert app._format_summary_message(
+            {"cat": 1, "sheep": 4, "elephant": 1}) == "Four sheep, a cat and an elephant"
+    
+    def test_announce_speaks_once_per_frame(self):
+        """Test several classes in one frame produce a single utterance."""
+        app = PiDetectorApp()
+        app.audio = Mock()
+        app.audio.has_alert_sound.return_value = False
+        
+        app._announce({"dog": 2, "person": 1})
+        
+        app.audio.speak.assert_called_once()
+        message, priority = app.audio.speak.call_args[0]
+        assert message == "Two dogs and a person"
+        assert priority == PRIORITY_HIGH
+    
+    @patch('pi_detector.main.CameraHandler')
+    @patch('pi_detector.main.ObjectDetector')
+    @patch('pi_detector.main.AudioOutputSystem')
+    def test_multiple_cameras_share_detector(self, mock_audio, mock_detector, mock_camera):
+        """Test each configured camera is opened while one detector is loaded."""
+        app = PiDetectorApp()
+        app.config.set("cameras", [
+            {"name": "front", "device": 0},
+            {"name": "garden", "device": "/dev/video2", "max_fps": 5}
+        ])
+        
+        assert app.initialize() is True
+        assert [source.name for source in app.cameras] == ["front", "garden"]
+        assert app.cameras[1].max_fps == 5
+        assert mock_camera.call_args_list[1].kwargs["device"] == "/dev/video2"
+        assert mock_detector.call_count == 1
+    
+    def test_announce_names_camera(self):
+        """Test multi-camera announcements say which camera saw the object."""
+        app = PiDetectorApp()
+        app.audio = Mock()
+        app.audio.has_alert_sound.return_value = False
+        
+        app._announce({"dog": 1}, "Garden")
+        
+        assert app.audio.speak.call_args[0][0] == "Garden: Dog detected"
+    
+    @patch('pi_detector.main.ProcessCamera')
+    @patch('pi_detector.main.CameraHandler')
+    @patch('pi_detector.main.ObjectDetector')
+    @patch('pi_detector.main.AudioOutputSystem')
+    def test_capture_process(self, mock_audio, mock_detector, mock_camera, mock_process_camera):
+        """Test cameras can be captured in a child process through the frame bus."""
+        app = PiDetectorApp()
+        app.config.set("camera.capture_process", True)
+        
+        assert app.initialize() is True
+        assert mock_process_camera.called
+        assert not mock_camera.called
+        assert app.camera is mock_process_camera.return_value
+    
+    @patch('pi_detector.main.CameraHandler')
+    @patch('pi_detector.main.ObjectDetector')
+    @patch('pi_detector.main.AudioOutputSystem')
+    def test_gate_starts_cameras_in_standby(self, mock_audio, mock_detector, mock_camera):
+        """Test cameras run at the standby frame rate until the gate first activates."""
+        app = PiDetectorApp()
+        app.config.set("gating.enabled", True)
+        app.config.set("gating.triggers", ["schedule"])
+        app.config.set("gating.standby_fps", 2.0)
+        
+        try:
+            assert app.initialize() is True
+            assert app.gate.active is False
+            mock_camera.return_value.set_framerate.assert_called_with(2.0)
+            assert app.cameras[0].capture_fps == 2.0
+        finally:
+            app.gate.close()
+    
+    @patch('pi_detector.main.CameraHandler')
+    @patch('pi_detector.main.ObjectDetector')
+    @patch('pi_detector.main.AudioOutputSystem')
+    def test_cleanup_releases_ultrasonic_pins(self, mock_audio, mock_detector, mock_camera, tmp_path):
+        """Test cleanup disarms the echo callback and releases the sensor pins."""
+        recording = tmp_path / "echoes.json"
+        recording.write_text(json.dumps({"distances": [3.0]}))
+        app = PiDetectorApp()
+        app.config.set("gating.enabled", True)
+        app.config.set("gating.triggers", ["ultrasonic"])
+        app.config.set("gating.ultrasonic.simulate", str(recording))
+        
+        assert app.initialize() is True
+        sensor = app.gate.triggers[0].estimator.sensor
+        gpio = sensor.gpio
+        app.cleanup()
+        
+        assert sensor.ready is False
+        assert sensor.echo_pin not in gpio._callbacks
+        assert sensor.trig_pin not in gpio._modes and sensor.echo_pin not in gpio._modes
+
+
+class TestCreateDetector:
+    """Test cases for create_detector()."""
+    
+    def test_missing_screen_model_disables_cascade(self, tmp_path, caplog):
+        """Test a missing screen model disables cascade mode instead of screening synthetically."""
+        config = Config()
+        config.set("detection.model_path", str(tmp_path / "missing.tflite"))
+        config.set("detection.cascade.enabled", True)
+        
+        detector = create_detector(config)
+        
+        assert detector.screen_detector is None
+        assert "Cascade mode disabled" in caplog.text
+    
+    def test_simulated_backend_keeps_cascade(self):
+        """Test an explicitly simulated backend still builds the screen stage."""
+        config = Config()
+        config.set("detection.backend", "stub")
+        config.set("detection.cascade.enabled", True)
+        
+        detector = create_detector(config)
+        
+        assert detector.screen_detector is not None
+
+
+class TestEvalCommand:
+    """Test cases for `pi-detector eval`."""
+    
+    @pytest.fixture
+    def eval_args(self, tmp_path):
+        images_dir = tmp_path / "images"
+        images_dir.mkdir()
+        cv2.imwrite(str(images_dir / "a.jpg"), np.zeros((48, 64, 3), dtype=np.uint8))
+        config_path = tmp_path / "settings.json"
+        config_path.write_text(json.dumps(
+            {"detection": {"model_path": str(tmp_path / "missing.tflite")}}
+        ))
+        return argparse.Namespace(
+            config=str(config_path), source=str(images_dir), annotations=None, workers=0,
+            reduce="auto", limit=None, threshold=None, backend=None, json=None
+        )
+    
+    def test_missing_model_is_an_error(self, eval_args, capsys):
+        """Test a missing model fails instead of scoring the synthetic fallback."""
+        assert eval_command(eval_args) == 2
+        assert "missing.tflite not found" in capsys.readouterr().err
+    
+    def test_explicit_synthetic_backend(self, eval_args, capsys):
+        """Test the simulated detector can still be evaluated on request."""
+        eval_args.backend = "synthetic"
+        
+        assert eval_command(eval_args) == 0
+        assert "Images:      1 " in capsys.readouterr().out
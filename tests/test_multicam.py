@@ -0,0 +1,178 @@
+"""
+Tests for multi-camera scheduling.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from pi_detector.framebus import FrameBus
+from pi_detector.multicam import CameraSource, FairScheduler
+
+
+class FakeCamera:
+    """Camera producing frames at a fixed rate."""
+
+    def __init__(self, fps=100.0, value=0):
+        self.interval = 1.0 / fps
+        self.value = value
+        self.framerate = fps
+        self.captures = 0
+
+    def capture_frame(self):
+        self.captures += 1
+        time.sleep(self.interval)
+        return np.full((4, 4, 3), self.value, dtype=np.uint8)
+
+
+class BusCamera:
+    """Capture process stand-in handing out zero-copy views of frame bus slots."""
+
+    zero_copy = True
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.last_frame = 0
+
+    def capture_frame(self):
+        time.sleep(0.01)
+        self.bus.publish(np.zeros(self.bus.shape, dtype=np.uint8))
+        self.last_frame, _, frame = self.bus.read(self.last_frame, copy=False)
+        return frame
+
+
+class BrokenCamera:
+    """Camera whose reads always fail."""
+
+    def capture_frame(self):
+        return None
+
+
+def run_scheduler(sources, duration):
+    """Collect the camera names served during a time span."""
+    scheduler = FairScheduler(sources)
+    scheduler.start()
+    served = []
+    end = time.monotonic() + duration
+    try:
+        while time.monotonic() < end:
+            item = scheduler.next(timeout=0.2)
+            if item is not None:
+                served.append(item[0].name)
+    finally:
+        scheduler.close()
+    return served, scheduler
+
+
+class TestFairScheduler:
+    """Test cases for FairScheduler."""
+
+    def test_round_robin(self):
+        """Test that equally fast cameras alternate."""
+        served, _ = run_scheduler(
+            [CameraSource("a", FakeCamera(value=1)), CameraSource("b", FakeCamera(value=2))], 0.3
+        )
+
+        assert served.count("a") > 5
+        assert abs(served.count("a") - served.count("b")) <= 2
+
+    def test_fast_camera_does_not_starve_slow_one(self):
+        """Test that a slow camera's frames are all processed next to a fast one."""
+        slow = CameraSource("slow", FakeCamera(fps=20))
+        served, _ = run_scheduler([CameraSource("fast", FakeCamera(fps=200)), slow], 0.5)
+
+        assert served.count("slow") >= 6
+        assert served.count("fast") > served.count("slow")
+
+    def test_fps_cap(self):
+        """Test that a capped camera is served at most at its cap."""
+        capped = CameraSource("capped", FakeCamera(fps=200), max_fps=10)
+        served, _ = run_scheduler([capped, CameraSource("free", FakeCamera(fps=200))], 0.5)
+
+        assert 3 <= served.count("capped") <= 7
+        assert served.count("free") > 20
+
+    def test_frames_match_camera(self):
+        """Test that each frame comes from the camera it is reported with."""
+        scheduler = FairScheduler([CameraSource("a", FakeCamera(value=1)),
+                                   CameraSource("b", FakeCamera(value=2))])
+        scheduler.start()
+        try:
+            for _ in range(10):
+                source, frame = scheduler.next(timeout=1.0)
+                assert frame[0, 0, 0] == source.camera.value
+        finally:
+            scheduler.close()
+
+    def test_failing_camera(self):
+        """Test that a failing camera is counted and does not block the others."""
+        served, scheduler = run_scheduler(
+            [CameraSource("broken", BrokenCamera()), CameraSource("ok", FakeCamera())], 0.3
+        )
+
+        assert set(served) == {"ok"}
+        assert scheduler.stats()["broken"]["capture_failures"] > 0
+
+    def test_close_releases_waiter(self):
+        """Test that close() wakes a caller blocked in next()."""
+        scheduler = FairScheduler([CameraSource("broken", BrokenCamera())])
+        scheduler.start()
+        result = {}
+        waiter = threading.Thread(target=lambda: result.update(item=scheduler.next(timeout=5.0)))
+        waiter.start()
+        time.sleep(0.05)
+
+        scheduler.close()
+        waiter.join(timeout=1.0)
+        assert not waiter.is_alive()
+        assert result["item"] is None
+
+
+class TestCameraSource:
+    """Test cases for CameraSource."""
+
+    def test_standby_throttles_capture(self):
+        """Test a capture limit cuts camera reads and lifting it resumes them at once."""
+        camera = FakeCamera(fps=200.0)
+        source = CameraSource("a", camera)
+        source.start(lambda: None)
+        try:
+            source.set_capture_fps(2.0)
+            time.sleep(0.1)
+            before = camera.captures
+            time.sleep(0.5)
+            assert camera.captures - before <= 2
+
+            source.set_capture_fps(None)
+            before = camera.captures
+            deadline = time.monotonic() + 2.0
+            while camera.captures - before < 20 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert camera.captures - before >= 20
+        finally:
+            source.stop()
+
+    def test_overwritten_zero_copy_frame(self):
+        """Test a zero-copy frame whose slot is reused is reported invalid and counted."""
+        bus = FrameBus(shape=(4, 4, 3), slots=2)
+        source = CameraSource("a", BusCamera(bus))
+        source.start(lambda: None)
+        try:
+            deadline = time.monotonic() + 2.0
+            while not source.has_new_frame() and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            source.stop()
+
+        frame = source.take(time.monotonic())
+        assert not frame.flags.writeable
+        assert source.frame_valid()
+
+        bus.publish(np.ones((4, 4, 3), dtype=np.uint8))
+        bus.publish(np.ones((4, 4, 3), dtype=np.uint8))
+        assert not source.frame_valid()
+        assert source.frames_overwritten == 1
+
+        del frame, source
+        bus.close()
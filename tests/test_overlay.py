@@ -0,0 +1,92 @@
+"""
+Tests for the overlay renderer.
+"""
+
+import cv2
+import numpy as np
+
+from pi_detector.overlay import DoubleBuffer, OverlayRenderer
+
+
+def reference_draw(frame, box, text, box_color, text_color, alpha=0.3):
+    """Full-frame copy and blend, as the IMX500 demo used to draw labels."""
+    x, y, w, h = box
+    (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+    text_x, text_y = x + 5, y + 15
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (text_x, text_y - text_height),
+                  (text_x + text_width, text_y + baseline), (255, 255, 255), cv2.FILLED)
+    cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+    cv2.putText(frame, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, text_color, 1)
+    cv2.rectangle(frame, (x, y), (x + w, y + h), box_color, thickness=2)
+
+
+class TestOverlayRenderer:
+    """Test cases for OverlayRenderer."""
+
+    def test_matches_full_frame_blend(self):
+        """Test ROI blending and sprites reproduce the full-frame drawing."""
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+        boxes = [(10, 20, 100, 80), (150, 100, 120, 100), (300, 220, 50, 50)]
+        texts = ["person (0.91)", "dog (0.77)", "cat (0.60)"]
+        colors = [(0, 0, 255)] * 3
+
+        expected = frame.copy()
+        for box, text in zip(boxes, texts):
+            reference_draw(expected, box, text, (0, 0, 255), (0, 0, 255))
+
+        OverlayRenderer().draw_detections(frame, boxes, texts, colors, colors)
+
+        diff = np.abs(frame.astype(int) - expected.astype(int))
+        assert diff.max() <= 1
+
+    def test_sprites_cached_by_text(self):
+        """Test each label string is rendered once and the cache is bounded."""
+        renderer = OverlayRenderer(max_sprites=2)
+
+        first = renderer.sprite("dog (0.50)")
+        assert renderer.sprite("dog (0.50)") is first
+        renderer.sprite("cat (0.50)")
+        renderer.sprite("bird (0.50)")
+        assert "dog (0.50)" not in renderer._sprites
+
+    def test_new_confidence_renders_only_new_digits(self, monkeypatch):
+        """Test the class name is rendered once and labels reuse cached digits."""
+        rendered = []
+        put_text = cv2.putText
+
+        def spy(image, text, *args, **kwargs):
+            rendered.append(text)
+            return put_text(image, text, *args, **kwargs)
+
+        monkeypatch.setattr(cv2, "putText", spy)
+        renderer = OverlayRenderer()
+        renderer.sprite("dog (0.50)")
+        rendered.clear()
+        renderer.sprite("dog (0.57)")
+        renderer.sprite("dog (0.75)")
+
+        assert rendered == ["7"]
+
+    def test_four_channel_frames(self):
+        """Test drawing on XRGB frames from the camera's main stream."""
+        frame = np.zeros((100, 100, 4), dtype=np.uint8)
+        OverlayRenderer().draw_detections(frame, [(5, 5, 50, 50)], ["person"],
+                                          [(0, 255, 0)], [(0, 0, 255)])
+        assert frame[..., 2].max() == 255
+        assert frame[..., 3].max() == 0
+
+
+class TestDoubleBuffer:
+    """Test cases for DoubleBuffer."""
+
+    def test_publish_and_read(self):
+        """Test readers see the latest published value."""
+        buffer = DoubleBuffer()
+        assert buffer.read() is None
+
+        buffer.publish([1])
+        buffer.publish([2])
+        assert buffer.read() == [2]
+        assert buffer.version == 2
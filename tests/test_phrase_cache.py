@@ -0,0 +1,55 @@
+"""
+Tests for the TTS phrase cache.
+"""
+
+from pi_detector.phrase_cache import PhraseCache
+
+
+class FakeSynth:
+    """Records synthesis calls and writes placeholder audio."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, path):
+        self.calls.append(text)
+        path.write_bytes(f"RIFF{text}".encode())
+
+
+class TestPhraseCache:
+    """Test cases for PhraseCache."""
+
+    def test_renders_once(self, tmp_path):
+        """Test a phrase is synthesized only on first use."""
+        synth = FakeSynth()
+        cache = PhraseCache(synth, cache_dir=str(tmp_path))
+
+        assert cache.get("Human detected") is None
+        assert cache.get_or_render("Human detected") == b"RIFFHuman detected"
+        assert cache.get_or_render("Human detected") == b"RIFFHuman detected"
+        assert synth.calls == ["Human detected"]
+
+    def test_disk_cache_survives_restart(self, tmp_path):
+        """Test a new cache instance loads phrases rendered earlier."""
+        PhraseCache(FakeSynth(), cache_dir=str(tmp_path)).warm(["Dog detected"])
+
+        synth = FakeSynth()
+        cache = PhraseCache(synth, cache_dir=str(tmp_path))
+        assert cache.get_or_render("Dog detected") == b"RIFFDog detected"
+        assert synth.calls == []
+
+    def test_settings_change_key(self, tmp_path):
+        """Test voice, rate and volume are part of the cache key."""
+        cache = PhraseCache(FakeSynth(), cache_dir=str(tmp_path))
+        key = cache.key("Cat detected")
+        cache.volume = 50
+        assert cache.key("Cat detected") != key
+
+    def test_limits(self, tmp_path):
+        """Test memory and disk entries are bounded."""
+        cache = PhraseCache(FakeSynth(), cache_dir=str(tmp_path),
+                            max_memory_entries=2, max_disk_entries=3)
+        cache.warm([f"phrase {i}" for i in range(5)])
+
+        assert len(cache._memory) == 2
+        assert len(list(tmp_path.glob("*.wav"))) == 3
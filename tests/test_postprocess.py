@@ -0,0 +1,105 @@
+"""
+Tests for raw output decoding and NMS.
+"""
+
+import warnings
+
+import numpy as np
+from pi_detector.postprocess import (RawOutputDecoder, class_aware_nms,
+                                     decode_ssd_boxes, soft_nms, top_k)
+
+
+class TestPostprocess:
+    """Test cases for post-processing helpers."""
+
+    def test_decode_zero_regression_returns_anchor(self):
+        """Test a zero regression decodes to the anchor box itself."""
+        anchors = np.array([[0.5, 0.5, 0.2, 0.4]], dtype=np.float32)
+        boxes = decode_ssd_boxes(np.zeros((1, 4), dtype=np.float32), anchors)
+        assert np.allclose(boxes, [[0.4, 0.3, 0.6, 0.7]])
+
+    def test_top_k_sorted(self):
+        """Test top_k returns the highest scores in descending order."""
+        scores = np.array([0.1, 0.9, 0.3, 0.7, 0.5])
+        assert top_k(scores, 3).tolist() == [1, 3, 4]
+
+    def test_top_k_zero(self):
+        """Test k <= 0 keeps no indices instead of all of them."""
+        scores = np.array([0.1, 0.9, 0.3])
+        assert top_k(scores, 0).tolist() == []
+        assert top_k(scores, -1).tolist() == []
+        assert top_k(scores, 10).tolist() == [1, 2, 0]
+
+    def test_nms_is_class_aware(self):
+        """Test overlapping boxes are only suppressed within a class."""
+        boxes = np.array([
+            [0.1, 0.1, 0.5, 0.5],
+            [0.11, 0.11, 0.51, 0.51],
+            [0.1, 0.1, 0.5, 0.5],
+        ], dtype=np.float32)
+        scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+        classes = np.array([0, 0, 16])
+
+        keep = class_aware_nms(boxes, scores, classes, iou_threshold=0.5)
+        assert keep.tolist() == [0, 2]
+
+    def test_soft_nms_decays_overlaps(self):
+        """Test soft-NMS keeps an overlapping box with a decayed score."""
+        boxes = np.array([[0.1, 0.1, 0.5, 0.5], [0.15, 0.15, 0.55, 0.55]], dtype=np.float32)
+        scores = np.array([0.9, 0.8], dtype=np.float32)
+        keep, kept_scores = soft_nms(boxes, scores, np.array([0, 0]))
+
+        assert keep.tolist() == [0, 1]
+        assert kept_scores[1] < 0.8
+
+    def test_ssd_decoder(self, tmp_path):
+        """Test SSD decoding picks the strong anchor and drops the duplicate."""
+        anchors = np.array([
+            [0.3, 0.3, 0.2, 0.2],
+            [0.3, 0.3, 0.2, 0.2],
+            [0.7, 0.7, 0.2, 0.2],
+        ], dtype=np.float32)
+        anchors_path = tmp_path / "anchors.npy"
+        np.save(anchors_path, anchors)
+
+        # Logits for [background, person, bicycle]
+        logits = np.full((1, 3, 3), -10.0, dtype=np.float32)
+        logits[0, 0, 1] = 4.0
+        logits[0, 1, 1] = 3.0
+        raw_boxes = np.zeros((1, 3, 4), dtype=np.float32)
+
+        decoder = RawOutputDecoder("ssd", anchors_path=str(anchors_path), score_threshold=0.5)
+        boxes, classes, scores = decoder.decode([raw_boxes, logits])
+
+        assert classes.tolist() == [0]
+        assert np.allclose(boxes[0], [0.2, 0.2, 0.4, 0.4])
+        assert scores[0] > 0.95
+
+    def test_ssd_decoder_extreme_thresholds(self, tmp_path):
+        """Test score thresholds of 0 and 1 do not break the logit comparison."""
+        anchors_path = tmp_path / "anchors.npy"
+        np.save(anchors_path, np.array([[0.3, 0.3, 0.2, 0.2], [0.7, 0.7, 0.2, 0.2]], dtype=np.float32))
+        logits = np.array([[[-10.0, 4.0], [-10.0, -10.0]]], dtype=np.float32)
+        raw_boxes = np.zeros((1, 2, 4), dtype=np.float32)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            decoder = RawOutputDecoder("ssd", anchors_path=str(anchors_path), score_threshold=1.0)
+            assert len(decoder.decode([raw_boxes, logits])[1]) == 0
+
+            decoder = RawOutputDecoder("ssd", anchors_path=str(anchors_path), score_threshold=0.0)
+            boxes, classes, scores = decoder.decode([raw_boxes, logits])
+        assert classes.tolist() == [0, 0]
+        assert scores[0] > 0.95
+
+    def test_yolo_decoder_pixel_boxes(self):
+        """Test YOLOv8-style channel-first rows in pixels are normalized."""
+        rows = np.zeros((1, 84, 100), dtype=np.float32)
+        rows[0, 0:4, 5] = [160, 160, 64, 32]  # cx, cy, w, h in pixels
+        rows[0, 4 + 16, 5] = 0.8  # dog
+
+        decoder = RawOutputDecoder("yolo", input_size=(320, 320), score_threshold=0.5)
+        boxes, classes, scores = decoder.decode([rows])
+
+        assert classes.tolist() == [16]
+        assert np.allclose(boxes[0], [0.45, 0.4, 0.55, 0.6])
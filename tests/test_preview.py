@@ -0,0 +1,129 @@
+"""
+Tests for the MJPEG preview server.
+"""
+
+import http.client
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from pi_detector.preview import BOUNDARY, PreviewServer
+
+
+DETECTIONS = [{'class': 'dog', 'confidence': 0.9, 'bbox': [0.25, 0.25, 0.75, 0.75]}]
+
+
+@pytest.fixture
+def server():
+    preview = PreviewServer(port=0, max_fps=50)
+    preview.add_channel("front")
+    assert preview.start()
+    yield preview
+    preview.close()
+
+
+def read_frames(port, count, path="/stream.mjpg?camera=front", timeout=5.0):
+    """Read JPEG parts from the stream."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    assert response.status == 200
+    assert BOUNDARY in response.getheader("Content-Type")
+
+    frames = []
+    while len(frames) < count:
+        line = response.fp.readline()
+        if line.startswith(b"Content-Length:"):
+            length = int(line.split(b":")[1])
+            response.fp.readline()
+            frames.append(response.fp.read(length))
+    conn.close()
+    return frames
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestPreviewServer:
+    """Test cases for PreviewServer."""
+
+    def test_idle_without_clients(self, server):
+        """Test that nothing is rendered while nobody is watching."""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        for _ in range(5):
+            server.submit(frame, DETECTIONS, "front")
+        time.sleep(0.1)
+
+        assert not server.watching("front")
+        assert server.channels["front"].pending is None
+        assert server.frames_encoded == 0
+
+    def test_stream_serves_annotated_jpeg(self, server):
+        """Test that a watching client receives decodable annotated frames."""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        result = {}
+        reader = threading.Thread(target=lambda: result.update(frames=read_frames(server.port, 2)))
+        reader.start()
+        assert wait_for(lambda: server.watching("front"))
+
+        while reader.is_alive():
+            server.submit(frame, DETECTIONS, "front")
+            time.sleep(0.01)
+
+        image = cv2.imdecode(np.frombuffer(result["frames"][0], np.uint8), cv2.IMREAD_COLOR)
+        assert image.shape == (48, 64, 3)
+        assert image.max() > 0  # The box was drawn on the black frame
+        assert frame.max() == 0  # The submitted frame itself is untouched
+
+    def test_encode_once_for_many_clients(self, server):
+        """Test that two clients share encodes instead of doubling them."""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        readers = [threading.Thread(target=read_frames, args=(server.port, 5)) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        assert wait_for(lambda: server.channels["front"].clients == 2)
+
+        submitted = 0
+        while any(reader.is_alive() for reader in readers):
+            server.submit(frame, [], "front")
+            submitted += 1
+            time.sleep(0.005)
+
+        assert server.frames_encoded <= 7
+        assert submitted > server.frames_encoded
+
+    def test_client_fps_cap(self, server):
+        """Test that a client asking for a low rate skips frames."""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        stop = threading.Event()
+
+        def produce():
+            while not stop.is_set():
+                server.submit(frame, [], "front")
+                time.sleep(0.005)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        try:
+            started = time.monotonic()
+            read_frames(server.port, 3, "/stream.mjpg?camera=front&fps=10")
+            elapsed = time.monotonic() - started
+        finally:
+            stop.set()
+            producer.join()
+
+        assert elapsed >= 0.18
+
+    def test_unknown_camera(self, server):
+        """Test that streams of unknown cameras are not found."""
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=2.0)
+        conn.request("GET", "/stream.mjpg?camera=garden")
+        assert conn.getresponse().status == 404
+        conn.close()
@@ -0,0 +1,122 @@
+"""
+Tests for event clip recording.
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+from pi_detector.recorder import ClipRecorder
+
+
+def feed(recorder, start, end, step=0.1):
+    """Add frames with timestamps in [start, end), brightness encoding the time."""
+    for i in range(round((end - start) / step)):
+        timestamp = start + i * step
+        while recorder._frames.full():
+            time.sleep(0.001)
+        frame = np.full((48, 64, 3), round(timestamp * 10) % 256, dtype=np.uint8)
+        recorder.add_frame(frame, timestamp)
+    while not recorder._frames.empty():
+        time.sleep(0.001)
+    time.sleep(0.02)
+
+
+def read_clip(path):
+    """Frame brightness values of a clip."""
+    capture = cv2.VideoCapture(str(path))
+    values = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        values.append(int(round(frame.mean())))
+    capture.release()
+    return values
+
+
+class TestClipRecorder:
+    """Test cases for ClipRecorder."""
+
+    def test_clip_has_pre_and_post_roll(self, tmp_path):
+        """Test a clip spans pre_seconds before to post_seconds after the trigger."""
+        recorder = ClipRecorder(str(tmp_path), pre_seconds=1.0, post_seconds=1.0, fps=10)
+        feed(recorder, 0.0, 3.0)
+        recorder.trigger(3.0)
+        feed(recorder, 3.0, 6.0)
+        recorder.close()
+
+        clips = list(tmp_path.glob("*.avi"))
+        assert len(clips) == 1
+        assert recorder.clips_written == 1
+        values = read_clip(clips[0])
+        assert 19 <= len(values) <= 22
+        assert abs(values[0] - 20) <= 2  # Starts at 2.0 s
+        assert abs(values[-1] - 40) <= 2  # Ends at 4.0 s
+
+    def test_retrigger_extends_clip(self, tmp_path):
+        """Test a trigger during the post-roll extends the same clip."""
+        recorder = ClipRecorder(str(tmp_path), pre_seconds=0.5, post_seconds=1.0, fps=10)
+        recorder.trigger(10.0)
+        feed(recorder, 10.0, 10.8)
+        recorder.trigger(10.8)
+        feed(recorder, 10.8, 13.0)
+        recorder.close()
+
+        clips = list(tmp_path.glob("*.avi"))
+        assert len(clips) == 1
+        assert 17 <= len(read_clip(clips[0])) <= 20
+
+    def test_max_clip_length(self, tmp_path):
+        """Test continuous triggers are split at max_clip_seconds."""
+        recorder = ClipRecorder(str(tmp_path), pre_seconds=0.0, post_seconds=1.0,
+                                max_clip_seconds=1.0, fps=10)
+        for second in range(3):
+            recorder.trigger(20.0 + second)
+            feed(recorder, 20.0 + second, 21.0 + second)
+        recorder.close()
+
+        assert recorder.clips_written >= 2
+        assert all(len(read_clip(path)) <= 11 for path in tmp_path.glob("*.avi"))
+
+    def test_memory_limit(self, tmp_path):
+        """Test the pre-event ring stays within its memory limit."""
+        recorder = ClipRecorder(str(tmp_path), pre_seconds=60.0, fps=10, max_memory_mb=0.002)
+        feed(recorder, 0.0, 2.0)
+        recorder.close()
+
+        assert 0 < recorder.ring_bytes <= 0.002 * 1024 * 1024
+        assert len(recorder.ring) < 20
+
+    def test_disk_quota(self, tmp_path):
+        """Test old clips are deleted to stay within the quota."""
+        for i in range(3):
+            old = tmp_path / f"old{i}.avi"
+            old.write_bytes(b"x" * 4096)
+            os.utime(old, (i, i))
+
+        recorder = ClipRecorder(str(tmp_path), pre_seconds=0.0, post_seconds=0.5,
+                                fps=10, max_disk_mb=0.01)
+        recorder.trigger(50.0)
+        feed(recorder, 50.0, 51.0)
+        recorder.close()
+
+        remaining = sorted(path.name for path in tmp_path.glob("*.avi"))
+        assert "old0.avi" not in remaining
+        assert sum((tmp_path / name).stat().st_size for name in remaining) <= 0.01 * 1024 * 1024
+        assert any(name.startswith("camera0-") for name in remaining)
+
+    def test_add_frame_never_blocks(self, tmp_path):
+        """Test frames are dropped rather than queued without bound."""
+        recorder = ClipRecorder(str(tmp_path), fps=1000)
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        started = time.perf_counter()
+        for i in range(200):
+            recorder.add_frame(frame, i * 0.01)
+        elapsed = time.perf_counter() - started
+        recorder.close()
+
+        assert elapsed < 0.1
+        assert recorder.frames_dropped > 0
@@ -0,0 +1,92 @@
+"""
+Tests for the preloaded alert sound bank.
+"""
+
+from types import SimpleNamespace
+
+from pi_detector import sound_bank
+from pi_detector.sound_bank import SoundBank
+
+
+class FakeMixer:
+    """Minimal stand-in for pygame.mixer that records calls."""
+
+    def __init__(self):
+        self.init_calls = 0
+        self.loaded = []
+        self.played = []
+        mixer = self
+
+        class Sound:
+            def __init__(self, path=None, file=None):
+                mixer.loaded.append(path)
+                self.path = path
+                self.volume = 1.0
+
+            def set_volume(self, volume):
+                self.volume = volume
+
+            def get_length(self):
+                return 0.5
+
+        class Channel:
+            def play(self, sound):
+                mixer.played.append(sound.path)
+
+        self.Sound = Sound
+        self._channel = Channel()
+
+    def init(self):
+        self.init_calls += 1
+
+    def set_num_channels(self, count):
+        self.channels = count
+
+    def find_channel(self, force=False):
+        return self._channel
+
+    def quit(self):
+        pass
+
+
+class TestSoundBank:
+    """Test cases for SoundBank."""
+
+    def test_unavailable_without_pygame(self, monkeypatch):
+        """Test playback reports failure when pygame is missing."""
+        monkeypatch.setattr(sound_bank, "PYGAME_AVAILABLE", False)
+        bank = SoundBank({"person": "person.wav"})
+
+        assert bank.has("person")
+        assert bank.play("person") is False
+        assert bank.play_buffer(b"RIFF") is None
+
+    def test_mixer_initialized_once_and_sounds_preloaded(self, monkeypatch):
+        """Test the mixer is set up once and files are decoded only at init."""
+        mixer = FakeMixer()
+        monkeypatch.setattr(sound_bank, "PYGAME_AVAILABLE", True)
+        monkeypatch.setattr(sound_bank, "pygame", SimpleNamespace(mixer=mixer), raising=False)
+
+        bank = SoundBank({"person": "person.wav", "dog": "dog.wav"}, channels=4, volume=50)
+        assert bank.init()
+        for _ in range(3):
+            assert bank.play("person")
+        assert bank.play("dog")
+        assert not bank.play("cat")
+
+        assert mixer.init_calls == 1
+        assert mixer.channels == 4
+        assert sorted(mixer.loaded) == ["dog.wav", "person.wav"]
+        assert mixer.played == ["person.wav"] * 3 + ["dog.wav"]
+        assert bank.sounds["person"].volume == 0.5
+
+    def test_play_file_caches_by_path(self, monkeypatch):
+        """Test ad-hoc files are read from disk only on first play."""
+        mixer = FakeMixer()
+        monkeypatch.setattr(sound_bank, "PYGAME_AVAILABLE", True)
+        monkeypatch.setattr(sound_bank, "pygame", SimpleNamespace(mixer=mixer), raising=False)
+
+        bank = SoundBank()
+        assert bank.play_file("chime.wav")
+        assert bank.play_file("chime.wav")
+        assert mixer.loaded == ["chime.wav"]
@@ -0,0 +1,150 @@
+"""
+Tests for edge-timed ultrasonic ranging.
+"""
+
+import json
+import time
+
+import pytest
+
+from pi_detector.ultrasonic import (ACTIVATE, DEACTIVATE, FakeGPIO, PresenceEstimator,
+                                    UltrasonicSensor, distance_to_pulse)
+
+
+def make_sensor(gpio, **kwargs):
+    sensor = UltrasonicSensor(gpio=gpio, settle_time=0, **kwargs)
+    assert sensor.setup()
+    return sensor
+
+
+class TestUltrasonicSensor:
+    """Test cases for UltrasonicSensor with the simulated GPIO backend."""
+
+    def test_measures_scripted_distances(self):
+        """Test echo pulses are timed from edge callbacks."""
+        gpio = FakeGPIO.from_distances([0.5, 1.0, 2.0], echo_delay=0.001)
+        sensor = make_sensor(gpio)
+
+        readings = [sensor.measure() for _ in range(3)]
+        sensor.close()
+
+        assert readings == pytest.approx([0.5, 1.0, 2.0])
+        assert sensor.last_pulse == pytest.approx(distance_to_pulse(2.0))
+        assert gpio.clock() == pytest.approx(0.003 + distance_to_pulse(3.5))
+        assert gpio.triggers == 3
+        assert sensor.stats["readings"] == 3
+
+    def test_late_callbacks_on_short_echo(self):
+        """Test a close object is measured when the pin has fallen before the rise callback runs."""
+        gpio = FakeGPIO.from_distances([0.05, 0.3], callback_delay=0.0005)
+        sensor = make_sensor(gpio, timeout=0.05)
+        levels = []
+        gpio.add_event_detect(sensor.echo_pin, FakeGPIO.BOTH,
+                              callback=lambda pin: (levels.append(gpio.input(pin)),
+                                                    sensor._on_edge(pin)))
+
+        assert sensor.measure() == pytest.approx(0.05)
+        assert levels == [FakeGPIO.LOW, FakeGPIO.LOW]
+        assert sensor.measure() == pytest.approx(0.3)
+        assert sensor.stats["no_echo"] == 0
+
+    def test_stuck_line_is_not_triggered(self):
+        """Test a line already high is reported without sending a trigger."""
+        gpio = FakeGPIO([float("inf")], loop=False)
+        sensor = make_sensor(gpio, timeout=0.05)
+        sensor.measure()
+
+        assert sensor.measure() is None
+        assert sensor.last_error == "stuck_high"
+        assert gpio.triggers == 1
+
+    def test_missing_and_stuck_echo(self):
+        """Test timeouts distinguish a silent sensor from a stuck echo line."""
+        gpio = FakeGPIO([None, float("inf")], loop=False)
+        sensor = make_sensor(gpio, timeout=0.05)
+
+        assert sensor.measure() is None
+        assert sensor.last_error == "no_echo"
+        assert sensor.measure() is None
+        assert sensor.last_error == "stuck_high"
+
+        sensor.reset_echo()
+        assert gpio.input(sensor.echo_pin) == FakeGPIO.LOW
+
+    def test_out_of_range(self):
+        """Test readings outside the sensor's range are rejected."""
+        sensor = make_sensor(FakeGPIO.from_distances([6.0]), max_distance=4.0)
+
+        assert sensor.measure() is None
+        assert sensor.last_error == "out_of_range"
+
+    def test_record_and_replay(self, tmp_path):
+        """Test recorded pulses replay through FakeGPIO.load()."""
+        sensor = make_sensor(FakeGPIO.from_distances([0.8, None]))
+        sensor.record = True
+        sensor.timeout = 0.05
+        sensor.measure()
+        sensor.measure()
+        path = tmp_path / "echoes.json"
+        sensor.save_recording(str(path))
+
+        pulses = json.loads(path.read_text())["pulses"]
+        assert pulses[1] is None
+        assert pulses[0] == pytest.approx(distance_to_pulse(0.8))
+
+        replay = make_sensor(FakeGPIO.load(str(path)))
+        assert replay.measure() == pytest.approx(0.8)
+
+
+class TestPresenceEstimator:
+    """Test cases for PresenceEstimator."""
+
+    def test_hysteresis_suppresses_flapping(self):
+        """Test readings jittering around the threshold produce one event."""
+        events = []
+        estimator = PresenceEstimator(enter_distance=1.0, exit_distance=1.3, window=3, alpha=1.0)
+        estimator.subscribe(lambda event, distance: events.append(event))
+
+        for reading in [3.0, 2.0, 0.9, 0.9, 1.1, 0.95, 1.15, 1.05, 0.9]:
+            estimator.update(reading)
+        assert events == [ACTIVATE]
+
+        for reading in [2.0, 2.5, 3.0]:
+            estimator.update(reading)
+        assert events == [ACTIVATE, DEACTIVATE]
+
+    def test_median_rejects_spikes(self):
+        """Test a single spurious close reading does not activate."""
+        estimator = PresenceEstimator(enter_distance=1.0, window=5, alpha=1.0)
+
+        events = [estimator.update(r) for r in [3.0, 3.0, 0.3, 3.0, None, 3.0]]
+        assert events == [None] * 6
+
+    def test_adaptive_interval(self):
+        """Test sampling speeds up as something approaches."""
+        estimator = PresenceEstimator(enter_distance=1.0, exit_distance=1.0,
+                                      active_interval=0.1, idle_interval=0.5,
+                                      approach_distance=3.0, window=1, alpha=1.0)
+
+        estimator.update(4.0)
+        assert estimator.next_interval() == pytest.approx(0.5)
+        estimator.update(2.0)
+        assert estimator.next_interval() == pytest.approx(0.3)
+        estimator.update(0.5)
+        assert estimator.present
+        assert estimator.next_interval() == pytest.approx(0.1)
+
+    def test_samples_sensor_in_background(self):
+        """Test the sampling thread publishes events from sensor readings."""
+        events = []
+        sensor = make_sensor(FakeGPIO.from_distances([0.5]))
+        estimator = PresenceEstimator(sensor, window=1, active_interval=0.01)
+        estimator.subscribe(lambda event, distance: events.append(event))
+
+        estimator.start()
+        deadline = time.monotonic() + 2.0
+        while not events and time.monotonic() < deadline:
+            time.sleep(0.01)
+        estimator.stop()
+
+        assert events == [ACTIVATE]
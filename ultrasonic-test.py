@@ -2,70 +2,53 @@
 """
 Ultrasonic sensor test with improved error handling
 """
-import RPi.GPIO as GPIO
+import argparse
+import statistics
+import sys
 import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from pi_detector.ultrasonic import FakeGPIO, UltrasonicSensor
 
 # GPIO pins
 TRIG_PIN = 23
 ECHO_PIN = 24
 
-def setup_sensor():
+def setup_sensor(simulate=None):
     """Setup GPIO pins for ultrasonic sensor."""
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(TRIG_PIN, GPIO.OUT)
-    GPIO.setup(ECHO_PIN, GPIO.IN)
-    GPIO.output(TRIG_PIN, False)
+    gpio = FakeGPIO.load(simulate) if simulate else None
+    sensor = UltrasonicSensor(TRIG_PIN, ECHO_PIN, gpio=gpio, settle_time=0.5)
+    if not sensor.setup():
+        print("✗ Sensor setup failed (RPi.GPIO missing? Use --simulate FILE)")
+        sys.exit(1)
     print(f"Sensor setup complete. TRIG: GPIO{TRIG_PIN}, ECHO: GPIO{ECHO_PIN}")
-    time.sleep(0.5)  # Allow sensor to settle
+    return sensor
 
-def measure_distance():
-    """Measure distance with timeout protection."""
-    try:
-        # Ensure trigger is low
-        GPIO.output(TRIG_PIN, False)
-        time.sleep(0.01)
-        
-        # Send 10us pulse
-        GPIO.output(TRIG_PIN, True)
-        time.sleep(0.00001)
-        GPIO.output(TRIG_PIN, False)
-        
-        # Wait for echo start with timeout
-        timeout = time.time() + 0.1  # 100ms timeout
-        while GPIO.input(ECHO_PIN) == 0:
-            pulse_start = time.time()
-            if time.time() > timeout:
-                print("⚠️  Timeout waiting for echo start (ECHO stuck LOW)")
-                return None
-        
-        # Wait for echo end with timeout
-        timeout = time.time() + 0.1
-        while GPIO.input(ECHO_PIN) == 1:
-            pulse_end = time.time()
-            if time.time() > timeout:
-                print("⚠️  Timeout waiting for echo end (ECHO stuck HIGH)")
-                # Force reset
-                GPIO.setup(ECHO_PIN, GPIO.OUT)
-                GPIO.output(ECHO_PIN, False)
-                time.sleep(0.01)
-                GPIO.setup(ECHO_PIN, GPIO.IN)
-                return None
-        
-        # Calculate distance
-        pulse_duration = pulse_end - pulse_start
-        distance_cm = (pulse_duration * 34300) / 2
-        
-        # Filter invalid readings
-        if distance_cm < 2 or distance_cm > 400:
-            return None
-        
-        return distance_cm
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
+def measure_distance(sensor):
+    """Measure distance in cm, timed from echo edge events."""
+    distance = sensor.measure()
+    if distance is not None:
+        return distance * 100
+    
+    if sensor.last_error == "no_echo":
+        print("⚠️  Timeout waiting for echo start (ECHO stuck LOW)")
+    elif sensor.last_error == "stuck_high":
+        print("⚠️  Timeout waiting for echo end (ECHO stuck HIGH)")
+        # Force reset
+        sensor.reset_echo()
+    return None
 
 def main():
+    parser = argparse.ArgumentParser(description="HC-SR04 ultrasonic sensor test")
+    parser.add_argument("--simulate", metavar="FILE",
+                        help="Replay recorded echo pulses instead of reading GPIO")
+    parser.add_argument("--record", metavar="FILE",
+                        help="Save echo pulses to FILE for later --simulate runs")
+    parser.add_argument("--count", type=int, default=0,
+                        help="Stop after this many measurements (default: run until Ctrl+C)")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("HC-SR04 Ultrasonic Sensor Test")
     print("=" * 50)
@@ -76,17 +59,21 @@ def main():
     print("4. Try different GPIO pins")
     print("\nPress Ctrl+C to exit\n")
     
-    setup_sensor()
+    sensor = setup_sensor(args.simulate)
+    sensor.record = bool(args.record)
     
     successful = 0
     failed = 0
+    readings = []
+    started = time.process_time()
     
     try:
-        while True:
-            distance = measure_distance()
+        while not args.count or successful + failed < args.count:
+            distance = measure_distance(sensor)
             
             if distance is not None:
                 successful += 1
+                readings.append(distance)
                 print(f"✓ Distance: {distance:.1f} cm | Success: {successful}, Failed: {failed}")
             else:
                 failed += 1
@@ -97,9 +84,17 @@ def main():
     except KeyboardInterrupt:
         print("\n\nStopping...")
     finally:
-        GPIO.cleanup()
+        cpu_time = time.process_time() - started
+        sensor.close()
         print("GPIO cleaned up")
+        if args.record:
+            sensor.save_recording(args.record)
+            print(f"Recorded {len(sensor.pulses)} pulses to {args.record}")
         print(f"\nTotal: {successful} successful, {failed} failed")
+        if len(readings) > 1:
+            print(f"Mean: {statistics.mean(readings):.1f} cm, "
+                  f"jitter (stdev): {statistics.stdev(readings):.2f} cm")
+        print(f"CPU time: {cpu_time:.3f} s")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
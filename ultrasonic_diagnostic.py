@@ -3,12 +3,24 @@
 Ultrasonic Sensor Hardware Diagnostic
 Tests GPIO pins and checks for common wiring issues
 """
-import RPi.GPIO as GPIO
+import argparse
+import sys
 import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from pi_detector.ultrasonic import GPIO as RPI_GPIO, FakeGPIO, UltrasonicSensor
 
 TRIG_PIN = 23
 ECHO_PIN = 24
 
+parser = argparse.ArgumentParser(description="HC-SR04 hardware diagnostic")
+parser.add_argument("--simulate", metavar="FILE",
+                    help="Run against recorded echo pulses instead of GPIO")
+args = parser.parse_args()
+
+GPIO = FakeGPIO.load(args.simulate) if args.simulate else RPI_GPIO
+
 print("=" * 60)
 print("HC-SR04 Hardware Diagnostic Tool")
 print("=" * 60)
@@ -16,6 +28,8 @@ print("=" * 60)
 # Test 1: Check GPIO access
 print("\n[Test 1] Checking GPIO access...")
 try:
+    if GPIO is None:
+        raise RuntimeError("RPi.GPIO not installed")
     GPIO.setmode(GPIO.BCM)
     print("✓ GPIO access OK")
 except Exception as e:
@@ -64,54 +78,35 @@ print("✓ TRIG pin toggling works")
 print("\n[Test 5] Attempting distance measurement...")
 measurement_ok = False
 
+sensor = UltrasonicSensor(TRIG_PIN, ECHO_PIN, gpio=GPIO, timeout=0.05, settle_time=0.01)
+sensor.setup()
+
 for attempt in range(3):
     print(f"  Attempt {attempt + 1}/3...")
     
-    # Send trigger pulse
+    # Trigger and time the echo from edge events
     GPIO.output(TRIG_PIN, False)
     time.sleep(0.01)
-    GPIO.output(TRIG_PIN, True)
-    time.sleep(0.00001)
-    GPIO.output(TRIG_PIN, False)
+    distance = sensor.measure()
     
-    # Wait for echo with short timeout
-    start_time = time.time()
-    timeout = start_time + 0.05
-    
-    # Wait for HIGH
-    while GPIO.input(ECHO_PIN) == 0 and time.time() < timeout:
-        pass
-    
-    if time.time() >= timeout:
+    if sensor.last_error == "no_echo":
         print("    ✗ ECHO never went HIGH (sensor not responding)")
         continue
     
-    pulse_start = time.time()
-    
-    # Wait for LOW
-    timeout = time.time() + 0.05
-    while GPIO.input(ECHO_PIN) == 1 and time.time() < timeout:
-        pass
-    
-    if time.time() >= timeout:
+    if sensor.last_error == "stuck_high":
         print("    ✗ ECHO stuck HIGH (voltage divider issue?)")
         # Try to reset
-        GPIO.setup(ECHO_PIN, GPIO.OUT)
-        GPIO.output(ECHO_PIN, False)
-        time.sleep(0.01)
-        GPIO.setup(ECHO_PIN, GPIO.IN)
+        sensor.reset_echo()
         continue
     
-    pulse_end = time.time()
-    duration = pulse_end - pulse_start
-    distance = (duration * 34300) / 2
-    
-    if 2 < distance < 400:
-        print(f"    ✓ Distance: {distance:.1f} cm")
+    if distance is not None:
+        print(f"    ✓ Distance: {distance * 100:.1f} cm")
         measurement_ok = True
         break
     else:
-        print(f"    ⚠️  Invalid reading: {distance:.1f} cm")
+        print(f"    ⚠️  Invalid reading: {sensor.last_pulse * 34300 / 2:.1f} cm")
+
+sensor.close()
 
 print("\n" + "=" * 60)
 print("DIAGNOSTIC SUMMARY")